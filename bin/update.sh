@@ -19,12 +19,33 @@ fi
 UPGRADE=0
 PULL=0
 REMOTE=0
+JOBS=""
+HOSTS=""
+PROFILE=""
+METRICS="${DOTFILES_METRICS:-}"
+SUDO_SESSION="${DOTFILES_SUDO_SESSION:-0}"
+BUNDLE="${DOTFILES_BUNDLE:-}"
+THROTTLE="${DOTFILES_THROTTLE:-1}"
+RESUME=0
+PREFETCH=0
+SSH_MUX="${DOTFILES_SSH_MUX:-1}"
 ARGS=()
 for arg in "$@"; do
     case "$arg" in
         --upgrade) UPGRADE=1 ;;
         --pull) PULL=1 ;;
         --remote) REMOTE=1 ;;
+        --jobs=*) JOBS="${arg#--jobs=}" ;;
+        --hosts=*) HOSTS="${arg#--hosts=}" ;;
+        --profile) PROFILE="${XDG_STATE_HOME:-$HOME/.local/state}/dot/profile" ;;
+        --profile=*) PROFILE="${arg#--profile=}" ;;
+        --metrics=*) METRICS="${arg#--metrics=}" ;;
+        --sudo-session) SUDO_SESSION=1 ;;
+        --bundle=*) BUNDLE="${arg#--bundle=}" ;;
+        --no-throttle) THROTTLE=0 ;;
+        --resume) RESUME=1 ;;
+        --prefetch) PREFETCH=1 ;;
+        --no-ssh-mux) SSH_MUX=0 ;;
         *) ARGS+=("$arg") ;;
     esac
 done
@@ -35,5 +56,46 @@ else
     INVENTORY="@local"
 fi
 
-DOTFILES_UPGRADE=$UPGRADE DOTFILES_PULL=$PULL uv run pyinfra "$INVENTORY" configure.py ${ARGS[@]+"${ARGS[@]}"}
+export DOTFILES_UPGRADE=$UPGRADE DOTFILES_PULL=$PULL
+# Builds run niced and in a systemd user scope unless --no-throttle
+# (see pyinfra_throttle)
+export DOTFILES_THROTTLE=$THROTTLE
+# --resume skips sections the last runs finished with unchanged inputs
+# (see pyinfra_journal)
+export DOTFILES_RESUME=$RESUME
+# --prefetch only downloads what the next run installs (dot-prefetch.timer)
+export DOTFILES_PREFETCH=$PREFETCH
+# --remote reuses one persistent ssh master per host unless --no-ssh-mux
+# (see pyinfra_sshmux)
+export DOTFILES_SSH_MUX=$SSH_MUX
+if [[ -n "$PROFILE" ]]; then
+    export DOTFILES_PROFILE="$PROFILE"
+fi
+if [[ -n "$METRICS" ]]; then
+    export DOTFILES_METRICS="$METRICS"
+fi
+# --bundle=<tarball> provisions from an offline bundle (see pyinfra_bundle);
+# relative to where the script was started, not ~/dot
+if [[ -n "$BUNDLE" ]]; then
+    [[ "$BUNDLE" == /* ]] || BUNDLE="$OLDPWD/$BUNDLE"
+    export DOTFILES_BUNDLE="$BUNDLE"
+fi
+
+# --sudo-session authenticates once and serves every sudo of the run from one
+# root helper (see pyinfra_sudo); it exits together with this script
+if [[ "$SUDO_SESSION" == "1" && "$REMOTE" == "0" ]]; then
+    eval "$(uv run python -m pyinfra_sudo start --parent $$)"
+fi
+
+# --remote --hosts=N runs up to N inventory hosts side by side, one log each
+if [[ -n "$HOSTS" && "$REMOTE" == "1" ]]; then
+    exec uv run python -m pyinfra_runner fleet --jobs "$HOSTS" "$INVENTORY" ${ARGS[@]+"${ARGS[@]}"}
+fi
+
+# --jobs=N runs independent tag sections (see sections.py) side by side
+if [[ -n "$JOBS" ]]; then
+    exec uv run python -m pyinfra_runner sections --jobs "$JOBS" "$INVENTORY" ${ARGS[@]+"${ARGS[@]}"}
+fi
+
+uv run pyinfra "$INVENTORY" configure.py ${ARGS[@]+"${ARGS[@]}"}
 
@@ -8,33 +8,92 @@ from pyinfra.operations import (
     apk,
     apt,
     git,
-    systemd,
     server,
-    cargo,
 )
-from pyinfra.facts.files import FindFiles, FindDirectories, File, Link
+from pyinfra.facts.files import Directory, FindFiles, FindDirectories, File, Link
 from pyinfra.facts.server import Command, Home, Os, Which
 from pyinfra_fisher import operations as fisher
 from pyinfra_paru import operations as paru
 from pyinfra_bun import operations as bun
+from pyinfra_cargo import operations as cargo
 from pyinfra_go import operations as go
+from pyinfra_apt import operations as apt_repos
+from pyinfra_batch import facts as batch
+from pyinfra_cache import operations as cache
+from pyinfra_direnv import operations as direnv
+from pyinfra_etc import operations as etc
+from pyinfra_kernel import operations as kernel
+from pyinfra_systemd import operations as units
+from pyinfra_throttle import policy as throttle
+from pyinfra_throttle.facts import ThrottleSupport
+from pyinfra_uv import operations as uv
+from pyinfra_uv.facts import UvTools
+from pyinfra_profile import profiler, telemetry
+from pyinfra_export import script as export
+from pyinfra_bundle import bundle, operations as bundled
+from pyinfra_journal import journal
+from pyinfra_prefetch import operations as prefetch
 from pyinfra_git.facts import (
     GitSigningConfigCurrent,
     GpgAgentConfigCurrent,
     SmartcardKeysCurrent,
 )
+from sections import SECTIONS
 
 # Check if we're in upgrade mode
 upgrade_mode = os.environ.get("DOTFILES_UPGRADE", "0") == "1"
 pull_mode = os.environ.get("DOTFILES_PULL", "0") == "1"
+# Download-only run from dot-prefetch.timer: only the prefetch section at the end runs
+prefetch_mode = os.environ.get("DOTFILES_PREFETCH", "0") == "1"
 
 # Tag filtering: comma-separated tags to run; empty = run all
 _tags_env = os.environ.get("DOTFILES_TAGS", "")
 active_tags = {t.strip() for t in _tags_env.split(",") if t.strip()}
 
 
+_run_label = "-".join(sorted(active_tags)) or "all"
+
+# Opt-in profiling: DOTFILES_PROFILE=<dir> writes profile-<tags>.{json,folded}
+_profile_dir = os.environ.get("DOTFILES_PROFILE", "")
+if _profile_dir:
+    profiler.start(
+        _profile_dir,
+        label=_run_label,
+        top=int(os.environ.get("DOTFILES_PROFILE_TOP", "15")),
+    )
+
+# Opt-in run metrics: DOTFILES_METRICS=<textfile collector dir>
+_metrics_dir = os.environ.get("DOTFILES_METRICS", "")
+if _metrics_dir:
+    telemetry.start(_metrics_dir, label=_run_label)
+
+# Script export for image builds: DOTFILES_EXPORT=<dir>, set by pyinfra_export
+_export_dir = os.environ.get("DOTFILES_EXPORT", "")
+if _export_dir:
+    export.start(
+        _export_dir,
+        target_home=os.environ.get("DOTFILES_EXPORT_HOME"),
+        combined=os.environ.get("DOTFILES_EXPORT_COMBINED", "0") == "1",
+        sysroot=os.environ.get("DOTFILES_EXPORT_SYSROOT"),
+    )
+
+# Offline bundle from pyinfra_bundle: DOTFILES_BUNDLE=<tarball or directory>
+_bundle_path = os.environ.get("DOTFILES_BUNDLE", "")
+bundle_dir = bundle.activate(_bundle_path) if _bundle_path else None
+
+# Journal of finished sections; DOTFILES_RESUME=1 skips the ones that finished
+# with unchanged inputs (update.sh --resume)
+journal.start(__file__, SECTIONS, resume=os.environ.get("DOTFILES_RESUME", "0") == "1")
+
+
 def has_tag(tag: str) -> bool:
-    return not active_tags or tag in active_tags
+    if prefetch_mode:
+        return False
+    active = (not active_tags or tag in active_tags) and journal.should_run(tag)
+    if active:
+        # Sections are the has_tag blocks below; time is charged to the last one entered
+        profiler.section(tag)
+    return active
 
 
 # -----------------------------------------------------------------------------
@@ -289,6 +348,70 @@ BUN_LSP_PACKAGES = {
     ],
 }
 
+FISH_PLUGINS = [
+    "jorgebucaran/nvm.fish",
+    "realiserad/fish-ai",
+]
+
+BUN_PACKAGES = [
+    "opencode-ai",
+]
+
+CARGO_PACKAGES = ["starship", "tree-sitter-cli"]
+
+# Tree-sitter grammars built for Neovim 0.12+ (see the treesitter section)
+TREESITTER_LANGS = {
+    "bash": "tree-sitter/tree-sitter-bash",
+    "go": "tree-sitter/tree-sitter-go",
+    "javascript": "tree-sitter/tree-sitter-javascript",
+    "json": "tree-sitter/tree-sitter-json",
+    "lua": "tree-sitter-grammars/tree-sitter-lua",
+    "markdown": "tree-sitter-grammars/tree-sitter-markdown",
+    "python": "tree-sitter/tree-sitter-python",
+    "rust": "tree-sitter/tree-sitter-rust",
+    "toml": "tree-sitter/tree-sitter-toml",
+    "typescript": "tree-sitter/tree-sitter-typescript",
+    "yaml": "tree-sitter-grammars/tree-sitter-yaml",
+}
+
+# Repos that keep the grammar in a subdirectory
+TREESITTER_BUILD_SUBDIRS = {
+    "markdown": "tree-sitter-markdown",
+    "typescript": "typescript",
+}
+
+GO_PACKAGES = [
+    "github.com/charmbracelet/gum@latest",
+    "github.com/jesseduffield/lazygit@latest",
+    "github.com/jesseduffield/lazydocker@latest",
+    "github.com/derailed/k9s@latest",
+]
+
+AUR_PACKAGES = [
+    "docker-rootless-extras",  # Rootless Docker systemd user units
+    "librewolf-bin",
+    "maestro",
+]
+
+# Installed from the Docker/Kubernetes apt repos (Debian containers only)
+APT_REPO_PACKAGES = [
+    "docker-ce-cli",
+    "docker-buildx-plugin",
+    "docker-compose-plugin",
+    "kubectl",
+]
+
+# Repo files under etc/ mirrored to /etc on Arch bare metal (modules-load.d is
+# written by kernel.modules from DOCKER_ROOTLESS_MODULES)
+ETC_FILES = [
+    "nftables.conf",
+    "sysctl.d/99-hardening.conf",
+    "NetworkManager/conf.d/99-mac-randomization.conf",
+]
+
+# Rootless Docker networking (Arch bare metal), loaded now and at boot
+DOCKER_ROOTLESS_MODULES = ["tun", "ip_tables", "iptable_nat", "iptable_filter"]
+
 # -----------------------------------------------------------------------------
 # Helpers
 # -----------------------------------------------------------------------------
@@ -298,8 +421,23 @@ def link_config_dir(source, target, exclude=None):
     if exclude is None:
         exclude = []
 
-    paths = host.get_fact(FindFiles, path=source, maxdepth=1)
-    dirs = host.get_fact(FindDirectories, path=source, maxdepth=1)
+    batch.prefetch(
+        [
+            (FindFiles, {"path": source, "maxdepth": 1}),
+            (FindDirectories, {"path": source, "maxdepth": 1}),
+        ]
+    )
+    paths = batch.get(FindFiles, path=source, maxdepth=1)
+    dirs = batch.get(FindDirectories, path=source, maxdepth=1)
+
+    # Every candidate's link state in one round trip instead of one per path
+    batch.prefetch(
+        [
+            (Link, {"path": f"{target}/{path.replace(source, '', 1).lstrip('/')}"})
+            for path in paths + dirs
+            if path != source
+        ]
+    )
 
     # For subdirectories that already exist as real dirs on the target,
     # link their contents individually instead of replacing the directory.
@@ -311,7 +449,7 @@ def link_config_dir(source, target, exclude=None):
         if dst in exclude:
             continue
         link_path = f"{target}/{dst}"
-        link_info = host.get_fact(Link, path=link_path)
+        link_info = batch.get(Link, path=link_path)
         # link_info is False when path exists but is a real directory (not a symlink)
         replace_real_dir = dst == ".agents" and target.startswith(f"{home}/repos/")
         if link_info is False and not replace_real_dir:
@@ -329,7 +467,7 @@ def link_config_dir(source, target, exclude=None):
         link_path = f"{target}/{dst}"
         link_target = f"{source}/{dst}"
 
-        link_info = host.get_fact(Link, path=link_path)
+        link_info = batch.get(Link, path=link_path)
         if isinstance(link_info, dict) and link_info.get("link_target") == link_target:
             continue
 
@@ -362,6 +500,7 @@ def install_packages(name, key, present=True):
     if not pkgs:
         return
 
+    telemetry.packages(pkg_manager, pkgs)
     if pkg_manager == "brew":
         brew.packages(name=name, packages=pkgs, present=present)
     elif pkg_manager == "pacman":
@@ -372,95 +511,77 @@ def install_packages(name, key, present=True):
         apt.packages(name=name, packages=pkgs, present=present, _sudo=True)
 
 
-def add_apt_repo(name, key_url, keyring_name, repo_line, filename):
-    """Add an apt repository with modern keyring approach (Debian only)."""
-    keyring_dir = "/etc/apt/keyrings"
-    keyring_path = f"{keyring_dir}/{keyring_name}"
-
-    # Ensure keyrings directory exists
-    files.directory(
-        name=f"[{name}] Create keyrings directory",
-        path=keyring_dir,
-        present=True,
-        mode="0755",
-        user="root",
-        group="root",
-        _sudo=True,
-    )
-
-    # Download and convert GPG key if not present
-    keyring_exists = host.get_fact(File, path=keyring_path)
-    if not keyring_exists:
-        server.shell(
-            name=f"[{name}] Download and convert GPG key",
-            commands=[
-                f"curl -fsSL '{key_url}' | gpg --dearmor -o '{keyring_path}'",
-            ],
-            _sudo=True,
-        )
-
-    # Ensure correct permissions on keyring
-    files.file(
-        name=f"[{name}] Set keyring permissions",
-        path=keyring_path,
-        present=True,
-        mode="0644",
-        user="root",
-        group="root",
-        _sudo=True,
-    )
-
-    # Add repository
-    apt.repo(
-        name=f"[{name}] Add apt repository",
-        src=repo_line,
-        filename=filename,
-        present=True,
-        _sudo=True,
-    )
-
-
 # -----------------------------------------------------------------------------
 # Detect OS and package manager
 # -----------------------------------------------------------------------------
 
 
+PID1_COMM_COMMAND = "cat /proc/1/comm 2>/dev/null || echo unknown"
+
+
 def is_alpine():
     """Check if running on Alpine Linux."""
-    return host.get_fact(File, path="/etc/alpine-release") is not None
+    return batch.get(File, path="/etc/alpine-release") is not None
 
 
 def is_debian():
     """Check if running on Debian/Ubuntu."""
-    return host.get_fact(File, path="/etc/debian_version") is not None
+    return batch.get(File, path="/etc/debian_version") is not None
 
 
 def is_container():
     """Check if running inside a container."""
+    # Pinned by the benchmark sandbox (pyinfra_bench) instead of detected
+    if "DOTFILES_CONTAINER" in os.environ:
+        return os.environ["DOTFILES_CONTAINER"] == "1"
     # Check for /.dockerenv (Docker) or /run/.containerenv (Podman)
-    if host.get_fact(File, path="/.dockerenv") is not None:
+    if batch.get(File, path="/.dockerenv") is not None:
         return True
-    if host.get_fact(File, path="/run/.containerenv") is not None:
+    if batch.get(File, path="/run/.containerenv") is not None:
         return True
     return False
 
 
 def has_systemd():
     """Check if systemd is running (PID 1 is systemd)."""
+    # Pinned by script export (pyinfra_export) instead of detected
+    if "DOTFILES_SYSTEMD" in os.environ:
+        return os.environ["DOTFILES_SYSTEMD"] == "1"
     # During Docker build, there's no init system, so systemd operations will fail
-    comm = host.get_fact(File, path="/proc/1/comm")
+    comm = batch.get(File, path="/proc/1/comm")
     if comm is None:
         return False
     # Read the actual content to check if it's systemd
-    result = host.get_fact(
-        Command, command="cat /proc/1/comm 2>/dev/null || echo unknown"
-    )
+    result = batch.get(Command, command=PID1_COMM_COMMAND)
     return result.strip() == "systemd" if result else False
 
 
-os_name = host.get_fact(Os)
+def heavy():
+    """Global arguments for compiles and package builds (see pyinfra_throttle)."""
+    return throttle.heavy(scope=has_systemd())
+
+
+# Host detection facts, loaded together in one round trip
+batch.prefetch(
+    [
+        (Os, {}),
+        (Home, {}),
+        (File, {"path": "/etc/alpine-release"}),
+        (File, {"path": "/etc/debian_version"}),
+        (File, {"path": "/.dockerenv"}),
+        (File, {"path": "/run/.containerenv"}),
+        (File, {"path": "/proc/1/comm"}),
+        (Command, {"command": PID1_COMM_COMMAND}),
+        (ThrottleSupport, {}),
+    ]
+)
+
+os_name = batch.get(Os)
 
-if os_name == "Darwin":
+if os.environ.get("DOTFILES_PKG_MANAGER"):
+    # Pinned by the benchmark sandbox (pyinfra_bench) instead of detected
+    pkg_manager = os.environ["DOTFILES_PKG_MANAGER"]
+elif os_name == "Darwin":
     pkg_manager = "brew"
 elif os_name == "Linux":
     if is_alpine():
@@ -472,7 +593,23 @@ elif os_name == "Linux":
 else:
     raise Exception(f"Unsupported OS: {os_name}")
 
-home = host.get_fact(Home)
+home = batch.get(Home)
+
+# Where dot-prefetch.timer leaves downloads for the next run to pick up
+PREFETCH_DIR = f"{home}/.cache/dot/prefetch"
+PREFETCH_PACMAN_DIR = f"{PREFETCH_DIR}/pacman"
+
+# Every unit a units.services call below manages on this host, so they share
+# one state query per scope instead of one each; keep in step with those calls
+if has_systemd() and pkg_manager == "pacman" and is_container():
+    units.prefetch(system=["sshd"])
+elif has_systemd() and pkg_manager == "pacman" and not is_container():
+    units.prefetch(
+        system=["NetworkManager", "docker.socket", "docker.service", "systemd-binfmt", "nftables"],
+        user=["dot-prefetch.timer", "docker.service", "docker.socket"],
+    )
+elif has_systemd() and pkg_manager != "brew" and not is_container():
+    units.prefetch(user=["dot-prefetch.timer"])
 
 # -----------------------------------------------------------------------------
 # Smartcard and SSH key setup (must run before git operations)
@@ -480,9 +617,7 @@ home = host.get_fact(Home)
 
 if has_tag("core"):
     smartcard_script = f"{home}/dot/bin/setup-smartcard-keys"
-    smartcard_current = host.get_fact(
-        SmartcardKeysCurrent, script_path=smartcard_script
-    )
+    smartcard_current = batch.get(SmartcardKeysCurrent, script_path=smartcard_script)
 
     if not smartcard_current:
         server.shell(
@@ -504,11 +639,10 @@ if has_tag("core"):
         ],
     )
 
-    files.download(
-        name="Download GitHub public keys for rfhold",
+    cache.authorized_keys(
+        name="Sync GitHub public keys for rfhold",
         src="https://github.com/rfhold.keys",
         dest=f"{home}/.ssh/authorized_keys",
-        mode="600",
     )
 
 # -----------------------------------------------------------------------------
@@ -532,15 +666,44 @@ if has_tag("core"):
     link_config_dir(f"{home}/dot/.config", f"{home}/.config")
     link_config_dir(f"{home}/dot/home", home, exclude=[".ssh/authorized_keys"])
 
+    # Downloads for the next upgrade in the background (see the prefetch
+    # section at the end); the units come from .config/systemd/user
+    if has_systemd() and not is_container() and pkg_manager != "brew":
+        units.services(
+            name="Enable background update prefetch",
+            units={"dot-prefetch.timer": {"running": True, "enabled": True}},
+            daemon_reload=True,
+            user_mode=True,
+        )
+
 # -----------------------------------------------------------------------------
 # Package management
 # -----------------------------------------------------------------------------
 
 if has_tag("packages"):
+    bundled_packages = bundle_dir and bundle.packages_dir(bundle_dir, pkg_manager)
+    if bundled_packages:
+        bundled.packages(
+            name="Seed package cache from the offline bundle",
+            src=bundled_packages,
+            pkg_manager=pkg_manager,
+            _sudo=True,
+        )
+
+    if pkg_manager == "pacman" and batch.get(Directory, path=PREFETCH_PACMAN_DIR):
+        bundled.packages(
+            name="Move prefetched packages into the package cache",
+            src=PREFETCH_PACMAN_DIR,
+            pkg_manager=pkg_manager,
+            move=True,
+            _sudo=True,
+        )
+
     install_packages("Install dev packages", "dev")
     install_packages("Install GPG packages", "gpg")
     install_packages("Install terminal packages", "terminal")
     install_packages("Install LSP packages", "lsp")
+    telemetry.packages("bun", BUN_LSP_PACKAGES.get(pkg_manager, []))
     bun.packages(
         name="Install npm-distributed LSP packages",
         packages=BUN_LSP_PACKAGES.get(pkg_manager, []),
@@ -555,9 +718,14 @@ if has_tag("packages"):
 
 if has_tag("git"):
     gpg_agent_script = f"{home}/dot/bin/setup-gpg-agent"
-    gpg_agent_current = host.get_fact(
-        GpgAgentConfigCurrent, script_path=gpg_agent_script
+    git_signing_script = f"{home}/dot/bin/setup-git-signing"
+    batch.prefetch(
+        [
+            (GpgAgentConfigCurrent, {"script_path": gpg_agent_script}),
+            (GitSigningConfigCurrent, {"script_path": git_signing_script}),
+        ]
     )
+    gpg_agent_current = batch.get(GpgAgentConfigCurrent, script_path=gpg_agent_script)
 
     if not gpg_agent_current:
         server.shell(
@@ -570,8 +738,7 @@ if has_tag("git"):
 # -----------------------------------------------------------------------------
 
 if has_tag("git"):
-    git_signing_script = f"{home}/dot/bin/setup-git-signing"
-    git_signing_current = host.get_fact(
+    git_signing_current = batch.get(
         GitSigningConfigCurrent, script_path=git_signing_script
     )
 
@@ -597,43 +764,50 @@ if has_tag("packages"):
     if is_container():
         # Add Docker and Kubernetes repos for Debian (apt requires adding repos first)
         if pkg_manager == "apt":
-            arch = host.get_fact(Command, command="dpkg --print-architecture").strip()
-
-            add_apt_repo(
-                name="Docker",
-                key_url="https://download.docker.com/linux/debian/gpg",
-                keyring_name="docker.gpg",
-                repo_line=f"deb [arch={arch} signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/debian bookworm stable",
-                filename="docker",
-            )
-
-            add_apt_repo(
-                name="Kubernetes",
-                key_url="https://pkgs.k8s.io/core:/stable:/v1.32/deb/Release.key",
-                keyring_name="kubernetes-apt-keyring.gpg",
-                repo_line=f"deb [signed-by=/etc/apt/keyrings/kubernetes-apt-keyring.gpg] https://pkgs.k8s.io/core:/stable:/v1.32/deb/ /",
-                filename="kubernetes",
-            )
-
-            # Update apt cache after adding repos
-            apt.update(
-                name="Update apt cache after adding repos",
+            arch = batch.get(Command, command="dpkg --print-architecture").strip()
+
+            # Keys come from the controller's download cache; the index is only
+            # refreshed, for just these sources, when a repo changed
+            repos = apt_repos.repos(
+                name="Add Docker and Kubernetes apt repositories",
+                repos=[
+                    {
+                        "name": "Docker",
+                        "key_url": "https://download.docker.com/linux/debian/gpg",
+                        "keyring": "docker.gpg",
+                        "line": f"deb [arch={arch} signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/debian bookworm stable",
+                        "filename": "docker",
+                    },
+                    {
+                        "name": "Kubernetes",
+                        "key_url": "https://pkgs.k8s.io/core:/stable:/v1.32/deb/Release.key",
+                        "keyring": "kubernetes-apt-keyring.gpg",
+                        "line": "deb [signed-by=/etc/apt/keyrings/kubernetes-apt-keyring.gpg] https://pkgs.k8s.io/core:/stable:/v1.32/deb/ /",
+                        "filename": "kubernetes",
+                    },
+                ],
                 _sudo=True,
             )
 
             # Install Docker and Kubernetes packages
+            telemetry.packages("apt", APT_REPO_PACKAGES)
             apt.packages(
                 name="Install Docker CLI and kubectl",
-                packages=[
-                    "docker-ce-cli",
-                    "docker-buildx-plugin",
-                    "docker-compose-plugin",
-                    "kubectl",
-                ],
+                packages=APT_REPO_PACKAGES,
                 present=True,
                 _sudo=True,
             )
 
+            if upgrade_mode:
+                # Only worth asking apt when the repo indexes were refreshed
+                apt.packages(
+                    name="Upgrade Docker CLI and kubectl",
+                    packages=APT_REPO_PACKAGES,
+                    latest=True,
+                    _sudo=True,
+                    _if=repos.did_change,
+                )
+
         install_packages("Install container packages", "container")
     else:
         install_packages("Install bare metal packages", "bare_metal")
@@ -643,8 +817,14 @@ if has_tag("packages"):
             install_packages("Install Hyprland desktop", "hyprland")
 
             # Add user to required groups for GPU/display access
-            username = host.get_fact(Command, command="whoami").strip()
-            current_groups = host.get_fact(Command, command="groups").strip().split()
+            batch.prefetch(
+                [
+                    (Command, {"command": "whoami"}),
+                    (Command, {"command": "groups"}),
+                ]
+            )
+            username = batch.get(Command, command="whoami").strip()
+            current_groups = batch.get(Command, command="groups").strip().split()
             required_groups = ["video", "input", "render"]
             missing_groups = [g for g in required_groups if g not in current_groups]
 
@@ -657,15 +837,6 @@ if has_tag("packages"):
                     _sudo=True,
                 )
 
-            # Enable NetworkManager for network management
-            systemd.service(
-                name="Enable NetworkManager",
-                service="NetworkManager",
-                running=True,
-                enabled=True,
-                _sudo=True,
-            )
-
             # Docker rootless setup (uses docker-rootless-extras AUR package)
             # Configure subuid/subgid for rootless containers
             files.line(
@@ -686,7 +857,7 @@ if has_tag("packages"):
 
             # Enable user lingering (allows user services to run at boot)
             # Check if lingering is already enabled before running command
-            linger_status = host.get_fact(
+            linger_status = batch.get(
                 Command,
                 command=f"loginctl show-user {username} --property=Linger 2>/dev/null || echo 'Linger=no'",
             ).strip()
@@ -698,128 +869,69 @@ if has_tag("packages"):
                     _sudo=True,
                 )
 
-            # Load kernel modules at boot (required for rootless Docker networking)
-            files.put(
-                name="Configure rootless Docker modules to load at boot",
-                src=f"{home}/dot/etc/modules-load.d/docker-rootless.conf",
-                dest="/etc/modules-load.d/docker-rootless.conf",
-                mode="644",
-                user="root",
-                group="root",
-                _sudo=True,
-            )
-
-            server.shell(
+            # Kernel modules for rootless Docker networking, now and at boot
+            kernel.modules(
                 name="Load rootless Docker kernel modules",
-                commands=[
-                    "pkexec sh -c 'if [ -d /lib/modules/$(uname -r) ]; then modprobe tun ip_tables iptable_nat iptable_filter; else echo \"Skipping module load: no modules installed for running kernel $(uname -r)\" >&2; fi'"
-                ],
-            )
-
-            # Disable rootful Docker (we use rootless instead)
-            systemd.service(
-                name="Disable rootful Docker socket",
-                service="docker.socket",
-                running=False,
-                enabled=False,
-                _sudo=True,
-            )
-
-            systemd.service(
-                name="Disable rootful Docker service",
-                service="docker.service",
-                running=False,
-                enabled=False,
+                modules=DOCKER_ROOTLESS_MODULES,
+                conf="/etc/modules-load.d/docker-rootless.conf",
                 _sudo=True,
             )
 
             # NOTE: Rootless Docker user service is enabled after AUR packages are installed
             # (see end of file after paru.packages)
 
-            # Enable binfmt service for QEMU cross-arch builds
-            systemd.service(
-                name="Enable binfmt for QEMU cross-arch builds",
-                service="systemd-binfmt",
-                running=True,
-                enabled=True,
-                _sudo=True,
-            )
-
             # -----------------------------------------------------------------
             # Security hardening (Arch bare metal only)
             # -----------------------------------------------------------------
 
             install_packages("Install security packages", "security")
 
-            # Deploy nftables firewall configuration
-            files.put(
-                name="Deploy nftables firewall config",
-                src=f"{home}/dot/etc/nftables.conf",
-                dest="/etc/nftables.conf",
-                mode="644",
-                user="root",
-                group="root",
-                _sudo=True,
-            )
-
-            # nftables is a oneshot service - it loads rules and exits
-            # running=False prevents pyinfra from trying to "start" a oneshot
-            systemd.service(
-                name="Enable nftables firewall",
-                service="nftables",
-                running=False,
-                enabled=True,
-                _sudo=True,
-            )
-
-            # Deploy sysctl hardening configuration
-            sysctl_config = files.put(
-                name="Deploy sysctl hardening config",
-                src=f"{home}/dot/etc/sysctl.d/99-hardening.conf",
-                dest="/etc/sysctl.d/99-hardening.conf",
-                mode="644",
-                user="root",
-                group="root",
+            # Firewall, sysctl hardening and NetworkManager MAC randomization,
+            # checked and uploaded together
+            etc.sync(
+                name="Deploy system configuration",
+                src=f"{home}/dot/etc",
+                files=ETC_FILES,
                 _sudo=True,
             )
 
             server.shell(
-                name="Apply sysctl hardening settings",
-                commands=["sysctl --system"],
-                _sudo=True,
-                _if=sysctl_config.did_change,
-            )
-
-            # Deploy NetworkManager MAC randomization config
-            files.directory(
-                name="Ensure NetworkManager conf.d directory exists",
-                path="/etc/NetworkManager/conf.d",
-                present=True,
-                mode="755",
-                user="root",
-                group="root",
+                name="Reload NetworkManager configuration",
+                commands=["nmcli general reload conf"],
                 _sudo=True,
+                _if=etc.changed("/etc/NetworkManager/conf.d/99-mac-randomization.conf"),
             )
 
-            nm_config = files.put(
-                name="Deploy NetworkManager MAC randomization config",
-                src=f"{home}/dot/etc/NetworkManager/conf.d/99-mac-randomization.conf",
-                dest="/etc/NetworkManager/conf.d/99-mac-randomization.conf",
-                mode="644",
-                user="root",
-                group="root",
+            # All system units of the bare-metal setup: one state query, one
+            # systemctl call per action
+            units.services(
+                name="Configure system services",
+                units={
+                    # Network management
+                    "NetworkManager": {"running": True, "enabled": True},
+                    # Rootful Docker stays off, we use rootless instead
+                    "docker.socket": {"running": False, "enabled": False},
+                    "docker.service": {"running": False, "enabled": False},
+                    # QEMU cross-arch builds
+                    "systemd-binfmt": {"running": True, "enabled": True},
+                    # nftables is a oneshot service that loads rules and exits;
+                    # only enable it, never start or stop it from here
+                    "nftables": {"enabled": True},
+                },
                 _sudo=True,
             )
 
-            server.shell(
-                name="Reload NetworkManager configuration",
-                commands=["nmcli general reload conf"],
+            # Per-key rather than `sysctl --system`: runs every time, so it also
+            # puts back values changed by hand or lost on reboot
+            kernel.sysctl(
+                name="Apply sysctl hardening settings",
+                src=f"{home}/dot/etc/sysctl.d/99-hardening.conf",
                 _sudo=True,
-                _if=nm_config.did_change,
             )
 
 # GUI apps (macOS only)
 if has_tag("packages") and pkg_manager == "brew":
+    telemetry.packages("brew-cask", CASKS)
     brew.casks(name="Install GUI applications", casks=CASKS)
 
 # -----------------------------------------------------------------------------
@@ -885,6 +997,7 @@ if has_tag("apps"):
         sys_deps = SYSTEM_DEPS.get(app.get("system_deps_key", ""), {}).get(pkg_manager)
         if sys_deps and not is_container():
             if pkg_manager == "pacman":
+                telemetry.packages("pacman", sys_deps)
                 pacman.packages(
                     name=f"Install {app['name']} system deps",
                     packages=sys_deps,
@@ -904,6 +1017,7 @@ if has_tag("apps"):
             name=f"Install {app['name']}",
             commands=[f"make -C {app_dest} install"],
             _if=clone.did_change,
+            **heavy(),
         )
 
 # -----------------------------------------------------------------------------
@@ -911,31 +1025,44 @@ if has_tag("apps"):
 # -----------------------------------------------------------------------------
 
 if has_tag("fish"):
+    telemetry.packages("fisher", FISH_PLUGINS)
     fisher.packages(
         name="Install Fish plugins",
-        packages=[
-            "jorgebucaran/nvm.fish",
-            "realiserad/fish-ai",
-        ],
+        packages=FISH_PLUGINS,
         present=True,
     )
 
-    # Ensure fish-ai venv is set up (fisher install may not trigger hooks properly)
-    fish_ai_venv = f"{home}/.local/share/fish-ai"
-    fish_ai_python = f"{fish_ai_venv}/bin/python"
-
-    # Check if venv exists and has python binary (more thorough check)
-    venv_exists = host.get_fact(File, path=fish_ai_python) is not None
-
-    if not venv_exists:
-        server.shell(
-            name="Setup fish-ai venv using uv",
-            commands=[
-                f"uv venv --seed --python 3.13 {fish_ai_venv}",
-                f"{fish_ai_venv}/bin/pip install fish-ai@git+https://github.com/realiserad/fish-ai",
-            ],
+    # fish-ai runs from a uv tool environment at ~/.local/share/fish-ai, where
+    # the plugin expects it (fisher install may not trigger hooks properly).
+    # Its entry points are linked outside ~/.local/bin, where names like
+    # "explain" and "fix" would shadow other commands.
+    fish_ai_archive = f"{home}/.cache/dot/fish-ai.tar.gz"
+    fish_ai_spec = f"fish-ai @ file://{fish_ai_archive}"
+    fish_ai = batch.get(UvTools, tool_dir=f"{home}/.local/share").get("fish-ai")
+
+    # Source archive from the controller's download cache instead of a
+    # git clone on every host; needed whenever uv.tools below installs or
+    # upgrades, including replacing a pre-uv pip venv
+    if upgrade_mode or uv.needs_install(fish_ai, fish_ai_spec):
+        cache.download(
+            name="Download fish-ai source",
+            src="https://github.com/realiserad/fish-ai/archive/refs/heads/main.tar.gz",
+            dest=fish_ai_archive,
         )
 
+    uv.tools(
+        name="Install fish-ai with uv",
+        tools={
+            "fish-ai": {
+                "spec": fish_ai_spec,
+                "python": "3.13",
+            },
+        },
+        tool_dir=f"{home}/.local/share",
+        bin_dir=f"{home}/.local/share/uv/tool-bin",
+        upgrade=upgrade_mode,
+    )
+
 # -----------------------------------------------------------------------------
 # Node.js (via nvm.fish)
 # -----------------------------------------------------------------------------
@@ -943,7 +1070,7 @@ if has_tag("fish"):
 if has_tag("node"):
     # Install node and set default (nvm_default_version only activates on interactive shells)
     # Also symlink to ~/.local/bin so node is available in non-fish shells
-    if not host.get_fact(Which, command="node"):
+    if not batch.get(Which, command="node"):
         server.shell(
             name="Install Node.js LTS via nvm and set as default",
             commands=[
@@ -960,24 +1087,25 @@ if has_tag("node"):
 # -----------------------------------------------------------------------------
 
 if has_tag("bun"):
+    telemetry.packages("bun", BUN_PACKAGES)
     bun.packages(
         name="Install global Bun packages",
-        packages=[
-            "opencode-ai",
-        ],
+        packages=BUN_PACKAGES,
         present=True,
         update=upgrade_mode,
     )
 
 # -----------------------------------------------------------------------------
-# Cargo packages (installed via cargo for consistency across all platforms)
+# Cargo packages (prebuilt from the artifact store when available, else cargo install)
 # -----------------------------------------------------------------------------
 
 if has_tag("cargo"):
+    telemetry.packages("cargo", CARGO_PACKAGES)
     cargo.packages(
         name="Install cargo packages",
-        packages=["starship", "tree-sitter-cli"],
+        packages=CARGO_PACKAGES,
         present=True,
+        **heavy(),
     )
 
 # -----------------------------------------------------------------------------
@@ -985,24 +1113,6 @@ if has_tag("cargo"):
 # -----------------------------------------------------------------------------
 
 if has_tag("treesitter"):
-    TREESITTER_LANGS = {
-        "bash": "tree-sitter/tree-sitter-bash",
-        "go": "tree-sitter/tree-sitter-go",
-        "javascript": "tree-sitter/tree-sitter-javascript",
-        "json": "tree-sitter/tree-sitter-json",
-        "lua": "tree-sitter-grammars/tree-sitter-lua",
-        "markdown": "tree-sitter-grammars/tree-sitter-markdown",
-        "python": "tree-sitter/tree-sitter-python",
-        "rust": "tree-sitter/tree-sitter-rust",
-        "toml": "tree-sitter/tree-sitter-toml",
-        "typescript": "tree-sitter/tree-sitter-typescript",
-        "yaml": "tree-sitter-grammars/tree-sitter-yaml",
-    }
-    TREESITTER_BUILD_SUBDIRS = {
-        "markdown": "tree-sitter-markdown",
-        "typescript": "typescript",
-    }
-
     parser_dir = f"{home}/.local/share/nvim/site/parser"
     files.directory(
         name="Ensure nvim treesitter parser directory exists",
@@ -1010,6 +1120,10 @@ if has_tag("treesitter"):
         present=True,
     )
 
+    batch.prefetch(
+        [(File, {"path": f"{parser_dir}/{lang}.so"}) for lang in TREESITTER_LANGS]
+    )
+
     for lang, repo in TREESITTER_LANGS.items():
         parser_path = f"{parser_dir}/{lang}.so"
         repo_url = f"https://github.com/{repo}.git"
@@ -1018,8 +1132,15 @@ if has_tag("treesitter"):
         build_dir = f"{clone_dir}/{build_subdir}" if build_subdir else clone_dir
 
         # Check if parser already exists
-        parser_exists = host.get_fact(File, path=parser_path)
-        if not parser_exists:
+        parser_exists = batch.get(File, path=parser_path)
+        bundled_parser = bundle_dir and bundle.parser(bundle_dir, lang)
+        if not parser_exists and bundled_parser:
+            files.put(
+                name=f"Install bundled {lang} parser",
+                src=bundled_parser,
+                dest=parser_path,
+            )
+        elif not parser_exists:
             # Clone the grammar repo
             clone = git.repo(
                 name=f"Clone {lang} treesitter grammar",
@@ -1035,21 +1156,19 @@ if has_tag("treesitter"):
                     f"cd {build_dir} && tree-sitter build --output {parser_path}",
                 ],
                 _if=clone.did_change,
+                **heavy(),
             )
 
 # -----------------------------------------------------------------------------
 
 if has_tag("go"):
+    telemetry.packages("go", GO_PACKAGES)
     go.packages(
         name="Install Go tools",
-        packages=[
-            "github.com/charmbracelet/gum@latest",
-            "github.com/jesseduffield/lazygit@latest",
-            "github.com/jesseduffield/lazydocker@latest",
-            "github.com/derailed/k9s@latest",
-        ],
+        packages=GO_PACKAGES,
         present=True,
         update=upgrade_mode,
+        **heavy(),
     )
 
 
@@ -1058,32 +1177,22 @@ if has_tag("go"):
 # -----------------------------------------------------------------------------
 
 if has_tag("aur") and pkg_manager == "pacman" and not is_container():
+    telemetry.packages("paru", AUR_PACKAGES)
     paru.packages(
         name="Install AUR packages",
-        packages=[
-            "docker-rootless-extras",  # Rootless Docker systemd user units
-            "librewolf-bin",
-            "maestro",
-        ],
+        packages=AUR_PACKAGES,
         present=True,
+        **heavy(),
     )
 
-    # Reconcile older direct service startups back to socket activation.
-    systemd.service(
-        name="Disable direct rootless Docker service",
-        service="docker.service",
-        running=False,
-        enabled=False,
-        daemon_reload=True,
-        user_mode=True,
-    )
-
-    # Enable rootless Docker user service (now that docker-rootless-extras is installed)
-    systemd.service(
-        name="Enable rootless Docker socket",
-        service="docker.socket",
-        running=True,
-        enabled=True,
+    # Rootless Docker user units (now that docker-rootless-extras is installed):
+    # reconcile older direct service startups back to socket activation
+    units.services(
+        name="Configure rootless Docker user units",
+        units={
+            "docker.service": {"running": False, "enabled": False},
+            "docker.socket": {"running": True, "enabled": True},
+        },
         daemon_reload=True,
         user_mode=True,
     )
@@ -1095,22 +1204,25 @@ if has_tag("aur") and pkg_manager == "pacman" and not is_container():
 STATIC_ORG_AGENT_DIRS = ["rfhold", "cfaintl", "stablekernel"]
 
 if has_tag("skills"):
+    batch.prefetch(
+        [(Directory, {"path": f"{home}/repos/{org}"}) for org in STATIC_ORG_AGENT_DIRS]
+    )
+
+    envrc_paths = []
     for org in STATIC_ORG_AGENT_DIRS:
         source_dir = f"{home}/dot/home/repos/{org}"
         org_dir = f"{home}/repos/{org}"
-        envrc_path = f"{org_dir}/.envrc"
 
-        org_exists = host.get_fact(
-            Command, command=f'test -d "{org_dir}" && echo yes || echo no'
-        ).strip()
-        if org_exists != "yes":
+        if not batch.get(Directory, path=org_dir):
             continue
 
         link_config_dir(source_dir, org_dir)
+        envrc_paths.append(f"{org_dir}/.envrc")
 
-        server.shell(
-            name=f"Allow direnv for {org}",
-            commands=[f'direnv allow "{envrc_path}"'],
+    if envrc_paths:
+        direnv.allow(
+            name="Allow direnv for org .envrc files",
+            paths=envrc_paths,
         )
 
 
@@ -1121,6 +1233,7 @@ if has_tag("skills"):
 if has_tag("ssh-server"):
     # SSH client is useful everywhere, but SSH server only in containers
     if pkg_manager == "pacman":
+        telemetry.packages("pacman", ["openssh"])
         pacman.packages(
             name="Install OpenSSH",
             packages=["openssh"],
@@ -1130,23 +1243,18 @@ if has_tag("ssh-server"):
 
     # SSH server configuration (containers only)
     if pkg_manager == "pacman" and is_container():
-        files.put(
+        etc.sync(
             name="Configure sshd for key-only authentication",
-            src=f"{home}/dot/etc/sshd_config.d/99-key-only.conf",
-            dest="/etc/ssh/sshd_config.d/99-key-only.conf",
-            mode="644",
-            user="root",
-            group="root",
+            src=f"{home}/dot/etc",
+            files=[("sshd_config.d/99-key-only.conf", "ssh/sshd_config.d/99-key-only.conf")],
             _sudo=True,
         )
 
         if has_systemd():
             # If systemd is running, use the proper operation to enable and start
-            systemd.service(
+            units.services(
                 name="Enable and start sshd",
-                service="sshd",
-                running=True,
-                enabled=True,
+                units={"sshd": {"running": True, "enabled": True}},
                 _sudo=True,
             )
         else:
@@ -1156,3 +1264,55 @@ if has_tag("ssh-server"):
                 commands=["systemctl enable sshd.service"],
                 _sudo=True,
             )
+
+# -----------------------------------------------------------------------------
+# Background prefetch (DOTFILES_PREFETCH=1, from dot-prefetch.timer)
+# -----------------------------------------------------------------------------
+
+if prefetch_mode:
+    profiler.section("prefetch")
+
+    def wants(tag):
+        return not active_tags or tag in active_tags
+
+    # One failed download shouldn't stop the others. No heavy(): its scope
+    # and ionice would lift the work out of dot-prefetch.service's idle
+    # CPU and IO scheduling and past its TimeoutStartSec
+    background = {"_continue_on_error": True}
+
+    if wants("packages") and pkg_manager == "pacman":
+        prefetch.pacman(
+            name="Download pacman updates",
+            packages=sorted({p for group in PACKAGES.values() for p in group.get("pacman", [])}),
+            dest=PREFETCH_PACMAN_DIR,
+            **background,
+        )
+
+    if wants("go"):
+        prefetch.go(
+            name="Build Go tools into the build cache",
+            packages=GO_PACKAGES,
+            scratch=f"{PREFETCH_DIR}/go-bin",
+            **background,
+        )
+
+    if wants("bun"):
+        prefetch.bun(
+            name="Download Bun packages into the cache",
+            packages=BUN_PACKAGES,
+            scratch=f"{PREFETCH_DIR}/bun",
+            **background,
+        )
+
+    repos = []
+    if wants("apps"):
+        repos += [app["dest"] for app in MANAGED_APPS]
+    if wants("tpm"):
+        repos.append(f"{home}/.tmux/plugins/tpm")
+    if wants("treesitter"):
+        repos += [f"{home}/.cache/tree-sitter-parsers/{lang}" for lang in TREESITTER_LANGS]
+    prefetch.git(
+        name="Fetch managed repos and grammars",
+        repos=repos,
+        **background,
+    )
@@ -1,3 +1,11 @@
+import os
+
+from pyinfra_sshmux import connector as sshmux
+
+# Reuse one persistent ssh master per host across runs unless
+# DOTFILES_SSH_MUX=0 (update.sh --no-ssh-mux), see pyinfra_sshmux
+sshmux.register(default=os.environ.get("DOTFILES_SSH_MUX", "1") == "1")
+
 hosts = [
     "macbook.holdenitdown.net",
     "thinkpad.holdenitdown.net",
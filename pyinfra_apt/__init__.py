@@ -0,0 +1,29 @@
+"""
+apt repository operations for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_apt import operations as apt_repos
+
+    apt_repos.repos(
+        name="Add Docker apt repository",
+        repos=[
+            {
+                "name": "Docker",
+                "key_url": "https://download.docker.com/linux/debian/gpg",
+                "keyring": "docker.gpg",
+                "line": "deb [signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/debian bookworm stable",
+                "filename": "docker",
+            },
+        ],
+        _sudo=True,
+    )
+
+Keyrings and source files of every repo are checked with one fact, and
+``apt-get update`` only runs, restricted to the changed sources, when a
+repo was added or changed.
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
@@ -0,0 +1,48 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+LISTS_DIR = "/var/lib/apt/lists"
+LISTS_MARKER = "__lists__"
+
+
+class AptRepoState(FactBase):
+    """
+    Returns checksums of apt keyrings and source files, plus the downloaded index files.
+
+    One command covers every repo: ``checksums`` maps each existing path to
+    its sha256, ``lists`` holds the file names in /var/lib/apt/lists so a
+    repo whose index was never fetched (or was cleaned) can be told apart.
+
+    Example:
+        state = host.get_fact(
+            AptRepoState,
+            paths=["/etc/apt/keyrings/docker.gpg", "/etc/apt/sources.list.d/docker.list"],
+        )
+        # Returns: {'checksums': {'/etc/apt/keyrings/docker.gpg': '9f2c...'}, 'lists': [...]}
+    """
+
+    def command(self, paths):
+        return (
+            "sha256sum -- {0} 2>/dev/null; echo {1}; ls {2} 2>/dev/null; true".format(
+                " ".join(shlex.quote(path) for path in paths),
+                LISTS_MARKER,
+                LISTS_DIR,
+            )
+        )
+
+    def process(self, output):
+        checksums = {}
+        lists = []
+        in_lists = False
+
+        for line in output:
+            if line == LISTS_MARKER:
+                in_lists = True
+            elif in_lists:
+                lists.append(line)
+            elif line:
+                sha256, path = line.split(None, 1)
+                checksums[path] = sha256
+
+        return {"checksums": checksums, "lists": lists}
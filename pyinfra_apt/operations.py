@@ -0,0 +1,121 @@
+import hashlib
+import shlex
+from io import StringIO
+
+from pyinfra import host
+from pyinfra.api import FileUploadCommand, QuoteString, StringCommand, operation
+
+from pyinfra_cache import store
+
+from .facts import AptRepoState
+
+KEYRING_DIR = "/etc/apt/keyrings"
+SOURCES_DIR = "/etc/apt/sources.list.d"
+
+
+def _lists_prefix(line):
+    # "deb [opts] https://pkgs.k8s.io/core:/stable:/v1.32/deb/ /" ->
+    # "pkgs.k8s.io_core:_stable:_v1.32_deb_", how apt names the index files
+    uri = next(part for part in line.split()[1:] if "://" in part)
+    return uri.split("://", 1)[1].rstrip("/").replace("/", "_")
+
+
+@operation()
+def repos(repos=None):
+    """
+    Add several signed apt repositories, updating only the indexes of those that changed.
+
+    Keys are fetched and dearmored on the controller (see pyinfra_cache).
+    Keyrings and source files of all repos are compared with one fact;
+    changed ones are written and a single ``apt-get update`` restricted to
+    their sources refreshes just those indexes. A repo whose index files
+    are missing is refreshed too. Nothing runs otherwise, so ``did_change``
+    tells following operations whether the package indexes moved.
+
+    Args:
+        repos (list): dicts with ``name``, ``key_url``, ``keyring`` (file name
+            under /etc/apt/keyrings), ``line`` (the deb line) and ``filename``
+            (under sources.list.d, without .list)
+
+    Example:
+        apt_repos.repos(
+            name="Add Docker and Kubernetes apt repositories",
+            repos=[
+                {
+                    "name": "Docker",
+                    "key_url": "https://download.docker.com/linux/debian/gpg",
+                    "keyring": "docker.gpg",
+                    "line": "deb [signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/debian bookworm stable",
+                    "filename": "docker",
+                },
+            ],
+            _sudo=True,
+        )
+    """
+
+    if not repos:
+        return
+
+    wanted = []
+    for repo in repos:
+        keyring = store.dearmor(store.fetch(repo["key_url"]))
+        source = f"{repo['line']}\n"
+        wanted.append(
+            {
+                "keyring_path": f"{KEYRING_DIR}/{repo['keyring']}",
+                "keyring": keyring,
+                "source_path": f"{SOURCES_DIR}/{repo['filename']}.list",
+                "source": source,
+                "source_sha256": hashlib.sha256(source.encode()).hexdigest(),
+                "lists_prefix": _lists_prefix(repo["line"]),
+            }
+        )
+
+    state = host.get_fact(
+        AptRepoState,
+        paths=[path for repo in wanted for path in (repo["keyring_path"], repo["source_path"])],
+    )
+    checksums = state["checksums"]
+
+    changed = []
+    for repo in wanted:
+        keyring_changed = checksums.get(repo["keyring_path"]) != repo["keyring"].sha256
+        source_changed = checksums.get(repo["source_path"]) != repo["source_sha256"]
+        never_fetched = not any(name.startswith(repo["lists_prefix"]) for name in state["lists"])
+
+        if keyring_changed:
+            yield StringCommand("install", "-d", "-m", "755", KEYRING_DIR)
+            temp = host.get_temp_filename(repo["keyring_path"])
+            yield FileUploadCommand(repo["keyring"].path, temp)
+            yield StringCommand(
+                "install", "-m", "644", QuoteString(temp), QuoteString(repo["keyring_path"])
+            )
+            yield StringCommand("rm", "-f", QuoteString(temp))
+
+        if source_changed:
+            temp = host.get_temp_filename(repo["source_path"])
+            yield FileUploadCommand(StringIO(repo["source"]), temp)
+            yield StringCommand(
+                "install", "-m", "644", QuoteString(temp), QuoteString(repo["source_path"])
+            )
+            yield StringCommand("rm", "-f", QuoteString(temp))
+
+        if keyring_changed or source_changed or never_fetched:
+            changed.append(repo["source_path"])
+
+    if not changed:
+        host.noop(
+            "apt repositories {0} are up to date".format(", ".join(r["name"] for r in repos))
+        )
+        return
+
+    # One update over only the changed sources: a throwaway sourceparts dir
+    # holding links to them, the main sources.list left out
+    links = " && ".join(f'ln -s {shlex.quote(path)} "$parts"/' for path in changed)
+    yield (
+        'parts=$(mktemp -d) && '
+        f"{links} && "
+        "apt-get update -o Dir::Etc::sourcelist=/dev/null "
+        '-o Dir::Etc::sourceparts="$parts" -o APT::Get::List-Cleanup=0; '
+        'status=$?; rm -rf "$parts"; exit $status'
+    )
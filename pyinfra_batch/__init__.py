@@ -0,0 +1,23 @@
+"""
+Fact batching for pyinfra: many small facts, one remote command.
+
+Example usage in configure.py:
+
+    from pyinfra.facts.files import File
+    from pyinfra_batch import facts as batch
+
+    batch.prefetch([
+        (File, {"path": "/etc/alpine-release"}),
+        (File, {"path": "/etc/debian_version"}),
+    ])
+
+    # Served from the batch, no further round trip
+    alpine = batch.get(File, path="/etc/alpine-release")
+
+Against @local, File/Link/Directory and FindFiles/FindDirectories are answered
+with os.lstat/os.scandir in the pyinfra process instead of a shell.
+"""
+
+from . import facts, local
+
+__all__ = ["facts", "local"]
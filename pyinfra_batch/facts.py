@@ -0,0 +1,143 @@
+import copy
+import secrets
+from collections import defaultdict
+
+from pyinfra import host
+from pyinfra.api import StringCommand
+from pyinfra.context import ctx_host
+
+from . import local
+
+# host -> fact key -> processed fact data
+_cache = defaultdict(dict)
+
+
+def _host_cache():
+    # Key on the real Host, the ``host`` import is a context proxy
+    return _cache[ctx_host.get()]
+
+
+def _key(cls, kwargs):
+    return (cls.name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+
+def _command(fact, kwargs):
+    command = fact.command(**kwargs) if callable(fact.command) else fact.command
+    if isinstance(command, StringCommand):
+        command = command.get_raw_value()
+
+    requires_command = fact.requires_command(**kwargs)
+    if requires_command:
+        # Same short-circuit pyinfra applies when the required binary is missing
+        command = f"! command -v {requires_command} >/dev/null || {command}"
+
+    return command
+
+
+def _split(lines, marker):
+    """
+    Split framed script output into ``{index: (status, stdout_lines)}``.
+    """
+
+    results = {}
+    index = None
+    current = []
+
+    for line in lines:
+        if line.startswith(marker):
+            kind, number, *rest = line[len(marker) :].split()
+            if kind == "begin":
+                index, current = int(number), []
+            elif kind == "end" and index == int(number):
+                # The end marker is printed after a newline of its own, so a
+                # command whose output ended with one leaves an empty line
+                if current and current[-1] == "":
+                    current.pop()
+                results[index] = (int(rest[0]), current)
+                index = None
+            continue
+
+        if index is not None:
+            current.append(line)
+
+    return results
+
+
+def prefetch(facts):
+    """
+    Load several facts for the current host with a single shell command.
+
+    Each fact runs in its own subshell between begin/end markers, so one
+    failing check doesn't affect the others. Facts that exit non-zero are left
+    out of the cache and re-run through ``host.get_fact`` on first use, which
+    keeps pyinfra's usual error reporting for them. On ``@local``, facts the
+    ``local`` module can answer never reach the script.
+
+    Args:
+        facts (list): ``(FactClass, kwargs)`` tuples
+    """
+
+    cache = _host_cache()
+    in_process = local.is_local()
+    pending = []
+
+    for cls, kwargs in facts:
+        key = _key(cls, kwargs)
+        if key in cache or cls.shell_executable:
+            continue
+        if in_process:
+            resolved, data = local.resolve(cls, kwargs)
+            if resolved:
+                cache[key] = data
+                continue
+        pending.append((key, cls(), kwargs))
+
+    if not pending:
+        return
+
+    marker = f"__pyinfra_batch_{secrets.token_hex(4)}__ "
+    script = []
+    for i, (_, fact, kwargs) in enumerate(pending):
+        script.append(
+            f"echo '{marker}begin {i}'; "
+            f"( {_command(fact, kwargs)} ) </dev/null 2>/dev/null; "
+            f"printf '\\n%s\\n' \"{marker}end {i} $?\""
+        )
+
+    status, output = host.run_shell_command(StringCommand("\n".join(script)))
+    if not status:
+        return
+
+    for i, (exit_code, lines) in _split(output.stdout_lines, marker).items():
+        if exit_code != 0:
+            continue
+
+        key, fact, _ = pending[i]
+        data = fact.default()
+        if lines:
+            data = fact.process(lines)
+        cache[key] = data
+
+
+def get(cls, **kwargs):
+    """
+    Return a fact from the batch cache, falling back to ``host.get_fact``.
+
+    On ``@local`` filesystem facts are answered in-process (see ``local``)
+    rather than through a shell.
+
+    Values are copied on the way out because callers (``link_config_dir``)
+    extend the lists they are given.
+    """
+
+    cache = _host_cache()
+    key = _key(cls, kwargs)
+
+    if key not in cache:
+        resolved = False
+        if local.is_local():
+            resolved, cache[key] = local.resolve(cls, kwargs)
+        if not resolved:
+            cache[key] = host.get_fact(cls, **kwargs)
+
+    return copy.deepcopy(cache[key])
@@ -0,0 +1,147 @@
+import grp
+import os
+import pwd
+import stat
+from datetime import datetime, timezone
+
+from pyinfra import host
+from pyinfra.connectors.local import LocalConnector
+from pyinfra.facts.files import File, FindDirectories, FindFiles
+
+# Mirrors pyinfra.facts.files.FLAG_TO_TYPE, keyed on stat.S_IFMT instead
+MODE_TO_TYPE = {
+    stat.S_IFBLK: "block",
+    stat.S_IFCHR: "character",
+    stat.S_IFDIR: "directory",
+    stat.S_IFLNK: "link",
+    stat.S_IFSOCK: "socket",
+    stat.S_IFIFO: "fifo",
+    stat.S_IFREG: "file",
+}
+
+
+# Turned off when fact commands are rewritten (see pyinfra_export), so that
+# no fact bypasses the rewrite
+_enabled = True
+
+
+def disable():
+    """
+    Answer every fact through the shell from now on, even on ``@local``.
+    """
+
+    global _enabled
+    _enabled = False
+
+
+def is_local():
+    return _enabled and isinstance(host.connector, LocalConnector)
+
+
+def _name(lookup, id_):
+    try:
+        return lookup(id_)[0]
+    except KeyError:
+        # What GNU stat prints for %U/%G without a passwd/group entry
+        return "UNKNOWN"
+
+
+def _datetime(timestamp):
+    # Naive UTC, like the datetimes pyinfra parses out of stat output
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).replace(tzinfo=None)
+
+
+def file_fact(cls, path):
+    """
+    Answer ``File`` and its subclasses (``Link``, ``Directory``...) with ``os.lstat``.
+    """
+
+    path = os.path.expanduser(path)
+    try:
+        st = os.lstat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        # A path under a regular file doesn't exist either
+        return None
+
+    data = {
+        "user": _name(pwd.getpwuid, st.st_uid),
+        "group": _name(grp.getgrgid, st.st_gid),
+        "mode": int(oct(stat.S_IMODE(st.st_mode))[2:]),
+        "atime": _datetime(st.st_atime),
+        "mtime": _datetime(st.st_mtime),
+        "ctime": _datetime(st.st_ctime),
+        "size": st.st_size,
+    }
+
+    path_type = MODE_TO_TYPE.get(stat.S_IFMT(st.st_mode))
+    if path_type != cls.type:
+        return False
+
+    if path_type == "link":
+        data["link_target"] = os.readlink(path)
+
+    return data
+
+
+def find_fact(cls, path, maxdepth=None):
+    """
+    Answer ``FindFiles``/``FindDirectories`` with ``os.scandir``.
+
+    Like ``find`` without ``-L``, symlinks are never followed, and the start
+    path itself is included when it matches.
+    """
+
+    want_dir = cls is FindDirectories
+    results = []
+
+    def matches(is_dir, is_file):
+        return is_dir if want_dir else is_file
+
+    try:
+        st = os.lstat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return results
+
+    if matches(stat.S_ISDIR(st.st_mode), stat.S_ISREG(st.st_mode)):
+        results.append(path)
+
+    def walk(current, depth):
+        if maxdepth is not None and depth > maxdepth:
+            return
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            return
+
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if matches(is_dir, entry.is_file(follow_symlinks=False)):
+                results.append(os.path.join(current, entry.name))
+            if is_dir:
+                walk(os.path.join(current, entry.name), depth + 1)
+
+    if stat.S_ISDIR(st.st_mode):
+        walk(path, 1)
+
+    return results
+
+
+def resolve(cls, kwargs):
+    """
+    Return ``(True, data)`` when the fact can be answered in-process, else ``(False, None)``.
+
+    Paths this process may not look at (an unreadable parent directory) are
+    left to the shell fact, so they are answered and reported the way
+    pyinfra usually does.
+    """
+
+    try:
+        if issubclass(cls, File) and set(kwargs) == {"path"}:
+            return True, file_fact(cls, kwargs["path"])
+
+        if cls in (FindFiles, FindDirectories) and set(kwargs) <= {"path", "maxdepth"}:
+            return True, find_fact(cls, kwargs["path"], kwargs.get("maxdepth"))
+    except PermissionError:
+        pass
+
+    return False, None
@@ -0,0 +1,22 @@
+"""
+Offline benchmark for configure.py.
+
+Usage from the repository root:
+
+    uv run python -m pyinfra_bench                    # compare with baseline.json
+    uv run python -m pyinfra_bench --update-baseline  # store a new baseline
+
+Each round builds a sandbox (see ``sandbox``): a throwaway HOME whose ``dot``
+links back to this checkout, and stub pacman/paru/bun/go/cargo/fish/git/
+systemctl/sudo binaries that record state instead of touching the system or
+the network. configure.py then runs against @local three times: cold (empty
+HOME), warm (nothing left to do) and upgrade (DOTFILES_UPGRADE/PULL set).
+
+Wall time, commands run on the host (from pyinfra_profile) and peak RSS are
+compared against the stored baseline, failing when any is more than the
+threshold above it.
+"""
+
+from . import runner, sandbox
+
+__all__ = ["runner", "sandbox"]
@@ -0,0 +1,80 @@
+import argparse
+import os
+import shlex
+import sys
+
+from . import runner
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_bench",
+        description="Benchmark configure.py against @local with stubbed package managers",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per scenario")
+    parser.add_argument(
+        "--tags",
+        help="Comma-separated sections to run (defaults to all but ssh-server)",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="Allowed slowdown as a fraction (defaults to the baseline's, or 0.25)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--pyinfra",
+        default=f"{shlex.quote(sys.executable)} -m pyinfra",
+        help="Command used to start pyinfra",
+    )
+    parser.add_argument("--log-dir", help="Keep each run's pyinfra output here")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO)  # for sections.py
+    tags = [t.strip() for t in args.tags.split(",")] if args.tags else None
+    command = shlex.split(args.pyinfra) + ["@local", "configure.py", "-y"]
+
+    try:
+        results = runner.run(REPO, command, tags=tags, repeat=args.repeat, log_dir=args.log_dir)
+    except RuntimeError as e:
+        print(f"--> {e}", file=sys.stderr)
+        return 2
+
+    baseline, stored_threshold = runner.load_baseline(args.baseline)
+    threshold = args.threshold
+    if threshold is None:
+        threshold = stored_threshold if stored_threshold is not None else DEFAULT_THRESHOLD
+
+    runner.report(results, baseline)
+
+    if args.update_baseline:
+        runner.save_baseline(args.baseline, results, threshold)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}, run with --update-baseline to store one")
+        return 0
+
+    regressions = runner.compare(results, baseline, threshold)
+    if regressions:
+        print(f"\nRegressions over {threshold:.0%}:")
+        for name, metric, before, after in regressions:
+            print(f"  {name} {metric}: {before:g} -> {after:g}")
+        return 1
+
+    print(f"\nWithin {threshold:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
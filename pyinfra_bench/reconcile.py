@@ -0,0 +1,91 @@
+"""
+Micro-benchmark for pyinfra_reconcile against the per-package scans it replaced.
+
+    uv run python -m pyinfra_bench.reconcile [--size 10000]
+
+Plans a fisher-style install (owner/repo@tag specs, half of them installed)
+at ``size`` and ``size / 10`` entries. The shared index should grow about
+linearly (~10x), the old nested scan about quadratically (~100x).
+"""
+
+import argparse
+import sys
+import time
+
+from pyinfra_reconcile import plan
+
+
+def legacy_fisher(packages, current_plugins):
+    # The loop pyinfra_fisher.operations.packages used before pyinfra_reconcile
+    current_plugins_lower = [p.lower() for p in current_plugins]
+    to_install = []
+    for package in packages:
+        package_base = package.lower().split("@")[0]
+        is_installed = any(p.split("@")[0] == package_base for p in current_plugins_lower)
+        if not is_installed:
+            to_install.append(package)
+    return to_install
+
+
+def shared(packages, current_plugins):
+    changes = plan.diff(plan.Index(packages), plan.Index(current_plugins))
+    return [entry.spec for entry in changes.install]
+
+
+def workload(size):
+    wanted = [f"Owner{i}/plugin-{i}@v{i % 7}" for i in range(size)]
+    installed = [f"owner{i}/plugin-{i}@v{i % 7}" for i in range(0, size * 2, 2)]
+    return wanted, installed
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyinfra_bench.reconcile")
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=30.0,
+        help="Fail if 10x the entries takes more than this many times longer",
+    )
+    args = parser.parse_args(argv)
+
+    small = max(args.size // 10, 1)
+    timings = {}
+
+    for name, func in (("shared index", shared), ("legacy scan", legacy_fisher)):
+        small_time, small_result = timed(func, *workload(small))
+        # One pass of the quadratic scan at full size is slow enough
+        large_time, large_result = timed(
+            func, *workload(args.size), repeat=1 if func is legacy_fisher else 3
+        )
+        timings[name] = (small_time, large_time, large_result)
+        print(
+            f"{name:<13} {small:>6} entries {small_time * 1000:9.2f}ms  "
+            f"{args.size:>6} entries {large_time * 1000:9.2f}ms  "
+            f"(x{large_time / small_time:.1f})",
+        )
+
+    if timings["shared index"][2] != timings["legacy scan"][2]:
+        print("Plans differ between the shared index and the legacy scan")
+        return 1
+
+    small_time, large_time, _ = timings["shared index"]
+    if large_time / small_time > args.max_growth:
+        print(f"Shared index grew more than x{args.max_growth:g} for 10x the entries")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .sandbox import Sandbox
+
+# Run in this order against the same sandbox: the warm and upgrade runs see
+# everything the cold run installed
+SCENARIOS = {
+    "cold": {},
+    "warm": {},
+    "upgrade": {"DOTFILES_UPGRADE": "1", "DOTFILES_PULL": "1"},
+}
+
+# Compared against the baseline; lower is better for all of them
+METRICS = ["wall_time", "commands", "peak_rss_kb"]
+
+# ssh-server copies files into /etc even on the container path
+EXCLUDED_SECTIONS = ["ssh-server"]
+
+
+def default_tags():
+    from sections import SECTIONS
+
+    return [tag for tag in SECTIONS if tag not in EXCLUDED_SECTIONS]
+
+
+def _peak_rss_kb(usage):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    if sys.platform == "darwin":
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def _profile_commands(profile_dir):
+    paths = glob.glob(os.path.join(profile_dir, "profile-*.json"))
+    if not paths:
+        return None
+    with open(paths[0]) as f:
+        return json.load(f)["commands"]
+
+
+def run_scenario(sandbox, name, command, tags, log_dir):
+    """
+    Run configure.py once in ``sandbox`` and measure it.
+
+    Returns:
+        dict: wall_time (s), commands (run on the host), peak_rss_kb,
+        tool_calls (stub invocations) and the exit status
+    """
+
+    profile_dir = os.path.join(sandbox.root, "profile", name)
+    env = sandbox.env(
+        DOTFILES_TAGS=",".join(tags),
+        DOTFILES_PROFILE=profile_dir,
+        **SCENARIOS[name],
+    )
+    calls_before = len(sandbox.calls())
+
+    with open(os.path.join(log_dir, f"{name}.log"), "w") as log_file:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            cwd=sandbox.dot,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        )
+        # wait4 rather than wait() to get this child's own resource usage
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_time = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    return {
+        "wall_time": wall_time,
+        "commands": _profile_commands(profile_dir),
+        "peak_rss_kb": _peak_rss_kb(usage),
+        "tool_calls": len(sandbox.calls()) - calls_before,
+        "status": process.returncode,
+    }
+
+
+def run(repo, command, tags=None, repeat=3, log_dir=None, echo=print):
+    """
+    Run every scenario ``repeat`` times, each round in a fresh sandbox.
+
+    Returns:
+        dict: scenario -> median wall_time, max peak_rss_kb, commands and tool_calls
+    """
+
+    if tags is None:
+        tags = default_tags()
+
+    samples = {name: [] for name in SCENARIOS}
+
+    for round_number in range(1, repeat + 1):
+        with tempfile.TemporaryDirectory(prefix="dot-bench-") as root:
+            sandbox = Sandbox(root, repo).create()
+            round_logs = root
+            if log_dir:
+                round_logs = os.path.join(log_dir, f"round-{round_number}")
+                os.makedirs(round_logs, exist_ok=True)
+
+            for name in SCENARIOS:
+                result = run_scenario(sandbox, name, command, tags, round_logs)
+                if result["status"] != 0:
+                    log = os.path.join(round_logs, f"{name}.log")
+                    with open(log) as f:
+                        tail = "".join(f.readlines()[-20:])
+                    raise RuntimeError(
+                        f"Scenario {name} exited {result['status']}:\n{tail}",
+                    )
+                samples[name].append(result)
+                echo(
+                    f"--> round {round_number} {name}: {result['wall_time']:.2f}s, "
+                    f"{result['commands']} commands, {result['peak_rss_kb']} KiB",
+                )
+
+    return {
+        name: {
+            "wall_time": statistics.median(r["wall_time"] for r in results),
+            "commands": statistics.median(r["commands"] or 0 for r in results),
+            "peak_rss_kb": max(r["peak_rss_kb"] for r in results),
+            "tool_calls": statistics.median(r["tool_calls"] for r in results),
+        }
+        for name, results in samples.items()
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return ``(scenario, metric, baseline, current)`` for every regression.
+
+    A metric regresses when it is more than ``threshold`` (a fraction) above
+    its baseline value.
+    """
+
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name, {})
+        for metric in METRICS:
+            if metric not in base or not base[metric]:
+                continue
+            if metrics[metric] > base[metric] * (1 + threshold):
+                regressions.append((name, metric, base[metric], metrics[metric]))
+    return regressions
+
+
+def report(results, baseline=None, echo=print):
+    baseline = baseline or {}
+
+    echo("")
+    echo(f"{'scenario':<10}  {'wall':>8}  {'commands':>8}  {'peak rss':>10}  {'tool calls':>10}")
+    for name, metrics in results.items():
+        base = baseline.get(name, {})
+
+        def delta(metric):
+            if not base.get(metric):
+                return ""
+            return f" ({(metrics[metric] / base[metric] - 1) * 100:+.0f}%)"
+
+        echo(
+            f"{name:<10}  {metrics['wall_time']:>7.2f}s{delta('wall_time')}"
+            f"  {metrics['commands']:>8g}{delta('commands')}"
+            f"  {metrics['peak_rss_kb']:>6} KiB{delta('peak_rss_kb')}"
+            f"  {metrics['tool_calls']:>10g}",
+        )
+
+
+def load_baseline(path):
+    """
+    Return ``(scenarios, threshold)`` from a baseline file, or ``({}, None)``.
+    """
+
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}, None
+    return data.get("scenarios", {}), data.get("threshold")
+
+
+def save_baseline(path, results, threshold):
+    results = {
+        name: {metric: round(value, 3) for metric, value in metrics.items()}
+        for name, metrics in results.items()
+    }
+    with open(path, "w") as f:
+        json.dump({"threshold": threshold, "scenarios": results}, f, indent=2)
+        f.write("\n")
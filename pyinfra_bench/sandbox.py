@@ -0,0 +1,131 @@
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+
+from pyinfra_cache import store
+
+STUB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+# Tools configure.py calls whose side effects don't matter to a benchmark
+GENERIC_STUBS = [
+    "direnv",
+    "loginctl",
+    "make",
+    "modprobe",
+    "nmcli",
+    "pkexec",
+    "sysctl",
+    "systemctl",
+]
+
+STUB_KEY = b"ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIBenchmarkStubKey bench@stub\n"
+FISH_AI_ARCHIVE = "https://github.com/realiserad/fish-ai/archive/refs/heads/main.tar.gz"
+
+
+def _empty_archive():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz"):
+        pass
+    return buffer.getvalue()
+
+
+class Sandbox:
+    """
+    A throwaway HOME plus a bin directory of stub package managers.
+
+    ``home/dot`` is a copy of the working tree (tracked and untracked, not
+    ignored), so configure.py finds its own files where it expects them and
+    the stub git never sees the real checkout. Stubs record what they
+    "installed" under ``state`` and log every call to ``state/calls.log``.
+    """
+
+    def __init__(self, root, repo):
+        self.root = root
+        self.repo = repo
+        self.home = os.path.join(root, "home")
+        self.dot = os.path.join(self.home, "dot")
+        self.bin = os.path.join(root, "bin")
+        self.state = os.path.join(root, "state")
+        self.cache = os.path.join(root, "cache")
+
+    def create(self):
+        for path in (self.home, self.bin, self.state):
+            os.makedirs(path, exist_ok=True)
+
+        # link_config_dir decides before "Ensure .ssh directory exists" runs,
+        # so like any real account the sandbox starts with ~/.ssh in place
+        os.makedirs(os.path.join(self.home, ".ssh"), mode=0o700)
+
+        self._copy_tree()
+
+        # _lib.sh travels with the stubs, they source it from their own directory
+        for name in os.listdir(STUB_DIR):
+            shutil.copy2(os.path.join(STUB_DIR, name), self.bin)
+
+        for name in GENERIC_STUBS:
+            os.symlink("generic", os.path.join(self.bin, name))
+
+        # Everything configure.py downloads on the controller, pre-seeded so
+        # the download cache never reaches for the network
+        store.put("https://github.com/rfhold.keys", STUB_KEY, root=self.cache)
+        store.put(FISH_AI_ARCHIVE, _empty_archive(), root=self.cache)
+
+        return self
+
+    def _copy_tree(self):
+        listing = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=self.repo,
+            check=True,
+            capture_output=True,
+        ).stdout.decode()
+
+        for path in filter(None, listing.split("\0")):
+            source = os.path.join(self.repo, path)
+            if not os.path.lexists(source):
+                continue  # deleted but not yet committed
+            target = os.path.join(self.dot, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target, follow_symlinks=False)
+
+        # git.repo only checks for the directory
+        os.makedirs(os.path.join(self.dot, ".git"), exist_ok=True)
+
+    def env(self, **extra):
+        # Drop anything that would point tools back at the real home directory
+        env = {
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith(("XDG_", "DOTFILES_", "GOPATH", "GOBIN", "CARGO_"))
+        }
+        env.update(
+            {
+                "HOME": self.home,
+                "PATH": os.pathsep.join(
+                    [
+                        self.bin,
+                        f"{self.home}/.local/bin",
+                        f"{self.home}/go/bin",
+                        "/usr/bin",
+                        "/bin",
+                    ]
+                ),
+                "DOTFILES_BENCH_STATE": self.state,
+                "DOTFILES_CACHE_DIR": self.cache,
+                "DOTFILES_CACHE_MAX_AGE": str(10**9),
+                # Pin the target so results don't depend on the machine running them
+                "DOTFILES_PKG_MANAGER": "pacman",
+                "DOTFILES_CONTAINER": "1",
+            }
+        )
+        env.update(extra)
+        return env
+
+    def calls(self):
+        try:
+            with open(os.path.join(self.state, "calls.log")) as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
@@ -0,0 +1,295 @@
+"""
+Benchmark for pyinfra_sshmux against pyinfra's paramiko connector and a
+fresh ``ssh`` per command.
+
+    uv run python -m pyinfra_bench.sshmux [--commands 50]
+
+Runs against a throwaway server on 127.0.0.1: the system ``sshd`` with its
+own host key and authorized_keys when there is one, otherwise a small
+paramiko server that execs commands the same way. Connection time is
+measured for a cold connect (the master is started) and a warm one (a later
+run finds the master up), per-command latency as the mean of ``true`` runs.
+"""
+
+import argparse
+import getpass
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import paramiko
+from pyinfra.api import Config, Inventory, State
+
+from pyinfra_sshmux import connector as sshmux
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+class _ExecServer(paramiko.ServerInterface):
+    def __init__(self, public_key):
+        self.public_key = public_key
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_auth_publickey(self, username, key):
+        if key.get_base64() == self.public_key:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=_exec, args=(channel, command), daemon=True).start()
+        return True
+
+
+def _exec(channel, command):
+    process = subprocess.Popen(
+        ["/bin/sh", "-c", command.decode()],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    def pump_stdin():
+        while data := channel.recv(32768):
+            process.stdin.write(data)
+        process.stdin.close()
+
+    def pump_stderr():
+        while data := process.stderr.read1(32768):
+            channel.sendall_stderr(data)
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+    stderr = threading.Thread(target=pump_stderr, daemon=True)
+    stderr.start()
+    while data := process.stdout.read1(32768):
+        channel.sendall(data)
+    stderr.join()
+    channel.send_exit_status(process.wait())
+    channel.close()
+
+
+class StandIn:
+    """
+    A local SSH server accepting one generated key for the current user.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.port = _free_port()
+        self.key = os.path.join(directory, "id_ed25519")
+        self.sshd = shutil.which("sshd") or shutil.which("sshd", path="/usr/sbin:/usr/local/sbin")
+        self._process = None
+        self._socket = None
+
+    def start(self):
+        subprocess.run(
+            ["ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", self.key], check=True
+        )
+        with open(f"{self.key}.pub") as f:
+            public_key = f.read().split()[1]
+
+        if self.sshd:
+            self._start_sshd()
+        else:
+            self._start_paramiko(public_key)
+
+        config = os.path.join(self.directory, "ssh_config")
+        with open(config, "w") as f:
+            f.write(
+                "Host bench\n"
+                "    HostName 127.0.0.1\n"
+                f"    Port {self.port}\n"
+                f"    User {getpass.getuser()}\n"
+                f"    IdentityFile {self.key}\n"
+                "    IdentitiesOnly yes\n"
+                "    StrictHostKeyChecking no\n"
+                "    UserKnownHostsFile /dev/null\n"
+                "    LogLevel ERROR\n"
+            )
+        return config
+
+    def _start_sshd(self):
+        host_key = os.path.join(self.directory, "ssh_host_ed25519_key")
+        subprocess.run(
+            ["ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", host_key], check=True
+        )
+        shutil.copy(f"{self.key}.pub", os.path.join(self.directory, "authorized_keys"))
+
+        config = os.path.join(self.directory, "sshd_config")
+        with open(config, "w") as f:
+            f.write(
+                f"ListenAddress 127.0.0.1:{self.port}\n"
+                f"HostKey {host_key}\n"
+                f"AuthorizedKeysFile {self.directory}/authorized_keys\n"
+                "PidFile none\n"
+                "StrictModes no\n"
+                "UsePAM no\n"
+                "PasswordAuthentication no\n"
+                "MaxSessions 100\n"
+            )
+        self._process = subprocess.Popen(
+            [self.sshd, "-D", "-e", "-f", config], stderr=subprocess.DEVNULL
+        )
+        _wait_for_port(self.port)
+
+    def _start_paramiko(self, public_key):
+        host_key = paramiko.RSAKey.generate(2048)
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", self.port))
+        self._socket.listen(16)
+
+        def serve():
+            while True:
+                try:
+                    client, _ = self._socket.accept()
+                except OSError:
+                    return
+                transport = paramiko.Transport(client)
+                transport.add_server_key(host_key)
+                try:
+                    transport.start_server(server=_ExecServer(public_key))
+                except (EOFError, paramiko.SSHException):
+                    transport.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+
+    @property
+    def name(self):
+        return "sshd" if self.sshd else "paramiko stand-in"
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.wait()
+        if self._socket:
+            self._socket.close()
+
+
+def _host(name, data):
+    inventory = Inventory(([(name, data)], {}))
+    State(inventory, Config())
+    return inventory.get_host(name)
+
+
+def _connect(host):
+    started = time.perf_counter()
+    host.connect(raise_exceptions=True)
+    return time.perf_counter() - started
+
+
+def _per_command(run, commands):
+    started = time.perf_counter()
+    for _ in range(commands):
+        if not run():
+            raise RuntimeError("Command failed")
+    return (time.perf_counter() - started) / commands
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyinfra_bench.sshmux")
+    parser.add_argument("--commands", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="dot-sshmux-") as directory:
+        server = StandIn(directory)
+        config = server.start()
+        print(f"Server: {server.name} on port {server.port}")
+
+        mux_data = {
+            "ssh_hostname": "bench",
+            "ssh_config_file": config,
+            "ssh_control_dir": os.path.join(directory, "control"),
+            "ssh_control_persist": "60",
+        }
+        mux_args = sshmux.ssh_args({**sshmux.defaults(), **mux_data})
+        try:
+            paramiko_host = _host(
+                "127.0.0.1",
+                {
+                    "ssh_port": server.port,
+                    "ssh_key": server.key,
+                    "ssh_known_hosts_file": "/dev/null",
+                    "ssh_strict_host_key_checking": "no",
+                },
+            )
+            sshmux.register()
+            mux_host = _host("@sshmux/bench", mux_data)
+            plain_args = ["ssh", "-F", config, "-o", "ControlPath=none", "-n", "bench"]
+
+            rows = [
+                (
+                    "paramiko (pyinfra ssh)",
+                    _connect(paramiko_host),
+                    _per_command(
+                        lambda: paramiko_host.run_shell_command("true")[0], args.commands
+                    ),
+                ),
+                (
+                    "ssh per command",
+                    None,
+                    _per_command(
+                        lambda: subprocess.run(plain_args + ["true"]).returncode == 0,
+                        args.commands,
+                    ),
+                ),
+            ]
+
+            cold = _connect(mux_host)
+            mux_host.disconnect()
+            # A later run: new state and connector, the master is still up
+            warm_host = _host("@sshmux/bench", mux_data)
+            warm = _connect(warm_host)
+            per_command = _per_command(
+                lambda: warm_host.run_shell_command("true")[0], args.commands
+            )
+            rows += [
+                ("sshmux, cold", cold, per_command),
+                ("sshmux, master up", warm, per_command),
+            ]
+
+            for name, connect, per_command in rows:
+                connect_ms = f"{connect * 1000:8.1f}ms" if connect is not None else f"{'-':>10}"
+                print(f"{name:<23} connect {connect_ms}  per command {per_command * 1000:7.1f}ms")
+        finally:
+            subprocess.run(
+                mux_args + ["-O", "exit", "bench"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            server.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
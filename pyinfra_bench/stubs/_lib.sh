@@ -0,0 +1,26 @@
+# Shared by the benchmark stubs: every call is logged, and "installed"
+# things are kept as one name per line in $DOTFILES_BENCH_STATE/<list>.
+
+STATE="${DOTFILES_BENCH_STATE:?DOTFILES_BENCH_STATE is not set}"
+echo "$(basename "$0") $*" >> "$STATE/calls.log"
+
+list_add() {
+    local list="$STATE/$1"
+    shift
+    touch "$list"
+    for name in "$@"; do
+        grep -qxF -- "$name" "$list" || echo "$name" >> "$list"
+    done
+}
+
+list_show() {
+    [[ -f "$STATE/$1" ]] && cat "$STATE/$1"
+    return 0
+}
+
+# Every option-free argument, for "tool -S --flag a b c" style command lines
+operands() {
+    for arg in "$@"; do
+        [[ "$arg" == -* ]] || echo "$arg"
+    done
+}
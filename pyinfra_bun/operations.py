@@ -1,6 +1,8 @@
 from pyinfra import host
 from pyinfra.api import operation
 
+from pyinfra_reconcile import plan
+
 from .facts import BunGlobalPackages
 
 
@@ -38,31 +40,19 @@ def packages(packages=None, present=True, update=False):
     if isinstance(packages, str):
         packages = [packages]
 
-    current_packages = host.get_fact(BunGlobalPackages) or []
-    current_packages_lower = [p.lower() for p in current_packages]
-
-    if present:
-        if update:
-            # Update mode: reinstall all specified packages
-            for package in packages:
-                yield f'bun add -g {package}'
-        else:
-            # Normal mode: only install missing packages
-            to_install = [
-                pkg for pkg in packages
-                if pkg.lower() not in current_packages_lower
-            ]
-
-            for package in to_install:
-                yield f'bun add -g {package}'
-    else:
-        to_remove = [
-            pkg for pkg in packages
-            if pkg.lower() in current_packages_lower
-        ]
+    changes = plan.diff(
+        plan.Index(packages),
+        plan.Index(host.get_fact(BunGlobalPackages)),
+        present=present,
+        # Update mode reinstalls every specified package
+        update=update,
+    )
+
+    for entry in changes.install + changes.update:
+        yield f'bun add -g {entry.spec}'
 
-        for package in to_remove:
-            yield f'bun remove -g {package}'
+    for entry in changes.remove:
+        yield f'bun remove -g {entry.name}'
 
 
 @operation()
@@ -0,0 +1,23 @@
+"""
+Offline provisioning bundles for configure.py.
+
+Usage from the repository root, on a machine that can reach the network:
+
+    uv run python -m pyinfra_bundle export --profile arch -o dot-bundle.tar
+
+and on the machine to provision:
+
+    bin/update.sh --bundle=dot-bundle.tar
+
+The artifact set is resolved by exporting configure.py for the profile (see
+``pyinfra_export``) and reading what the script would fetch: system packages
+with their dependencies, git repositories (as mirrors), Go modules, cargo
+binaries, uv tool wheels, tree-sitter parsers and the download cache. With
+``DOTFILES_BUNDLE`` set, configure.py points each of those at the bundle
+(``bundle.activate``) instead of the network. Bun packages and fish plugins
+are not bundled yet and still download.
+"""
+
+from . import bundle, operations, resolve
+
+__all__ = ["bundle", "operations", "resolve"]
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from pyinfra_export import runner
+from pyinfra_export.profiles import PROFILES
+
+from . import bundle
+
+
+def export_command(args):
+    output = os.path.abspath(args.output)
+    tags = [t.strip() for t in args.tags.split(",") if t.strip()] if args.tags else None
+
+    with tempfile.TemporaryDirectory(prefix="dot-bundle-") as scratch:
+        status = runner.run(
+            args.profile,
+            scratch,
+            tags=tags,
+            combined=True,
+            arch=args.arch,
+            pyinfra=args.pyinfra,
+        )
+        if status != 0:
+            return status
+        with open(os.path.join(scratch, "configure.sh")) as f:
+            script = f.read()
+
+    manifest = bundle.create(output, script, PROFILES[args.profile]["pkg_manager"], args.profile)
+
+    for kind, items in manifest["missing"].items():
+        bundle.echo(f"--> Not bundled ({kind}): {', '.join(items)}")
+    bundle.echo(f"--> Wrote {output} ({os.path.getsize(output) // (1024 * 1024)} MiB)")
+    return 0
+
+
+def extract_command(args):
+    print(bundle.open_bundle(os.path.abspath(args.bundle)))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_bundle",
+        description="Build and unpack offline provisioning bundles for configure.py",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Collect a profile's artifacts into a tarball")
+    export.add_argument("-o", "--output", default="dot-bundle.tar")
+    export.add_argument("--profile", choices=sorted(PROFILES), default="arch")
+    export.add_argument("--tags", help="Comma-separated sections to bundle (defaults to all)")
+    export.add_argument("--arch", default=runner.default_arch())
+    export.add_argument("--pyinfra", default=runner.default_pyinfra())
+    export.set_defaults(func=export_command)
+
+    extract = subparsers.add_parser(
+        "extract", help="Unpack a bundle (as configure.py would) and print its directory"
+    )
+    extract.add_argument("bundle")
+    extract.set_defaults(func=extract_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
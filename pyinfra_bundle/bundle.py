@@ -0,0 +1,335 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from pyinfra_cache import store as downloads
+from pyinfra_cargo import store as artifacts
+
+from . import resolve
+
+MANIFEST = "manifest.json"
+
+# Top-level directory inside a bundle tarball
+ARCHIVE_ROOT = "dot-bundle"
+
+PARSER_DIR = os.path.expanduser("~/.local/share/nvim/site/parser")
+
+
+def echo(line):
+    print(line, file=sys.stderr)
+
+
+def mirror_path(url):
+    """
+    Path of a clone URL's mirror inside ``git/``.
+
+    ``https://github.com/tmux-plugins/tpm`` -> ``github.com/tmux-plugins/tpm``,
+    ``git@host:owner/repo.git`` -> ``host/owner/repo.git``
+    """
+
+    if "://" in url:
+        rest = url.split("://", 1)[1]
+        host, _, path = rest.partition("/")
+        return f"{host.rsplit('@', 1)[-1]}/{path}"
+    user_host, _, path = url.partition(":")
+    return f"{user_host.rsplit('@', 1)[-1]}/{path}"
+
+
+def _run(command, env=None):
+    try:
+        result = subprocess.run(
+            command,
+            env={**os.environ, **(env or {})},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except FileNotFoundError:
+        echo(f"    {command[0]} is not installed")
+        return False
+    if result.returncode != 0:
+        echo(f"    {' '.join(command)} failed: {result.stderr.strip()}")
+    return result.returncode == 0
+
+
+def _own(path):
+    # Package managers download as root; the bundle belongs to whoever made it
+    _run(["sudo", "chown", "-R", f"{os.getuid()}:{os.getgid()}", path])
+
+
+# Collectors, each filling one directory of the bundle on this machine
+#
+
+
+def collect_downloads(root):
+    source = downloads.cache_dir()
+    if os.path.isdir(source):
+        shutil.copytree(
+            source,
+            os.path.join(root, "downloads"),
+            ignore=shutil.ignore_patterns("*.lock", ".tmp-*"),
+        )
+    return []
+
+
+def collect_git(root, urls):
+    missing = []
+    for url in urls:
+        dest = os.path.join(root, "git", mirror_path(url))
+        if not _run(["git", "clone", "--mirror", "--quiet", url, dest]):
+            missing.append(url)
+    return missing
+
+
+def collect_packages(root, pkg_manager, names):
+    if not names or pkg_manager not in ("pacman", "apt"):
+        return []
+
+    dest = os.path.join(root, "packages", pkg_manager)
+    os.makedirs(dest, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="dot-bundle-") as scratch:
+        if pkg_manager == "pacman":
+            # An empty local database makes every dependency count as missing,
+            # so a fresh machine finds the whole closure in the bundle
+            os.makedirs(os.path.join(scratch, "local"))
+            shutil.copytree("/var/lib/pacman/sync", os.path.join(scratch, "sync"))
+            command = ["pacman", "-Sw", "--noconfirm", "--dbpath", scratch, "--cachedir", dest]
+        else:
+            status = os.path.join(scratch, "status")
+            open(status, "w").close()
+            os.makedirs(os.path.join(dest, "partial"), exist_ok=True)
+            command = [
+                "apt-get", "install", "--download-only", "-y",
+                "-o", f"Dir::Cache::archives={dest}",
+                "-o", f"Dir::State::status={status}",
+                "-o", "Debug::NoLocking=1",
+            ]  # fmt: skip
+        ok = _run(["sudo", *command, *names])
+
+    if pkg_manager == "apt":
+        shutil.rmtree(os.path.join(dest, "partial"), ignore_errors=True)
+        # Indexes the debs were resolved against, apt needs them to install
+        shutil.copytree(
+            "/var/lib/apt/lists",
+            os.path.join(dest, "lists"),
+            ignore=shutil.ignore_patterns("lock", "partial"),
+        )
+    _own(dest)
+    return [] if ok else names
+
+
+def collect_go(root, specs):
+    missing = []
+    with tempfile.TemporaryDirectory(prefix="dot-bundle-") as scratch:
+        env = {
+            "GOMODCACHE": os.path.join(scratch, "mod"),
+            "GOBIN": os.path.join(scratch, "bin"),
+            "GOFLAGS": "-modcacherw",
+        }
+        for spec in specs:
+            if not _run(["go", "install", spec], env=env):
+                missing.append(spec)
+        # The download cache has the GOPROXY layout, a file:// proxy can serve it
+        download = os.path.join(scratch, "mod", "cache", "download")
+        if os.path.isdir(download):
+            shutil.copytree(download, os.path.join(root, "go"))
+    return missing
+
+
+def collect_cargo(root, crates):
+    artifacts.collect()
+    missing = []
+    for crate in crates:
+        source = os.path.join(artifacts.artifact_dir(), "cargo", crate)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(root, "artifacts", "cargo", crate))
+        else:
+            missing.append(crate)
+    return missing
+
+
+def collect_uv(root, tools, uploads):
+    missing = []
+    with tempfile.TemporaryDirectory(prefix="dot-bundle-") as scratch:
+        env = {
+            "UV_CACHE_DIR": os.path.join(root, "uv"),
+            "UV_TOOL_DIR": os.path.join(scratch, "tools"),
+            "UV_TOOL_BIN_DIR": os.path.join(scratch, "bin"),
+        }
+        for spec, python in tools:
+            name, _, url = spec.partition(" @ file://")
+            # The archive is uploaded earlier in the same script
+            data = uploads.get(url)
+            if data is None:
+                missing.append(spec)
+                continue
+            archive = os.path.join(scratch, os.path.basename(url))
+            with open(archive, "wb") as f:
+                f.write(data)
+            command = ["uv", "tool", "install", f"{name} @ file://{archive}"]
+            if python:
+                command[3:3] = ["--python", python]
+            if not _run(command, env=env):
+                missing.append(spec)
+    return missing
+
+
+def collect_parsers(root, langs):
+    missing = []
+    for lang in langs:
+        source = os.path.join(PARSER_DIR, f"{lang}.so")
+        if os.path.isfile(source):
+            os.makedirs(os.path.join(root, "parsers"), exist_ok=True)
+            shutil.copy2(source, os.path.join(root, "parsers", f"{lang}.so"))
+        else:
+            missing.append(lang)
+    return missing
+
+
+def create(output, script, pkg_manager, profile):
+    """
+    Build a bundle tarball for everything a combined export ``script`` fetches.
+
+    Artifacts come from this machine: its caches, its built parsers and
+    binaries, and fresh downloads for the rest. Anything that could not be
+    collected is listed under ``missing`` in the manifest and left to the
+    network on import.
+
+    Returns:
+        dict: the manifest
+    """
+
+    found = resolve.artifacts(script)
+
+    with tempfile.TemporaryDirectory(prefix="dot-bundle-") as scratch:
+        root = os.path.join(scratch, ARCHIVE_ROOT)
+        os.makedirs(root)
+
+        steps = [
+            ("downloads", lambda: collect_downloads(root)),
+            ("git", lambda: collect_git(root, found["git"])),
+            ("packages", lambda: collect_packages(root, pkg_manager, found[pkg_manager])),
+            ("go", lambda: collect_go(root, found["go"])),
+            ("cargo", lambda: collect_cargo(root, found["cargo"])),
+            ("uv", lambda: collect_uv(root, found["uv"], resolve.uploads(script))),
+            ("parsers", lambda: collect_parsers(root, found["parsers"])),
+        ]
+        missing = {}
+        for kind, step in steps:
+            echo(f"--> Collecting {kind}")
+            failed = step()
+            if failed:
+                missing[kind] = failed
+
+        manifest = {
+            "profile": profile,
+            "created": time.time(),
+            "git": found["git"],
+            "missing": missing,
+        }
+        with open(os.path.join(root, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        partial = f"{output}.part"
+        # Uncompressed: most of it is already compressed, and importing
+        # should run at disk speed
+        with tarfile.open(partial, "w") as tar:
+            tar.add(root, arcname=ARCHIVE_ROOT)
+        os.replace(partial, output)
+
+    return manifest
+
+
+# Import
+#
+
+
+def extract_dir():
+    return os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "dot", "bundles"
+    )
+
+
+def open_bundle(path):
+    """
+    Return the directory of a bundle, extracting a tarball once per version of it.
+    """
+
+    if os.path.isdir(path):
+        return path
+
+    stat = os.stat(path)
+    name = os.path.basename(path).removesuffix(".tar")
+    dest = os.path.join(extract_dir(), f"{name}-{int(stat.st_mtime)}-{stat.st_size}")
+    root = os.path.join(dest, ARCHIVE_ROOT)
+
+    if not os.path.exists(os.path.join(root, MANIFEST)):
+        shutil.rmtree(dest, ignore_errors=True)
+        os.makedirs(dest)
+        with tarfile.open(path) as tar:
+            tar.extractall(dest, filter="data")
+
+    return root
+
+
+def activate(path):
+    """
+    Point the download cache, cargo artifacts, git, go and uv at a bundle.
+
+    Sets environment variables of this process, which commands on ``@local``
+    inherit; on other hosts only what is uploaded from the controller
+    (downloads, cargo binaries, parsers) comes from the bundle.
+
+    Returns:
+        str: the bundle directory
+    """
+
+    root = open_bundle(path)
+    with open(os.path.join(root, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    env = {
+        "DOTFILES_CACHE_DIR": os.path.join(root, "downloads"),
+        # Never revalidate: the bundle is the origin now
+        "DOTFILES_CACHE_MAX_AGE": str(10**9),
+        "DOTFILES_ARTIFACTS": os.path.join(root, "artifacts"),
+    }
+
+    # url.<mirror>.insteadOf=<url> for every mirrored repository
+    count = int(os.environ.get("GIT_CONFIG_COUNT", "0"))
+    for url in manifest["git"]:
+        mirror = os.path.join(root, "git", mirror_path(url))
+        if not os.path.isdir(mirror):
+            continue
+        env[f"GIT_CONFIG_KEY_{count}"] = f"url.file://{mirror}.insteadOf"
+        env[f"GIT_CONFIG_VALUE_{count}"] = url
+        count += 1
+    env["GIT_CONFIG_COUNT"] = str(count)
+
+    if os.path.isdir(os.path.join(root, "go")):
+        env["GOPROXY"] = f"file://{os.path.join(root, 'go')}"
+        env["GOSUMDB"] = "off"
+
+    if os.path.isdir(os.path.join(root, "uv")):
+        env["UV_CACHE_DIR"] = os.path.join(root, "uv")
+        env["UV_OFFLINE"] = "1"
+
+    os.environ.update(env)
+    return root
+
+
+def parser(root, lang):
+    path = os.path.join(root, "parsers", f"{lang}.so")
+    return path if os.path.isfile(path) else None
+
+
+def packages_dir(root, pkg_manager):
+    path = os.path.join(root, "packages", pkg_manager)
+    return path if os.path.isdir(path) else None
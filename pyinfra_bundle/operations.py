@@ -0,0 +1,72 @@
+import fnmatch
+import os
+import shlex
+
+from pyinfra import host
+from pyinfra.api import operation
+from pyinfra.facts.files import FindFiles
+
+# Bundle subdirectory -> where the package manager looks for it, and which
+# files there belong in it (None: all of them)
+PACKAGE_CACHES = {
+    "pacman": [("", "/var/cache/pacman/pkg", ["*.pkg.tar.*"])],
+    "apt": [("", "/var/cache/apt/archives", ["*.deb"]), ("lists", "/var/lib/apt/lists", None)],
+}
+
+# Unfinished downloads (pacman's *.pkg.tar.zst.part) never go into a cache
+PARTIAL_PATTERNS = ["*.part"]
+
+
+def _wanted(name, patterns):
+    if any(fnmatch.fnmatch(name, pattern) for pattern in PARTIAL_PATTERNS):
+        return False
+    return patterns is None or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+@operation()
+def packages(src, pkg_manager, move=False):
+    """
+    Copy a bundle's system packages into the package manager's own cache.
+
+    pacman and apt then install them without downloading; apt also gets the
+    package lists the bundle was resolved against. Only packages (and
+    their signatures) are taken, never partial downloads or stray files,
+    and files already in the cache are left alone. ``src`` must exist on the host, so this is for
+    bundles used on ``@local``.
+
+    Args:
+        src (str): Bundle's ``packages/<pkg_manager>`` directory
+        pkg_manager (str): ``pacman`` or ``apt``
+        move (bool): Move the files instead of copying them, for download
+            directories that are emptied into the cache (pyinfra_prefetch)
+
+    Example:
+        bundled.packages(
+            name="Seed package cache from the offline bundle",
+            src=bundle.packages_dir(bundle_dir, "pacman"),
+            pkg_manager="pacman",
+            _sudo=True,
+        )
+    """
+
+    for subdir, dest, patterns in PACKAGE_CACHES.get(pkg_manager, []):
+        source = f"{src}/{subdir}" if subdir else src
+        bundled = host.get_fact(FindFiles, path=source, maxdepth=1) or []
+        cached = host.get_fact(FindFiles, path=dest, maxdepth=1) or []
+        present = {os.path.basename(path) for path in cached}
+
+        missing = [
+            path
+            for path in bundled
+            if _wanted(os.path.basename(path), patterns)
+            and os.path.basename(path) not in present
+        ]
+        if not missing:
+            host.noop(f"{dest} has every bundled file")
+            continue
+
+        yield "{0} -n {1} {2}/".format(
+            "mv" if move else "cp",
+            " ".join(shlex.quote(path) for path in missing),
+            shlex.quote(dest),
+        )
@@ -0,0 +1,48 @@
+import base64
+import re
+
+# Patterns over a combined pyinfra_export script; each command is one line
+# except uploads, which are base64 heredocs
+GIT_CLONE = re.compile(r"git clone (?:-\S+ )*'?([^\s']+)")
+PACMAN_INSTALL = re.compile(r"pacman --noconfirm -S ([^'-][^']*)'")
+APT_INSTALL = re.compile(r"apt-get .* install ([^']+)'")
+GO_INSTALL = re.compile(r"(?<![\w-])go install ([^\s']+)")
+CARGO_INSTALL = re.compile(r"cargo install (?:--\S+ \S+ )*([^\s'@]+)")
+UV_TOOL = re.compile(r"uv tool install --force(?: --python (\S+))? '\"'\"'(.+? @ file://[^']+)'\"'\"'")
+PARSER = re.compile(r"tree-sitter build --output \S+/parser/([\w-]+)\.so")
+UPLOAD = re.compile(r"base64 -d > (\S+?)'? <<'__DOT_EOF__'\n(.*?)\n__DOT_EOF__", re.S)
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def artifacts(script):
+    """
+    Return what a combined export script fetches from the network.
+
+    Returns:
+        dict: ``git`` (clone URLs), ``pacman``/``apt`` (package names), ``go``
+        (install specs), ``cargo`` (crates), ``uv`` (``(spec, python)`` of tools
+        installed from local archives) and ``parsers`` (tree-sitter
+        languages)
+    """
+
+    found = {
+        "git": GIT_CLONE.findall(script),
+        "pacman": [p for line in PACMAN_INSTALL.findall(script) for p in line.split()],
+        "apt": [p for line in APT_INSTALL.findall(script) for p in line.split()],
+        "go": GO_INSTALL.findall(script),
+        "cargo": CARGO_INSTALL.findall(script),
+        "uv": [(spec, python or None) for python, spec in UV_TOOL.findall(script)],
+        "parsers": PARSER.findall(script),
+    }
+    return {kind: _unique(values) for kind, values in found.items()}
+
+
+def uploads(script):
+    """
+    Return ``{remote path: bytes}`` for every file the script writes.
+    """
+
+    return {path: base64.b64decode(body) for path, body in UPLOAD.findall(script)}
@@ -0,0 +1,33 @@
+"""
+Controller-side download cache for pyinfra deploys.
+
+Example usage in configure.py:
+
+    from pyinfra_cache import operations as cache
+
+    cache.download(
+        name="Docker apt key",
+        src="https://download.docker.com/linux/debian/gpg",
+        dest="/etc/apt/keyrings/docker.gpg",
+        dearmor=True,
+        _sudo=True,
+    )
+
+    cache.authorized_keys(
+        name="Sync GitHub public keys",
+        src="https://github.com/rfhold.keys",
+        dest=f"{home}/.ssh/authorized_keys",
+    )
+
+Each URL is fetched once on the controller into a content-addressed store
+(DOTFILES_CACHE_DIR, default ~/.cache/dot/downloads) and revalidated with
+ETag/Last-Modified after DOTFILES_CACHE_MAX_AGE seconds. Hosts get the file
+over the existing pyinfra connection, and only when their copy differs.
+
+authorized_keys compares key sets rather than bytes, uses a short timeout
+and keeps the host's file when the origin can't be reached.
+"""
+
+from . import facts, operations, store
+
+__all__ = ["facts", "operations", "store"]
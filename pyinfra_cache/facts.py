@@ -0,0 +1,51 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+# Printed before the file so an empty file and a missing one differ
+PRESENT_MARKER = "__present__"
+
+
+def key_set(lines):
+    """
+    Normalise authorized_keys lines into a set, ignoring order, blank lines,
+    comments and runs of whitespace.
+    """
+
+    return frozenset(
+        " ".join(line.split())
+        for line in lines
+        if line.strip() and not line.lstrip().startswith("#")
+    )
+
+
+class AuthorizedKeys(FactBase):
+    """
+    Returns the keys, mode and owner of an authorized_keys file, or None if it doesn't exist.
+
+    Example:
+        current = host.get_fact(AuthorizedKeys, path="/home/me/.ssh/authorized_keys")
+        # Returns: {'keys': frozenset({'ssh-ed25519 AAAA...', ...}),
+        #           'mode': '600', 'user': 'me', 'group': 'me'}
+    """
+
+    def command(self, path):
+        path = shlex.quote(path)
+        # GNU stat, then BSD stat on macOS
+        return (
+            f"if [ -f {path} ]; then echo {PRESENT_MARKER}; "
+            f"stat -L -c '%a %U %G' {path} 2>/dev/null || stat -L -f '%Lp %Su %Sg' {path}; "
+            f"cat {path}; fi"
+        )
+
+    def process(self, output):
+        if not output or output[0].strip() != PRESENT_MARKER:
+            return None
+        stat = (output[1] if len(output) > 1 else "").split() + ["", "", ""]
+        mode, user, group = stat[:3]
+        return {
+            "keys": key_set(output[2:]),
+            "mode": mode,
+            "user": user,
+            "group": group,
+        }
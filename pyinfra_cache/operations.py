@@ -0,0 +1,132 @@
+import sys
+
+from pyinfra import host
+from pyinfra.api import FileUploadCommand, OperationError, QuoteString, StringCommand, operation
+from pyinfra.operations import files
+
+from . import store
+from .facts import AuthorizedKeys, key_set
+
+# authorized_keys sits on the critical path of every core run; a slow
+# origin should cost seconds, not the default socket timeout
+KEYS_TIMEOUT = 3
+
+
+@operation()
+def download(src, dest, mode=None, user=None, group=None, dearmor=False, max_age=None):
+    """
+    Download a URL once on the controller and upload it to the host if it differs.
+
+    Args:
+        src (str): URL to download (cached, see ``store.fetch``)
+        dest (str): Remote path to write
+        mode (str): Permissions for dest
+        user (str): Owner for dest
+        group (str): Group for dest
+        dearmor (bool): Upload the binary form of an ASCII-armored OpenPGP key,
+            for apt ``signed-by`` keyrings
+        max_age (int): Seconds the cached copy is used without revalidating
+
+    Example:
+        cache.download(
+            name="Docker apt key",
+            src="https://download.docker.com/linux/debian/gpg",
+            dest="/etc/apt/keyrings/docker.gpg",
+            dearmor=True,
+            mode="644",
+            _sudo=True,
+        )
+    """
+
+    cached = store.fetch(src, max_age=max_age)
+    if dearmor:
+        cached = store.dearmor(cached)
+
+    # files.put compares checksums, so an unchanged file costs no transfer
+    yield from files.put._inner(
+        src=cached.path,
+        dest=dest,
+        user=user,
+        group=group,
+        mode=mode,
+        add_deploy_dir=False,
+    )
+
+
+@operation()
+def authorized_keys(
+    src, dest, mode="600", user=None, group=None, timeout=KEYS_TIMEOUT, max_age=None
+):
+    """
+    Keep an authorized_keys file in sync with a key list URL (e.g. GitHub's ``<user>.keys``).
+
+    The URL is revalidated with the stored ETag/Last-Modified and a short
+    timeout. If the origin is slow or down, the host's existing file is left
+    alone; only a host without one gets the last cached copy. The
+    file is only rewritten, via a temporary file renamed into place, when the
+    set of keys differs; ordering and whitespace changes are ignored. A file
+    with the right keys but a different mode or owner is fixed in place, as
+    sshd's StrictModes rejects a group or world writable one.
+
+    Args:
+        src (str): URL serving one public key per line
+        dest (str): Remote authorized_keys path
+        mode (str): Permissions for dest
+        user (str): Owner for dest, left alone if None
+        group (str): Group for dest, left alone if None
+        timeout (float): Seconds to wait for the origin
+        max_age (int): Seconds the cached copy is used without revalidating
+
+    Example:
+        cache.authorized_keys(
+            name="Sync GitHub public keys",
+            src="https://github.com/rfhold.keys",
+            dest=f"{home}/.ssh/authorized_keys",
+        )
+    """
+
+    current = host.get_fact(AuthorizedKeys, path=dest)
+
+    try:
+        cached = store.fetch(src, max_age=max_age, timeout=timeout)
+    except store.CacheError as e:
+        if current is None:
+            raise OperationError(f"No copy of {src} and no existing {dest}: {e}")
+        print(f"--> Keeping existing {dest}: {e}", file=sys.stderr)
+        host.noop(f"{dest} kept, {src} unavailable")
+        return
+
+    if cached.stale and current is not None:
+        # An old copy from the controller may lack keys added since
+        print(f"--> Keeping existing {dest}: {src} unavailable", file=sys.stderr)
+        host.noop(f"{dest} kept, {src} unavailable")
+        return
+
+    wanted = key_set(cached.read().decode().splitlines())
+    if not wanted:
+        # An empty answer is far more likely an origin hiccup than a request
+        # to lock everyone out
+        raise OperationError(f"{src} returned no keys, refusing to empty {dest}")
+
+    # chown "user", "user:group" or ":group"
+    owner = f"{user or ''}:{group}" if group else user
+
+    if current and wanted == current["keys"]:
+        # mode="600" and a fact's "0600" (or "600") are the same permissions
+        changed = False
+        if int(str(mode), 8) != int(current["mode"] or "0", 8):
+            yield StringCommand("chmod", mode, QuoteString(dest))
+            changed = True
+        if (user and user != current["user"]) or (group and group != current["group"]):
+            yield StringCommand("chown", owner, QuoteString(dest))
+            changed = True
+        if not changed:
+            host.noop(f"{dest} already has the keys from {src}")
+        return
+
+    temp = f"{dest}.tmp"
+    yield FileUploadCommand(cached.path, temp)
+    yield StringCommand("chmod", mode, QuoteString(temp))
+    if owner:
+        yield StringCommand("chown", owner, QuoteString(temp))
+    yield StringCommand("mv", "-f", QuoteString(temp), QuoteString(dest))
@@ -0,0 +1,249 @@
+import base64
+import binascii
+import fcntl
+import hashlib
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+# Revalidating once per this many seconds is enough: a run across the whole
+# fleet, sequential or parallel, then costs one request per URL
+DEFAULT_MAX_AGE = 300
+DEFAULT_TIMEOUT = 30
+
+# url -> Cached, so several hosts in one pyinfra process never re-check
+_memo = {}
+
+
+class Cached(NamedTuple):
+    url: str
+    path: str  # content-addressed file on the controller
+    sha256: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float  # last time the origin confirmed or sent this content
+    stale: bool  # origin unreachable, served from an older copy
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class CacheError(Exception):
+    pass
+
+
+def cache_dir():
+    return os.environ.get("DOTFILES_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "dot",
+        "downloads",
+    )
+
+
+def _max_age():
+    return int(os.environ.get("DOTFILES_CACHE_MAX_AGE", DEFAULT_MAX_AGE))
+
+
+def _url_key(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _store_object(root, data):
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = os.path.join(root, "objects", sha256)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return sha256, path
+
+
+@contextmanager
+def _locked(root, url):
+    # Parallel sections and fleet hosts run as separate processes; the first
+    # one to get here fetches, the others then find a fresh entry
+    with open(os.path.join(root, "urls", f"{_url_key(url)}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_meta(root, url):
+    try:
+        with open(os.path.join(root, "urls", f"{_url_key(url)}.json")) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if not os.path.exists(os.path.join(root, "objects", meta["sha256"])):
+        return None
+    return meta
+
+
+def _save_meta(root, url, meta):
+    path = os.path.join(root, "urls", f"{_url_key(url)}.json")
+    _write_atomic(path, json.dumps(meta, indent=2).encode())
+
+
+def _cached(root, meta, stale=False):
+    return Cached(
+        url=meta["url"],
+        path=os.path.join(root, "objects", meta["sha256"]),
+        sha256=meta["sha256"],
+        etag=meta.get("etag"),
+        last_modified=meta.get("last_modified"),
+        fetched_at=meta["fetched_at"],
+        stale=stale,
+    )
+
+
+def _revalidate(root, url, meta, timeout):
+    request = urllib.request.Request(url, headers={"User-Agent": "dot-cache"})
+    if meta:
+        if meta.get("etag"):
+            request.add_header("If-None-Match", meta["etag"])
+        if meta.get("last_modified"):
+            request.add_header("If-Modified-Since", meta["last_modified"])
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and meta:
+            meta["fetched_at"] = time.time()
+            _save_meta(root, url, meta)
+            return _cached(root, meta)
+        raise
+
+    sha256, _ = _store_object(root, data)
+    meta = {
+        "url": url,
+        "sha256": sha256,
+        "size": len(data),
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    }
+    _save_meta(root, url, meta)
+    return _cached(root, meta)
+
+
+def fetch(url, max_age=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Return a ``Cached`` copy of ``url``, downloading or revalidating as needed.
+
+    Content lives under ``objects/<sha256>`` so identical bodies behind
+    different URLs are stored once. An entry younger than ``max_age`` is used
+    without any request; older ones are revalidated with If-None-Match /
+    If-Modified-Since. When the origin fails and a copy exists, that copy is
+    returned with ``stale=True`` instead of failing the run.
+
+    Args:
+        url (str): http(s) URL to fetch
+        max_age (int): Seconds an entry is trusted without revalidating;
+            defaults to DOTFILES_CACHE_MAX_AGE or 300
+        timeout (float): Socket timeout for the request
+    """
+
+    if url in _memo:
+        return _memo[url]
+
+    if max_age is None:
+        max_age = _max_age()
+
+    root = cache_dir()
+    os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+    os.makedirs(os.path.join(root, "urls"), exist_ok=True)
+
+    with _locked(root, url):
+        meta = _load_meta(root, url)
+        if meta and time.time() - meta["fetched_at"] < max_age:
+            cached = _cached(root, meta)
+        else:
+            try:
+                cached = _revalidate(root, url, meta, timeout)
+            # HTTPException: the connection dropped mid-body (IncompleteRead)
+            except (OSError, urllib.error.URLError, http.client.HTTPException) as e:
+                if not meta:
+                    raise CacheError(f"Could not download {url}: {e}") from e
+                print(f"--> Using cached {url}, origin failed: {e}", file=sys.stderr)
+                cached = _cached(root, meta, stale=True)
+
+    _memo[url] = cached
+    return cached
+
+
+def put(url, data, root=None):
+    """
+    Store ``data`` as the current copy of ``url`` without asking the origin.
+
+    For seeding the cache offline (benchmarks, imported bundles); the entry
+    has no validators, so the next revalidation downloads it in full.
+    """
+
+    root = root or cache_dir()
+    os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+    os.makedirs(os.path.join(root, "urls"), exist_ok=True)
+
+    sha256, _ = _store_object(root, data)
+    meta = {"url": url, "sha256": sha256, "size": len(data), "fetched_at": time.time()}
+    _save_meta(root, url, meta)
+    _memo.pop(url, None)
+    return _cached(root, meta)
+
+
+def dearmor(cached):
+    """
+    Return the cached binary form of an ASCII-armored OpenPGP key, like ``gpg --dearmor``.
+
+    The result is content-addressed next to the armored original, so apt
+    keyrings can be uploaded without gpg on the host.
+    """
+
+    data = cached.read()
+    if b"-----BEGIN PGP" not in data:
+        # Already binary (or plain text we can't do anything with)
+        return cached
+
+    lines = data.decode("ascii", errors="replace").strip().splitlines()
+
+    try:
+        start = next(i for i, line in enumerate(lines) if line.startswith("-----BEGIN PGP"))
+        end = next(i for i, line in enumerate(lines) if line.startswith("-----END PGP"))
+    except StopIteration:
+        raise CacheError(f"Unterminated armored key from {cached.url}")
+
+    body = lines[start + 1 : end]
+    # Skip armor headers ("Version: ...") up to the blank separator line
+    if "" in body:
+        body = body[body.index("") + 1 :]
+    # Drop the "=XXXX" CRC24 checksum line
+    body = [line for line in body if line and not line.startswith("=")]
+
+    try:
+        data = base64.b64decode("".join(body), validate=True)
+    except binascii.Error as e:
+        raise CacheError(f"Malformed armored key from {cached.url}: {e}") from e
+
+    root = cache_dir()
+    sha256, path = _store_object(root, data)
+    return cached._replace(path=path, sha256=sha256)
@@ -0,0 +1,29 @@
+"""
+Cargo crate operations for pyinfra, with prebuilt binaries.
+
+Example usage in configure.py:
+
+    from pyinfra_cargo import operations as cargo
+
+    cargo.packages(
+        name="Install cargo packages",
+        packages=[
+            'starship',
+            'tree-sitter-cli',
+        ],
+        present=True,
+    )
+
+Binaries are taken from a local artifact store (DOTFILES_ARTIFACTS, default
+~/.cache/dot/artifacts) when it has the crate for the host's target; fill
+it from a machine that has built them with:
+
+    uv run python -m pyinfra_cargo collect
+
+Anything else is compiled with ``cargo install`` and a shared target
+directory that persists between runs.
+"""
+
+from . import facts, operations, store
+
+__all__ = ['facts', 'operations', 'store']
@@ -0,0 +1,41 @@
+import argparse
+import sys
+
+from . import store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_cargo",
+        description="Manage the prebuilt binary store used by pyinfra_cargo",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "collect",
+        help="Store the binaries of every crate cargo installed on this machine",
+    )
+
+    add = subparsers.add_parser("add", help="Store binaries built elsewhere")
+    add.add_argument("crate")
+    add.add_argument("version")
+    add.add_argument("target", help="Rust target triple, e.g. aarch64-unknown-linux-gnu")
+    add.add_argument("bins", nargs="+", help="Binary files to store")
+    add.add_argument(
+        "--glibc",
+        help="glibc version of the build machine, for -gnu targets (unchecked if left out)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "collect":
+        for crate, version, target in store.collect():
+            print(f"{crate} {version} {target}")
+    else:
+        print(store.put(args.crate, args.version, args.target, args.bins, glibc=args.glibc))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import json
+import re
+
+from pyinfra.api import FactBase
+
+from .store import parse_crates2
+
+MARKERS = ("__home__", "__uname__", "__crates2__", "__prebuilt__")
+
+ARCHES = {"x86_64": "x86_64", "amd64": "x86_64", "aarch64": "aarch64", "arm64": "aarch64"}
+
+
+def target_triple(machine, system, libc):
+    arch = ARCHES.get(machine, machine)
+    if system == "Darwin":
+        return f"{arch}-apple-darwin"
+    return f"{arch}-unknown-linux-{'musl' if 'musl' in libc.lower() else 'gnu'}"
+
+
+def glibc_version(system, libc):
+    # "ldd (GNU libc) 2.39", "ldd (Ubuntu GLIBC 2.39-0ubuntu8) 2.39"
+    if system != "Linux" or "musl" in libc.lower():
+        return None
+    match = re.search(r"(\d+\.\d+)\s*$", libc)
+    return match.group(1) if match else None
+
+
+class CargoCrates(FactBase):
+    """
+    Returns cargo-installed crates with versions, the host's target triple,
+    glibc version and cargo home.
+
+    Versions come from ``.crates2.json`` rather than ``cargo install --list``,
+    so no cargo process (or cargo at all) is needed. Crates installed from
+    the prebuilt artifact store are tracked in ``.dot-prebuilt.json`` next to it.
+
+    Example:
+        crates = host.get_fact(CargoCrates)
+        # Returns: {'home': '/home/me/.cargo', 'target': 'x86_64-unknown-linux-gnu',
+        #           'glibc': '2.39', 'installed': {'starship': '1.20.1'}, 'prebuilt': {...}}
+    """
+
+    command = (
+        'home="${CARGO_HOME:-$HOME/.cargo}"; '
+        'echo __home__; echo "$home"; '
+        "echo __uname__; uname -m; uname -s; (ldd --version 2>&1 || true) | head -n 1; "
+        'echo __crates2__; cat "$home/.crates2.json" 2>/dev/null; '
+        'echo __prebuilt__; cat "$home/.dot-prebuilt.json" 2>/dev/null; '
+        "true"
+    )
+
+    def process(self, output):
+        sections = {marker: [] for marker in MARKERS}
+        current = None
+        for line in output:
+            if line in sections:
+                current = line
+            elif current:
+                sections[current].append(line)
+
+        uname = sections["__uname__"] + ["", "", ""]
+        crates2 = parse_crates2("\n".join(sections["__crates2__"]))
+        prebuilt = json.loads("\n".join(sections["__prebuilt__"]) or "{}")
+
+        installed = {name: info["version"] for name, info in prebuilt.items()}
+        # cargo install writes over prebuilt binaries, so it wins
+        installed.update({name: info["version"] for name, info in crates2.items()})
+
+        return {
+            "home": sections["__home__"][0] if sections["__home__"] else None,
+            "target": target_triple(uname[0].strip(), uname[1].strip(), uname[2]),
+            "glibc": glibc_version(uname[1].strip(), uname[2]),
+            "installed": installed,
+            "prebuilt": {name: info for name, info in prebuilt.items() if name not in crates2},
+        }
@@ -0,0 +1,110 @@
+import json
+import shlex
+from io import StringIO
+
+from pyinfra import host
+from pyinfra.api import FileUploadCommand, QuoteString, StringCommand, operation
+
+from pyinfra_reconcile import plan
+
+from . import store
+from .facts import CargoCrates
+
+# Kept between runs and shared by every crate, so dependencies compiled for
+# one install are reused by the next; sccache is used on top when present
+BUILD_ENV = (
+    'export CARGO_TARGET_DIR="${XDG_CACHE_HOME:-$HOME/.cache}/dot/cargo-target"; '
+    "if command -v sccache >/dev/null 2>&1; then export RUSTC_WRAPPER=sccache; fi; "
+)
+
+
+@operation()
+def packages(packages=None, present=True, update=False):
+    """
+    Manage cargo-installed crates, preferring prebuilt binaries over compiling.
+
+    A crate missing on the host is first looked up in the local artifact
+    store (``store.lookup``, keyed by crate, version and the host's target
+    triple, skipping builds against a newer glibc than the host's); its
+    binaries are then uploaded into ``$CARGO_HOME/bin``. Only
+    crates without a matching artifact are built with ``cargo install``,
+    using a persistent shared target directory.
+
+    Args:
+        packages (list): Crates to install/remove, optionally pinned as ``crate@version``
+        present (bool): Whether crates should be installed (True) or removed (False)
+        update (bool): Whether to move floating crates to the newest version
+            (from the store if it has a newer one, else from crates.io)
+
+    Example:
+        cargo.packages(
+            name="Install cargo packages",
+            packages=['starship', 'tree-sitter-cli@0.25.3'],
+            present=True,
+        )
+    """
+
+    if packages is None:
+        packages = []
+
+    if isinstance(packages, str):
+        packages = [packages]
+
+    crates = host.get_fact(CargoCrates)
+    installed = [f"{name}@{version}" for name, version in crates["installed"].items()]
+    changes = plan.diff(
+        plan.Index(packages),
+        plan.Index(installed),
+        present=present,
+        update=update,
+    )
+
+    cargo_bin = f"{crates['home']}/bin"
+    prebuilt = dict(crates["prebuilt"])
+    prebuilt_changed = False
+
+    for entry in changes.install + changes.update:
+        found = store.lookup(entry.name, entry.version, crates["target"], crates["glibc"])
+        current_version = crates["installed"].get(entry.name)
+
+        # A pinned version is taken as stored; a floating update only moves
+        # forward, otherwise crates.io may have something newer than the store
+        if found and (
+            current_version is None
+            or (entry.version and found[0] != current_version)
+            or store._version_key(found[0]) > store._version_key(current_version)
+        ):
+            version, bins = found
+            yield StringCommand("mkdir", "-p", QuoteString(cargo_bin))
+            for bin_name, path in bins.items():
+                temp = host.get_temp_filename(f"cargo-{entry.name}-{version}-{bin_name}")
+                yield FileUploadCommand(path, temp)
+                yield StringCommand(
+                    "install", "-m", "755", QuoteString(temp), QuoteString(f"{cargo_bin}/{bin_name}")
+                )
+                yield StringCommand("rm", "-f", QuoteString(temp))
+            prebuilt[entry.name] = {
+                "version": version,
+                "bins": sorted(bins),
+                "target": crates["target"],
+            }
+            prebuilt_changed = True
+            continue
+
+        yield BUILD_ENV + "cargo install {0}".format(shlex.quote(entry.spec))
+        if prebuilt.pop(entry.name, None):
+            prebuilt_changed = True
+
+    for entry in changes.remove:
+        if entry.name in prebuilt:
+            for bin_name in prebuilt.pop(entry.name)["bins"]:
+                yield StringCommand("rm", "-f", QuoteString(f"{cargo_bin}/{bin_name}"))
+            prebuilt_changed = True
+        else:
+            yield "cargo uninstall {0}".format(shlex.quote(entry.name))
+
+    if prebuilt_changed:
+        yield FileUploadCommand(
+            StringIO(json.dumps(prebuilt, indent=2, sort_keys=True)),
+            f"{crates['home']}/.dot-prebuilt.json",
+        )
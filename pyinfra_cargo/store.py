@@ -0,0 +1,177 @@
+import json
+import os
+import platform
+import re
+import shutil
+import tempfile
+
+# Prebuilt binaries live at <root>/cargo/<crate>/<version>/<target>/<bin>, with
+# what they were built against (the glibc version of -gnu builds) recorded in
+# <root>/cargo/<crate>/<version>/<target>.json
+
+
+def artifact_dir():
+    return os.environ.get("DOTFILES_ARTIFACTS") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "dot",
+        "artifacts",
+    )
+
+
+def _crate_dir(crate, root=None):
+    return os.path.join(root or artifact_dir(), "cargo", crate)
+
+
+def _version_key(version):
+    # 0.10.0 after 0.9.1, and a pre-release before its release (1.0.0-rc.1
+    # before 1.0.0); pre-release identifiers compare as semver orders them
+    release, _, pre = version.partition("+")[0].partition("-")
+    identifiers = [
+        (0, int(part), "") if part.isdigit() else (1, 0, part) for part in pre.split(".") if pre
+    ]
+    return [int(part) for part in re.findall(r"\d+", release)], not pre, identifiers
+
+
+def _glibc_key(version):
+    return [int(part) for part in re.findall(r"\d+", version or "")]
+
+
+def _usable(crate_dir, version, target, glibc):
+    """
+    Whether the artifact's recorded glibc is no newer than the host's.
+
+    Artifacts stored without a record (``add`` without ``--glibc``) are not
+    checked, nor are hosts whose glibc version is unknown.
+    """
+
+    if not glibc:
+        return True
+    try:
+        with open(os.path.join(crate_dir, version, f"{target}.json")) as f:
+            built = json.load(f).get("glibc")
+    except FileNotFoundError:
+        return True
+    return not built or _glibc_key(built) <= _glibc_key(glibc)
+
+
+def lookup(crate, version, target, glibc=None, root=None):
+    """
+    Find prebuilt binaries of ``crate`` for ``target``.
+
+    The target triple only says "glibc", not which version: binaries built
+    on a newer distribution fail to load on an older one. Builds whose
+    recorded glibc is newer than the host's ``glibc`` are skipped.
+
+    Args:
+        crate (str): Crate name
+        version (str): Exact version, or None for the newest one stored
+        target (str): Rust target triple, e.g. ``x86_64-unknown-linux-gnu``
+        glibc (str): The host's glibc version, e.g. ``2.39``, or None if not known
+
+    Returns:
+        tuple: (version, {bin name: local path}) or None
+    """
+
+    crate_dir = _crate_dir(crate, root)
+    if version:
+        versions = [version]
+    else:
+        try:
+            versions = sorted(os.listdir(crate_dir), key=_version_key, reverse=True)
+        except FileNotFoundError:
+            return None
+
+    for candidate in versions:
+        target_dir = os.path.join(crate_dir, candidate, target)
+        try:
+            names = sorted(os.listdir(target_dir))
+        except FileNotFoundError:
+            continue
+        bins = {name: os.path.join(target_dir, name) for name in names}
+        if bins and _usable(crate_dir, candidate, target, glibc):
+            return candidate, bins
+
+    return None
+
+
+def put(crate, version, target, paths, glibc=None, root=None):
+    """
+    Store built binaries of ``crate`` ``version`` for ``target``.
+
+    The version directory is filled beside the store and renamed into place,
+    so a run reading it never sees half the binaries. ``glibc`` is the
+    version the binaries were linked against, recorded for ``lookup``.
+    """
+
+    target_dir = os.path.join(_crate_dir(crate, root), version, target)
+    os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+
+    # Written first: binaries are never visible without their record
+    with open(f"{target_dir}.json", "w") as f:
+        json.dump({"glibc": glibc}, f)
+
+    staging = tempfile.mkdtemp(dir=os.path.dirname(target_dir), prefix=".tmp-")
+    for path in paths:
+        shutil.copy2(path, os.path.join(staging, os.path.basename(path)))
+
+    if os.path.isdir(target_dir):
+        shutil.rmtree(target_dir)
+    os.rename(staging, target_dir)
+    return target_dir
+
+
+def parse_crates2(data):
+    """
+    Parse cargo's ``.crates2.json`` into ``{crate: {"version", "bins", "target"}}``.
+
+    Only registry installs are kept; git and path installs have no version
+    to key an artifact on.
+    """
+
+    crates = {}
+    for key, info in json.loads(data or "{}").get("installs", {}).items():
+        # "starship 1.20.1 (registry+https://github.com/rust-lang/crates.io-index)"
+        name, version, source = key.split(" ", 2)
+        if not source.startswith("(registry+") and not source.startswith("(sparse+"):
+            continue
+        crates[name] = {
+            "version": version,
+            "bins": info.get("bins", []),
+            "target": info.get("target"),
+        }
+    return crates
+
+
+def collect(cargo_home=None, root=None):
+    """
+    Copy the binaries of every crate installed on this machine into the store.
+
+    Returns:
+        list: (crate, version, target) tuples that were stored
+    """
+
+    cargo_home = cargo_home or os.environ.get("CARGO_HOME") or os.path.expanduser("~/.cargo")
+    try:
+        with open(os.path.join(cargo_home, ".crates2.json")) as f:
+            crates = parse_crates2(f.read())
+    except FileNotFoundError:
+        return []
+
+    libc, libc_version = platform.libc_ver()
+    glibc = libc_version if libc == "glibc" else None
+
+    stored = []
+    for name, info in sorted(crates.items()):
+        paths = [os.path.join(cargo_home, "bin", bin_name) for bin_name in info["bins"]]
+        if not info["target"] or not paths or not all(os.path.isfile(p) for p in paths):
+            continue
+        put(
+            name,
+            info["version"],
+            info["target"],
+            paths,
+            glibc=glibc if info["target"].endswith("-gnu") else None,
+            root=root,
+        )
+        stored.append((name, info["version"], info["target"]))
+    return stored
@@ -0,0 +1,22 @@
+"""
+direnv operations for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_direnv import operations as direnv
+
+    direnv.allow(
+        name="Allow direnv for orgs",
+        paths=[
+            f"{home}/repos/rfhold/.envrc",
+            f"{home}/repos/cfaintl/.envrc",
+        ],
+    )
+
+Allowed state is read straight from direnv's allow database for all paths
+in one command, so unchanged files cost no direnv process or database write.
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
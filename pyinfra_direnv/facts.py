@@ -0,0 +1,37 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+
+class DirenvAllowed(FactBase):
+    """
+    Returns whether each .envrc is allowed by direnv, from one read of its allow database.
+
+    direnv allows a file by creating ``allow/<sha256(abspath + "\\n" + content)>``
+    in its data directory, so an edited file shows up as ``pending``.
+
+    Example:
+        states = host.get_fact(DirenvAllowed, paths=["/home/me/repos/org/.envrc"])
+        # Returns: {'/home/me/repos/org/.envrc': 'allowed'}  # or 'pending', 'missing'
+    """
+
+    def command(self, paths):
+        checks = " ".join(shlex.quote(path) for path in paths)
+        return (
+            'allow="${XDG_DATA_HOME:-$HOME/.local/share}/direnv/allow"; '
+            "if command -v sha256sum >/dev/null 2>&1; then sum=sha256sum; "
+            'else sum="shasum -a 256"; fi; '
+            f"for path in {checks}; do "
+            'if [ ! -f "$path" ]; then echo "missing $path"; continue; fi; '
+            "hash=$({ printf '%s\\n' \"$path\"; cat \"$path\"; } | $sum | cut -d' ' -f1); "
+            'if [ -f "$allow/$hash" ]; then echo "allowed $path"; else echo "pending $path"; fi; '
+            "done"
+        )
+
+    def process(self, output):
+        states = {}
+        for line in output:
+            state, _, path = line.partition(" ")
+            if path:
+                states[path] = state
+        return states
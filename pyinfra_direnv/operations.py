@@ -0,0 +1,42 @@
+import shlex
+
+from pyinfra import host
+from pyinfra.api import operation
+
+from .facts import DirenvAllowed
+
+
+@operation()
+def allow(paths=None):
+    """
+    Run ``direnv allow`` for .envrc files whose current content isn't allowed yet.
+
+    Args:
+        paths (list): Absolute paths of .envrc files
+
+    Example:
+        direnv.allow(
+            name="Allow direnv for orgs",
+            paths=[f"{home}/repos/rfhold/.envrc"],
+        )
+    """
+
+    if paths is None:
+        paths = []
+
+    if isinstance(paths, str):
+        paths = [paths]
+
+    if not paths:
+        return
+
+    states = host.get_fact(DirenvAllowed, paths=paths)
+    # "missing" too: the file may be linked in by an earlier op of this run
+    pending = [path for path in paths if states.get(path) != "allowed"]
+
+    if not pending:
+        host.noop("{0} .envrc files already allowed".format(len(paths)))
+        return
+
+    for path in pending:
+        yield "direnv allow {0}".format(shlex.quote(path))
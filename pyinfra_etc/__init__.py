@@ -0,0 +1,32 @@
+"""
+Manifest-driven sync of repo-managed system configuration for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_etc import operations as etc
+
+    etc.sync(
+        name="Deploy system configuration",
+        src=f"{home}/dot/etc",
+        files=[
+            "nftables.conf",
+            "NetworkManager/conf.d/99-mac-randomization.conf",
+        ],
+        _sudo=True,
+    )
+
+    server.shell(
+        name="Reload NetworkManager configuration",
+        commands=["nmcli general reload conf"],
+        _if=etc.changed("/etc/NetworkManager/conf.d/99-mac-randomization.conf"),
+        _sudo=True,
+    )
+
+All destinations are checked with one checksum command, and only the files
+that differ are uploaded, in a single archive, instead of a checksum and
+upload per ``files.put``.
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
@@ -0,0 +1,42 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+STAT_MARKER = "__stat__"
+
+
+class FileChecksums(FactBase):
+    """
+    Returns sha256, mode, owner and group of several files in one command.
+
+    Files that don't exist are left out of the result.
+
+    Example:
+        files = host.get_fact(FileChecksums, paths=["/etc/nftables.conf"])
+        # Returns: {'/etc/nftables.conf': {'sha256': '...', 'mode': '644', 'user': 'root', 'group': 'root'}}
+    """
+
+    def command(self, paths):
+        quoted = " ".join(shlex.quote(path) for path in paths)
+        return (
+            f"sha256sum -- {quoted} 2>/dev/null; "
+            f"echo {STAT_MARKER}; "
+            f"stat -c '%a %U %G %n' -- {quoted} 2>/dev/null; "
+            "true"
+        )
+
+    def process(self, output):
+        files = {}
+        in_stat = False
+
+        for line in output:
+            if line == STAT_MARKER:
+                in_stat = True
+            elif in_stat:
+                mode, user, group, path = line.split(" ", 3)
+                files.setdefault(path, {}).update(mode=mode, user=user, group=group)
+            elif line:
+                sha256, path = line.split(None, 1)
+                files.setdefault(path, {})["sha256"] = sha256
+
+        return files
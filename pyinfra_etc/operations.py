@@ -0,0 +1,125 @@
+import hashlib
+import io
+import os
+import tarfile
+from collections import defaultdict
+
+from pyinfra import host
+from pyinfra.api import FileUploadCommand, QuoteString, StringCommand, operation
+
+from .facts import FileChecksums
+
+# host name -> destination paths written by sync during this run
+_written = defaultdict(set)
+
+
+def _entries(files):
+    # "nftables.conf" or ("sshd_config.d/x.conf", "ssh/sshd_config.d/x.conf")
+    for entry in files:
+        if isinstance(entry, tuple):
+            yield entry
+        else:
+            yield entry, entry
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _archive(changed, mode, user, group):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for src_path, dest_path in changed:
+            info = archive.gettarinfo(src_path, arcname=dest_path.lstrip("/"))
+            info.mode = int(mode, 8)
+            info.uid = info.gid = 0
+            info.uname = user
+            info.gname = group
+            with open(src_path, "rb") as f:
+                archive.addfile(info, f)
+    buffer.seek(0)
+    return buffer
+
+
+@operation()
+def sync(src, dest="/etc", files=None, mode="644", user="root", group="root"):
+    """
+    Mirror a declared set of files from a local tree into a remote one.
+
+    Every destination is checked with one checksum command. Files whose
+    content, mode or owner differ are uploaded together as a single archive
+    and unpacked in place. Use ``changed`` to trigger reloads for just the
+    files that were written.
+
+    Args:
+        src (str): Local directory the files are read from
+        dest (str): Remote directory they are written to
+        files (list): Paths relative to ``src``; a ``(src_path, dest_path)``
+            tuple when the file lives elsewhere under ``dest``
+        mode (str): Permissions for every file
+        user (str): Owner for every file
+        group (str): Group for every file
+
+    Example:
+        etc.sync(
+            name="Deploy system configuration",
+            src=f"{home}/dot/etc",
+            files=[
+                "nftables.conf",
+                "sysctl.d/99-hardening.conf",
+            ],
+            _sudo=True,
+        )
+    """
+
+    entries = [
+        (os.path.join(src, src_path), os.path.join(dest, dest_path))
+        for src_path, dest_path in _entries(files or [])
+    ]
+    if not entries:
+        return
+
+    remote = host.get_fact(FileChecksums, paths=[dest_path for _, dest_path in entries])
+
+    changed = []
+    for src_path, dest_path in entries:
+        current = remote.get(dest_path, {})
+        if (
+            current.get("sha256") != _sha256(src_path)
+            or current.get("mode") != mode.lstrip("0")
+            or current.get("user") != user
+            or current.get("group") != group
+        ):
+            changed.append((src_path, dest_path))
+
+    if not changed:
+        host.noop("{0} files in {1} are up to date".format(len(entries), dest))
+        return
+
+    if host.state.is_executing:
+        _written[host.name].update(dest_path for _, dest_path in changed)
+
+    temp = host.get_temp_filename(f"etc-sync-{dest}")
+    yield FileUploadCommand(_archive(changed, mode, user, group), temp)
+    # Relative to /, so the archive holds full destination paths; existing
+    # directories keep their permissions
+    yield StringCommand("tar", "-xzf", QuoteString(temp), "-C", "/", "--no-overwrite-dir")
+    yield StringCommand("rm", "-f", QuoteString(temp))
+
+
+def changed(*paths):
+    """
+    Return an ``_if`` callable that is true when ``sync`` wrote any of ``paths``.
+
+    Example:
+        server.shell(
+            name="Reload NetworkManager configuration",
+            commands=["nmcli general reload conf"],
+            _if=etc.changed("/etc/NetworkManager/conf.d/99-mac-randomization.conf"),
+            _sudo=True,
+        )
+    """
+
+    name = host.name
+    return lambda: any(path in _written[name] for path in paths)
@@ -0,0 +1,23 @@
+"""
+Export configure.py as plain shell scripts for container image builds.
+
+Usage from the repository root:
+
+    uv run python -m pyinfra_export --profile debian     # build/export/debian/NN-<section>.sh
+    uv run python -m pyinfra_export --profile arch --combined
+
+configure.py is evaluated with ``pyinfra --dry`` in a benchmark sandbox (see
+``pyinfra_bench.sandbox``) pinned to the profile: a fresh home holding only the
+checkout, container, no systemd. Nothing is executed; each operation the run
+would have performed is written out in order, one script per tag section, so
+a Dockerfile can ``RUN`` them one layer at a time without Python or pyinfra:
+
+    RUN /home/$USERNAME/dot/build/export/debian/01-core.sh
+    RUN /home/$USERNAME/dot/build/export/debian/02-packages.sh
+
+The tools bin/bootstrap.sh installs (rustup, uv, go, bun) are assumed present.
+"""
+
+from . import profiles, script
+
+__all__ = ["profiles", "script"]
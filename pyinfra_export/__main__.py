@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+
+from . import runner
+from .profiles import PROFILES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_export",
+        description="Write configure.py out as shell scripts for a container build",
+    )
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="debian")
+    parser.add_argument("--tags", help="Comma-separated sections to export (defaults to all)")
+    parser.add_argument("--output", help="Defaults to build/export/<profile>")
+    parser.add_argument(
+        "--arch",
+        default=runner.default_arch(),
+        help="Target architecture, as dpkg names it (defaults to this machine's)",
+    )
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Write one configure.sh instead of a script per section",
+    )
+    parser.add_argument(
+        "--pyinfra",
+        default=runner.default_pyinfra(),
+        help="Command used to start pyinfra",
+    )
+    args = parser.parse_args(argv)
+
+    output_dir = os.path.abspath(
+        args.output or os.path.join(runner.REPO, "build", "export", args.profile)
+    )
+    tags = [t.strip() for t in args.tags.split(",") if t.strip()] if args.tags else None
+
+    status = runner.run(
+        args.profile,
+        output_dir,
+        tags=tags,
+        combined=args.combined,
+        arch=args.arch,
+        pyinfra=args.pyinfra,
+    )
+    if status == 0:
+        print(f"--> Exported {args.profile} scripts to {output_dir}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
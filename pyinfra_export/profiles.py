@@ -0,0 +1,28 @@
+"""
+Target profiles for exported scripts.
+
+A profile pins what configure.py would otherwise detect on the host, for an
+image build where the answers are known up front: a fresh container of one
+distro, no systemd, the dotfiles checkout at ``<home>/dot``.
+"""
+
+PROFILES = {
+    "debian": {
+        "pkg_manager": "apt",
+        "home": "/home/rfhold",
+        # Stubbed so the exporting machine's own packages don't count as
+        # installed; dpkg still answers the architecture apt repos are for
+        "stubs": {
+            "apt-get": "",
+            "apt-cache": "",
+            "dpkg-query": "",
+            "dpkg": 'if [ "$1" = --print-architecture ]; then echo "$DOTFILES_EXPORT_ARCH"; fi',
+        },
+    },
+    "arch": {
+        "pkg_manager": "pacman",
+        "home": "/home/rfhold",
+        # pacman and paru already have benchmark stubs
+        "stubs": {},
+    },
+}
@@ -0,0 +1,105 @@
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from pyinfra_bench.sandbox import Sandbox
+from pyinfra_cache import store
+
+from .profiles import PROFILES
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# uname -m -> Debian architecture
+ARCHITECTURES = {"x86_64": "amd64", "aarch64": "arm64", "arm64": "arm64"}
+
+
+def default_arch():
+    return ARCHITECTURES.get(platform.machine(), "amd64")
+
+
+def default_pyinfra():
+    return f"{shlex.quote(sys.executable)} -m pyinfra"
+
+
+def add_stubs(sandbox, stubs):
+    for name, body in stubs.items():
+        path = os.path.join(sandbox.bin, name)
+        with open(path, "w") as f:
+            f.write(f"#!/bin/sh\n{body}\nexit 0\n")
+        os.chmod(path, 0o755)
+
+
+def export_env(sandbox, profile, output_dir, tags, combined, arch, sysroot):
+    env = sandbox.env(
+        DOTFILES_PKG_MANAGER=profile["pkg_manager"],
+        DOTFILES_CONTAINER="1",
+        DOTFILES_SYSTEMD="0",
+        # Image builds get the whole machine
+        DOTFILES_THROTTLE="0",
+        DOTFILES_EXPORT=output_dir,
+        DOTFILES_EXPORT_HOME=profile["home"],
+        DOTFILES_EXPORT_COMBINED="1" if combined else "0",
+        DOTFILES_EXPORT_ARCH=arch,
+        # /etc, /var, /proc... as on a fresh container, not this machine
+        DOTFILES_EXPORT_SYSROOT=sysroot,
+        DOTFILES_TAGS=",".join(tags or []),
+    )
+    # Real downloads (keys, archives) belong in the scripts, not the stub
+    # copies the benchmark seeds its cache with; the sandbox HOME would
+    # otherwise start every export with an empty cache
+    env["DOTFILES_CACHE_DIR"] = store.cache_dir()
+    env.pop("DOTFILES_CACHE_MAX_AGE")
+    if "DOTFILES_CACHE_MAX_AGE" in os.environ:
+        env["DOTFILES_CACHE_MAX_AGE"] = os.environ["DOTFILES_CACHE_MAX_AGE"]
+    return env
+
+
+def run(profile_name, output_dir, tags=None, combined=False, arch=None, pyinfra=None):
+    """
+    Export ``configure.py`` for a profile into ``output_dir``.
+
+    Args:
+        profile_name (str): Key of ``profiles.PROFILES``
+        output_dir (str): Replaced with the scripts, only if the run succeeds
+        tags (list): Sections to export, all when empty
+        combined (bool): One ``configure.sh`` instead of ``NN-<section>.sh``
+        arch (str): Target architecture as dpkg names it
+        pyinfra (str): Command used to start pyinfra
+
+    Returns:
+        int: pyinfra's exit status
+    """
+
+    profile = PROFILES[profile_name]
+    command = shlex.split(pyinfra or default_pyinfra()) + ["@local", "configure.py", "--dry"]
+
+    with tempfile.TemporaryDirectory(prefix="dot-export-") as root:
+        sandbox = Sandbox(root, REPO).create()
+        add_stubs(sandbox, profile["stubs"])
+        sysroot = os.path.join(root, "sysroot")
+        os.mkdir(sysroot)
+
+        # --dry evaluates everything and executes nothing; the scripts are
+        # written when pyinfra disconnects, which it also does after a failed
+        # evaluation, so they only replace the previous export on success
+        scripts = os.path.join(root, "scripts")
+        result = subprocess.run(
+            command,
+            cwd=sandbox.dot,
+            env=export_env(
+                sandbox, profile, scripts, tags, combined, arch or default_arch(), sysroot
+            ),
+            stdin=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            print(f"--> configure.py failed, {output_dir} left as it was", file=sys.stderr)
+            return result.returncode
+
+        shutil.rmtree(output_dir, ignore_errors=True)
+        shutil.copytree(scripts, output_dir)
+
+    return 0
@@ -0,0 +1,232 @@
+import base64
+import os
+import re
+import shlex
+import sys
+
+from pyinfra.api import FileDownloadCommand, FileUploadCommand, FunctionCommand, StringCommand
+from pyinfra.api.arguments import CONNECTOR_ARGUMENT_KEYS
+from pyinfra.connectors.util import make_unix_command_for_host
+from pyinfra.context import ctx_host, ctx_state
+
+from pyinfra_batch import local as batch_local
+from pyinfra_profile import profiler
+
+# Connector arguments that only make sense to pyinfra's own command runner
+RUNTIME_ARGUMENTS = ("_get_pty", "_timeout", "_stdin", "_success_exit_codes")
+
+HEADER = """\
+#!/bin/sh
+# Generated from configure.py by `python -m pyinfra_export` ({label}).
+# Regenerate rather than edit.
+set -eu
+"""
+
+# Locations whose facts must not come from the exporting machine: the
+# scripts are for a fresh container, whatever this machine has set up
+SYSTEM_PATHS = (
+    "/etc",
+    "/var",
+    "/run",
+    "/proc",
+    "/opt",
+    "/srv",
+    "/root",
+    "/usr/local",
+    "/.dockerenv",
+)
+SYSTEM_PATH_RE = re.compile(
+    r"(?<![\w.~/$-])({0})(?![\w.-])".format("|".join(re.escape(path) for path in SYSTEM_PATHS))
+)
+
+_export = None
+
+
+def _read(src):
+    if isinstance(src, str):
+        with open(src, "rb") as f:
+            return f.read()
+    data = src.getvalue() if hasattr(src, "getvalue") else src.read()
+    return data.encode() if isinstance(data, str) else data
+
+
+class Export:
+    """
+    Writes the operations of a ``--dry`` run as shell scripts, one per tag section.
+
+    Commands are rendered the way the local connector would run them (sudo,
+    env, chdir included) and uploads become base64 heredocs. Paths under the
+    evaluation HOME are rewritten to the profile's home.
+    """
+
+    def __init__(self, output_dir, home, target_home, combined=False):
+        self.output_dir = output_dir
+        self.home = home
+        self.target_home = target_home or home
+        self.combined = combined
+        self.skipped = []
+
+    def _retarget(self, text):
+        return text.replace(self.home, self.target_home)
+
+    def _unix(self, state, host, command, arguments):
+        arguments = {k: v for k, v in arguments.items() if k not in RUNTIME_ARGUMENTS}
+        return self._retarget(
+            make_unix_command_for_host(state, host, command, **arguments).get_raw_value()
+        )
+
+    def render_command(self, state, host, command, arguments, name):
+        arguments = {**arguments, **command.connector_arguments}
+
+        if isinstance(command, StringCommand):
+            line = self._unix(state, host, command, arguments)
+            codes = arguments.get("_success_exit_codes")
+            if codes and codes != [0]:
+                allowed = "|".join(str(code) for code in codes)
+                line = f"rc=0; {line} || rc=$?; case $rc in {allowed}) ;; *) exit $rc ;; esac"
+            return line
+
+        if isinstance(command, FileUploadCommand):
+            data = _read(command.src)
+            if self.home.encode() in data:
+                data = data.replace(self.home.encode(), self.target_home.encode())
+            write = StringCommand("base64 -d >", shlex.quote(command.dest))
+            body = base64.encodebytes(data).decode().rstrip("\n")
+            return f"{self._unix(state, host, write, arguments)} <<'__DOT_EOF__'\n{body}\n__DOT_EOF__"
+
+        if isinstance(command, FunctionCommand):
+            kind = "Python callback"
+        elif isinstance(command, FileDownloadCommand):
+            kind = "download"
+        else:
+            kind = type(command).__name__
+        self.skipped.append((name, kind))
+        return f"# Skipped {kind}, it has no shell equivalent: {command!r}"
+
+    def render(self, state, host):
+        """
+        Return ``[(section, [lines])]`` in operation order.
+        """
+
+        sections = profiler.start().for_host(host).op_sections
+        scripts = {}
+
+        for op_hash in state.get_op_order():
+            if op_hash not in state.ops[host]:
+                continue
+
+            op_meta = state.get_op_meta(op_hash)
+            op_data = state.get_op_data_for_host(host, op_hash)
+            global_arguments = op_data.global_arguments
+            name = self._retarget(", ".join(sorted(op_meta.names)) or op_hash)
+            arguments = {
+                key: global_arguments[key]
+                for key in CONNECTOR_ARGUMENT_KEYS
+                if key in global_arguments
+            }
+
+            # Not executing, so _if conditions are skipped: on a fresh image
+            # whatever they wait on has just changed
+            with ctx_host.use(host):
+                commands = [
+                    self.render_command(state, host, command, arguments, name)
+                    for command in op_data.command_generator()
+                ]
+            if not commands:
+                continue
+
+            if global_arguments.get("_ignore_errors") or global_arguments.get("_continue_on_error"):
+                commands = [
+                    f"{{ {command}\n}} || true" if "\n" in command else f"{command} || true"
+                    for command in commands
+                ]
+
+            lines = scripts.setdefault(sections.get(op_hash, profiler.SETUP_SECTION), [])
+            lines.append("")
+            lines.append(f"# {name}")
+            if global_arguments.get("_if"):
+                lines.append("# (conditional in configure.py, always run here)")
+            lines.extend(commands)
+
+        return list(scripts.items())
+
+    def write(self, state, host):
+        os.makedirs(self.output_dir, exist_ok=True)
+        sections = self.render(state, host)
+
+        if self.combined:
+            label = "sections " + ", ".join(section for section, _ in sections)
+            body = [line for section, lines in sections for line in [f"\n# === {section} ===", *lines]]
+            files = [("configure.sh", label, body)]
+        else:
+            files = [
+                (f"{i:02d}-{section}.sh", f"section {section}", lines)
+                for i, (section, lines) in enumerate(sections, start=1)
+            ]
+
+        for filename, label, lines in files:
+            path = os.path.join(self.output_dir, filename)
+            with open(path, "w") as f:
+                f.write(HEADER.format(label=label))
+                f.write("\n".join(lines) + "\n")
+            os.chmod(path, 0o755)
+
+        for name, kind in self.skipped:
+            print(f"--> Skipped a {kind} in {name}", file=sys.stderr)
+
+
+def pin_system_paths(host, sysroot):
+    """
+    Run every fact command of ``host`` with system paths moved under ``sysroot``.
+
+    Under ``--dry`` only facts reach the host, so this makes ``/etc``,
+    ``/var``, ``/proc`` and friends read as they are in ``sysroot`` (an
+    empty directory: a fresh container) instead of as on the exporting
+    machine.
+    """
+
+    batch_local.disable()
+    run_shell_command = host.connector.run_shell_command
+    # The evaluation HOME and sysroot itself may live under /var (macOS TMPDIR)
+    keep = (os.path.expanduser("~"), os.path.dirname(sysroot))
+
+    def move(match):
+        if any(match.string.startswith(path, match.start()) for path in keep):
+            return match.group(1)
+        return sysroot + match.group(1)
+
+    def pinned(command, *args, **kwargs):
+        raw = command.get_raw_value() if isinstance(command, StringCommand) else command
+        return run_shell_command(StringCommand(SYSTEM_PATH_RE.sub(move, raw)), *args, **kwargs)
+
+    host.connector.run_shell_command = pinned
+
+
+def start(output_dir, target_home=None, combined=False, sysroot=None):
+    """
+    Export this run's operations as shell scripts when the hosts disconnect.
+
+    Meant for ``pyinfra @local configure.py --dry`` in a sandbox prepared by
+    ``python -m pyinfra_export``: evaluation reads facts as usual, nothing is
+    executed, and the scripts replay what a real run would have done.
+
+    Args:
+        output_dir (str): Directory receiving ``NN-<section>.sh`` (or
+            ``configure.sh`` with ``combined``)
+        target_home (str): Home directory on the target, replacing this
+            run's HOME in commands and uploaded files
+        combined (bool): Write a single script instead of one per section
+        sysroot (str): Read system paths in facts from this directory
+            instead of ``/`` (see ``pin_system_paths``)
+    """
+
+    global _export
+
+    if _export is None:
+        _export = Export(output_dir, os.path.expanduser("~"), target_home, combined=combined)
+        if sysroot:
+            pin_system_paths(ctx_host.get(), sysroot)
+        # Op sections come from the profiler, which also disconnects us in order
+        profiler.add_listener(lambda host, report: _export.write(ctx_state.get(), host))
+
+    return _export
@@ -1,6 +1,8 @@
 from pyinfra import host
 from pyinfra.api import operation
 
+from pyinfra_reconcile import plan
+
 from .facts import FisherPlugins
 
 
@@ -31,46 +33,21 @@ def packages(packages=None, present=True):
     if isinstance(packages, str):
         packages = [packages]
     
-    # Get currently installed plugins
-    current_plugins = host.get_fact(FisherPlugins) or []
-    
-    # Normalize plugin names (case-insensitive comparison)
-    current_plugins_lower = [p.lower() for p in current_plugins]
-    
-    if present:
-        # Install missing plugins
-        to_install = []
-        for package in packages:
-            package_lower = package.lower()
-            # Check if package is already installed (with or without version tag)
-            package_base = package_lower.split('@')[0]
-            is_installed = any(
-                p.split('@')[0] == package_base 
-                for p in current_plugins_lower
-            )
-            if not is_installed:
-                to_install.append(package)
-        
-        if to_install:
-            # Install packages one by one for better error handling
-            for package in to_install:
-                yield f'fish -c "fisher install {package}" </dev/null'
-    else:
-        # Remove installed plugins
-        to_remove = []
-        for package in packages:
-            package_lower = package.lower()
-            package_base = package_lower.split('@')[0]
-            # Find exact match in current plugins
-            for current in current_plugins:
-                if current.lower().split('@')[0] == package_base:
-                    to_remove.append(current)
-                    break
-        
-        if to_remove:
-            # Remove packages
-            for package in to_remove:
-                yield f'fish -c "fisher remove {package}" </dev/null'
+    # Plugins match on owner/repo, case-insensitively and with or without a
+    # version tag; a different pinned tag is reinstalled at the new one
+    changes = plan.diff(
+        plan.Index(packages),
+        plan.Index(host.get_fact(FisherPlugins)),
+        present=present,
+    )
+
+    # Install packages one by one for better error handling
+    for entry in changes.install + changes.update:
+        yield f'fish -c "fisher install {entry.spec}" </dev/null'
+
+    # Removal uses the installed spelling, tag included
+    for entry in changes.remove:
+        yield f'fish -c "fisher remove {entry.spec}" </dev/null'
 
 
 @operation()
@@ -1,6 +1,8 @@
 from pyinfra import host
 from pyinfra.api import operation
 
+from pyinfra_reconcile import plan
+
 from .facts import GoInstalledPackages
 
 
@@ -40,23 +42,18 @@ def packages(packages=None, present=True, update=False):
     if isinstance(packages, str):
         packages = [packages]
 
-    # Get currently installed binaries
-    current_binaries = host.get_fact(GoInstalledPackages) or []
-    current_binaries_lower = [b.lower() for b in current_binaries]
-
-    if present:
-        for package in packages:
-            # Extract binary name from package path
-            # e.g., 'github.com/charmbracelet/gum@latest' -> 'gum'
-            binary_name = package.split('/')[-1].split('@')[0].lower()
-            
-            if update or binary_name not in current_binaries_lower:
-                yield f'go install {package}'
-    else:
-        for package in packages:
-            # Extract binary name for removal
-            binary_name = package.split('/')[-1].split('@')[0]
-            
-            if binary_name.lower() in current_binaries_lower:
-                # Remove binary from GOBIN/GOPATH
-                yield f'rm -f "${{GOBIN:-${{GOPATH:-$HOME/go}}/bin}}/{binary_name}"'
+    # Packages are matched on the binary they install, e.g.
+    # 'github.com/charmbracelet/gum@latest' -> 'gum'
+    changes = plan.diff(
+        plan.Index(packages, key=plan.go_binary),
+        plan.Index(host.get_fact(GoInstalledPackages)),
+        present=present,
+        update=update,
+    )
+
+    for entry in changes.install + changes.update:
+        yield f'go install {entry.spec}'
+
+    for entry in changes.remove:
+        # Remove binary from GOBIN/GOPATH
+        yield f'rm -f "${{GOBIN:-${{GOPATH:-$HOME/go}}/bin}}/{entry.name}"'
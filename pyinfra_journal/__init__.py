@@ -0,0 +1,25 @@
+"""
+Per-host journal of finished configure.py sections, for resuming failed runs.
+
+Example usage in configure.py:
+
+    from pyinfra_journal import journal
+    from sections import SECTIONS
+
+    journal.start(__file__, SECTIONS, resume=True)
+
+    def has_tag(tag):
+        return journal.should_run(tag)
+
+Every run records each section it ran as ok, failed or unfinished, with a
+fingerprint of the code and settings it depends on, in
+``~/.local/state/dot/journal/<host>.json``. With ``resume`` a section is
+skipped, facts and all, when it finished with the same fingerprint and so
+did the sections it requires.
+
+    uv run python -m pyinfra_journal [HOST...] [--forget]
+"""
+
+from . import fingerprint, journal
+
+__all__ = ["fingerprint", "journal"]
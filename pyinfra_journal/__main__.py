@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+from . import journal
+
+
+def _hosts():
+    try:
+        names = sorted(os.listdir(journal.journal_dir()))
+    except FileNotFoundError:
+        return []
+    return [name[: -len(".json")] for name in names if name.endswith(".json")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_journal",
+        description="Show which configure.py sections finished on each host",
+    )
+    parser.add_argument("hosts", nargs="*", help="Defaults to every journaled host")
+    parser.add_argument(
+        "--forget",
+        action="store_true",
+        help="Delete the journals, so the next --resume runs everything",
+    )
+    args = parser.parse_args(argv)
+
+    for host_name in args.hosts or _hosts():
+        if args.forget:
+            try:
+                os.unlink(journal._path(host_name))
+            except FileNotFoundError:
+                pass
+            continue
+
+        sections = journal.load(host_name)
+        print(host_name)
+        if not sections:
+            print("  (no sections recorded)")
+        width = max([len(tag) for tag in sections] + [0])
+        for tag, entry in sections.items():
+            finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["finished"]))
+            print(f"  {tag:<{width}}  {entry['status']:<10}  {finished}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import ast
+import hashlib
+import importlib.util
+import os
+from collections import defaultdict
+
+# Settings that change what a section does without touching its code
+ENV_INPUTS = (
+    "DOTFILES_UPGRADE",
+    "DOTFILES_PULL",
+    "DOTFILES_BUNDLE",
+    "DOTFILES_PKG_MANAGER",
+    "DOTFILES_CONTAINER",
+    "DOTFILES_SYSTEMD",
+)
+
+# Where configure.py expects the dotfiles checkout, relative to the home directory
+REPO_DIR = "dot"
+
+
+def _tag_calls(node):
+    """
+    Return the tags of every ``has_tag("...")`` call in ``node``.
+    """
+
+    tags = set()
+    for child in ast.walk(node):
+        if (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Name)
+            and child.func.id == "has_tag"
+            and child.args
+            and isinstance(child.args[0], ast.Constant)
+        ):
+            tags.add(child.args[0].value)
+    return tags
+
+
+def _bound_names(statement):
+    """
+    Return the module-level names a top-level statement binds, at any nesting
+    short of a function or class body.
+    """
+
+    names = set()
+    pending = [statement]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((a.asname or a.name).split(".")[0] for a in node.names)
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _used_names(node):
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+
+
+def _local_sources(statement, root):
+    """
+    Return the source files of modules imported by ``statement`` that live under ``root``.
+    """
+
+    if isinstance(statement, ast.Import):
+        modules = [a.name for a in statement.names]
+    elif isinstance(statement, ast.ImportFrom) and statement.module and not statement.level:
+        modules = [statement.module]
+    else:
+        return []
+
+    paths = []
+    for module in modules:
+        try:
+            spec = importlib.util.find_spec(module.split(".")[0])
+        except (ImportError, ValueError):
+            continue
+        if spec is None or not spec.origin or not spec.origin.startswith(root + os.sep):
+            continue
+        if spec.submodule_search_locations:
+            # A package: any of its modules may be what the section calls
+            for location in spec.submodule_search_locations:
+                for dirpath, dirnames, filenames in os.walk(location):
+                    dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+                    paths.extend(
+                        os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(".py")
+                    )
+        else:
+            paths.append(spec.origin)
+    return paths
+
+
+def _repo_paths(node):
+    """
+    Return the repo-relative paths that ``f"{...}/dot/..."`` strings in ``node``
+    name, such as ``src=`` arguments and ``link_config_dir`` sources.
+
+    A path continuing with another placeholder (``f"{home}/dot/home/repos/{org}"``)
+    stands for its literal directory, so every value it may take is covered.
+    """
+
+    paths = set()
+    for child in ast.walk(node):
+        if not isinstance(child, ast.JoinedStr) or len(child.values) < 2:
+            continue
+        first, second = child.values[:2]
+        if not (
+            isinstance(first, ast.FormattedValue)
+            and isinstance(second, ast.Constant)
+            and second.value.startswith(f"/{REPO_DIR}/")
+        ):
+            continue
+        relative = second.value[len(REPO_DIR) + 2 :]
+        if len(child.values) > 2:
+            relative = relative.rpartition("/")[0]
+        relative = relative.strip("/")
+        # The checkout itself (git.repo's dest) is not a deployed file
+        if relative:
+            paths.add(relative)
+    return paths
+
+
+def _hash_tree(digest, root, relative):
+    """
+    Mix the names, link targets and contents under ``root/relative`` into ``digest``.
+    """
+
+    top = os.path.join(root, relative)
+    if not os.path.lexists(top):
+        digest.update(f"missing:{relative}\0".encode())
+        return
+
+    entries = [top]
+    if os.path.isdir(top) and not os.path.islink(top):
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            entries.extend(os.path.join(dirpath, n) for n in sorted(dirnames + filenames))
+
+    for entry in entries:
+        digest.update(f"{os.path.relpath(entry, root)}\0".encode())
+        if os.path.islink(entry):
+            digest.update(os.readlink(entry).encode())
+        elif os.path.isfile(entry):
+            with open(entry, "rb") as f:
+                digest.update(f.read())
+
+
+def sections(path):
+    """
+    Return a fingerprint for every tag section of a deploy file.
+
+    A section's inputs are its ``if has_tag(...)`` blocks plus, transitively,
+    every module-level statement binding a name those blocks read: constants,
+    helper functions, other sections' variables and the source of imported
+    ``pyinfra_*`` packages in the same directory. Files of the dotfiles repo
+    those statements deploy or run (``f"{home}/dot/etc"``, the trees linked by
+    ``link_config_dir``, including ``.config/systemd/user``) are read from the
+    same directory as well. Editing one section, a package list or a config
+    file it deploys therefore changes its fingerprint and leaves the others
+    alone. ``ENV_INPUTS`` are mixed into every fingerprint.
+
+    Args:
+        path (str): Deploy file, normally configure.py
+
+    Returns:
+        dict: tag -> hex sha256
+    """
+
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    root = os.path.dirname(os.path.abspath(path))
+
+    blocks = defaultdict(list)
+    bindings = defaultdict(list)
+    for index, statement in enumerate(tree.body):
+        for name in _bound_names(statement):
+            bindings[name].append(index)
+        for node in ast.walk(statement):
+            if isinstance(node, ast.If):
+                for tag in _tag_calls(node.test):
+                    blocks[tag].append(node)
+
+    env = "\0".join(f"{key}={os.environ.get(key, '')}" for key in ENV_INPUTS)
+
+    fingerprints = {}
+    for tag, nodes in blocks.items():
+        digest = hashlib.sha256(env.encode())
+        repo_paths = set()
+        for node in nodes:
+            digest.update(ast.get_source_segment(source, node).encode())
+            repo_paths |= _repo_paths(node)
+
+        # Walk the statements the blocks depend on, breadth first
+        seen = set()
+        names = set().union(*(_used_names(node) for node in nodes))
+        while names:
+            name = names.pop()
+            for index in bindings.get(name, []):
+                if index in seen:
+                    continue
+                seen.add(index)
+                names |= _used_names(tree.body[index])
+
+        for index in sorted(seen):
+            statement = tree.body[index]
+            digest.update(ast.get_source_segment(source, statement).encode())
+            repo_paths |= _repo_paths(statement)
+            for source_path in _local_sources(statement, root):
+                with open(source_path, "rb") as f:
+                    digest.update(f.read())
+
+        for relative in sorted(repo_paths):
+            _hash_tree(digest, root, relative)
+
+        fingerprints[tag] = digest.hexdigest()
+
+    return fingerprints
@@ -0,0 +1,203 @@
+import fcntl
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from pyinfra.context import ctx_host
+
+from pyinfra_profile import profiler
+
+from . import fingerprint
+
+_journal = None
+
+
+def journal_dir():
+    state_home = os.environ.get("XDG_STATE_HOME", os.path.expanduser("~/.local/state"))
+    return os.path.join(state_home, "dot", "journal")
+
+
+def _path(host_name):
+    return os.path.join(journal_dir(), f"{host_name.replace('/', '_')}.json")
+
+
+def load(host_name):
+    """
+    Return the journal of ``host_name``: tag -> {"status", "fingerprint", "finished"}.
+    """
+
+    try:
+        with open(_path(host_name)) as f:
+            return json.load(f).get("sections", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@contextmanager
+def _locked(host_name):
+    # Sections run by pyinfra_runner are separate processes writing the same file
+    os.makedirs(journal_dir(), exist_ok=True)
+    with open(f"{_path(host_name)}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def record(host_name, entries):
+    """
+    Merge ``entries`` (tag -> entry) into the journal of ``host_name``.
+    """
+
+    with _locked(host_name):
+        sections = load(host_name)
+        sections.update(entries)
+
+        path = _path(host_name)
+        fd, tmp_path = tempfile.mkstemp(dir=journal_dir(), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"host": host_name, "sections": sections}, f, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _section_results(state, host, op_sections):
+    """
+    Return tag -> "ok" | "failed" | "unfinished" for the operations ``host`` ran.
+    """
+
+    results = {}
+    for op_hash, op_data in state.ops[host].items():
+        tag = op_sections.get(op_hash)
+        meta = op_data.operation_meta
+        if meta.is_complete() and meta.did_error():
+            results[tag] = "failed"
+        elif not meta.is_complete() and results.get(tag) != "failed":
+            results[tag] = "unfinished"
+        else:
+            results.setdefault(tag, "ok")
+    return results
+
+
+class Journal:
+    """
+    Records which tag sections finished on each host, and skips them on resume.
+
+    A section counts as finished when every operation it created succeeded
+    on the host. Sections without operations only count when nothing on the
+    host failed or was left unfinished, since pyinfra stops a host at its
+    first error.
+    """
+
+    def __init__(self, deploy_file, graph, resume):
+        self.graph = graph
+        self.resume = resume
+        self.fingerprints = fingerprint.sections(deploy_file)
+        # host name -> tags entered (run) and skipped in this process
+        self.entered = defaultdict(list)
+        self.skipped = defaultdict(list)
+        self.previous = {}
+        self.collector = profiler.start()
+        profiler.add_listener(self.host_done)
+
+    def _journal(self, host_name):
+        if host_name not in self.previous:
+            self.previous[host_name] = load(host_name)
+        return self.previous[host_name]
+
+    def finished(self, host_name, tag, _seen=None):
+        """
+        Whether ``tag`` finished on ``host_name`` with the inputs it has now,
+        after every section it requires did the same.
+        """
+
+        entry = self._journal(host_name).get(tag)
+        if (
+            not entry
+            or entry["status"] != "ok"
+            or entry["fingerprint"] != self.fingerprints.get(tag)
+        ):
+            return False
+
+        seen = _seen if _seen is not None else set()
+        seen.add(tag)
+        return all(
+            self.finished(host_name, dep, seen)
+            for dep in self.graph.get(tag, {}).get("requires", [])
+            if dep not in seen
+        )
+
+    def should_run(self, tag):
+        host_name = ctx_host.get().name
+        if self.resume and self.finished(host_name, tag):
+            if tag not in self.skipped[host_name]:
+                self.skipped[host_name].append(tag)
+                finished = time.strftime(
+                    "%Y-%m-%d %H:%M", time.localtime(self._journal(host_name)[tag]["finished"])
+                )
+                print(
+                    f"--> {host_name}: skipping {tag}, finished {finished} with the same inputs",
+                    file=sys.stderr,
+                )
+            return False
+
+        if tag not in self.entered[host_name]:
+            self.entered[host_name].append(tag)
+        return True
+
+    def host_done(self, host, report):
+        state = self.collector.state
+        # --dry evaluates without running anything
+        if not state.is_executing:
+            return
+
+        results = _section_results(state, host, self.collector.for_host(host).op_sections)
+        clean = all(status == "ok" for status in results.values())
+
+        now = time.time()
+        entries = {}
+        for tag in self.entered[host.name]:
+            status = results[tag] if tag in results else ("ok" if clean else "unfinished")
+            entries[tag] = {
+                "status": status,
+                "fingerprint": self.fingerprints.get(tag),
+                "finished": now,
+            }
+        if entries:
+            record(host.name, entries)
+
+
+def start(deploy_file, graph, resume=False):
+    """
+    Journal tag sections for this run. Safe to call once per host.
+
+    Args:
+        deploy_file (str): The deploy file, to fingerprint its sections
+        graph (dict): Section graph (``sections.SECTIONS``); a section is
+            only skipped if the sections it requires are skipped too
+        resume (bool): Skip sections that finished with unchanged inputs
+    """
+
+    global _journal
+
+    if _journal is None:
+        _journal = Journal(deploy_file, graph, resume)
+    return _journal
+
+
+def should_run(tag):
+    """
+    Whether a tag section should run; always True unless the journal was started.
+    """
+
+    if _journal is None:
+        return True
+    return _journal.should_run(tag)
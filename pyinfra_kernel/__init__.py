@@ -0,0 +1,28 @@
+"""
+Kernel module and sysctl operations for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_kernel import operations as kernel
+
+    kernel.modules(
+        name="Load rootless Docker kernel modules",
+        modules=["tun", "ip_tables", "iptable_nat", "iptable_filter"],
+        conf="/etc/modules-load.d/docker-rootless.conf",
+        _sudo=True,
+    )
+
+    kernel.sysctl(
+        name="Apply sysctl hardening settings",
+        src=f"{home}/dot/etc/sysctl.d/99-hardening.conf",
+        _sudo=True,
+    )
+
+Only modules that are neither loaded nor built into the running kernel are
+passed to modprobe, and only sysctl keys whose live value differs are
+written, so a run where everything is in place executes nothing.
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
@@ -0,0 +1,88 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+BUILTIN_MARKER = "__builtin__"
+MODULES_DIR_MARKER = "__modules_dir__"
+
+
+def module_name(name):
+    # The kernel treats dashes and underscores in module names as equal and
+    # reports the underscore form in /proc/modules
+    return name.strip().replace("-", "_")
+
+
+class KernelModules(FactBase):
+    """
+    Returns the loaded and built-in modules of the running kernel.
+
+    Reads /proc/modules and modules.builtin in one command. ``modules_dir`` is
+    False when /lib/modules has nothing for the running kernel, typically
+    after a kernel upgrade without a reboot, where modprobe can't load anything.
+
+    Example:
+        modules = host.get_fact(KernelModules)
+        # Returns: {'loaded': {'tun', ...}, 'builtin': {'ext4', ...}, 'modules_dir': True}
+    """
+
+    command = (
+        'cat /proc/modules 2>/dev/null; '
+        f'echo {BUILTIN_MARKER}; '
+        'dir="/lib/modules/$(uname -r)"; '
+        'cat "$dir/modules.builtin" 2>/dev/null; '
+        f'if [ -d "$dir" ]; then echo {MODULES_DIR_MARKER}; fi'
+    )
+
+    def process(self, output):
+        loaded = set()
+        builtin = set()
+        modules_dir = False
+        target = loaded
+
+        for line in output:
+            line = line.strip()
+            if not line:
+                continue
+            if line == BUILTIN_MARKER:
+                target = builtin
+            elif line == MODULES_DIR_MARKER:
+                modules_dir = True
+            elif target is loaded:
+                # "tun 61440 0 - Live 0x0000000000000000"
+                loaded.add(module_name(line.split()[0]))
+            else:
+                # "kernel/drivers/net/tun.ko"
+                builtin.add(module_name(line.rsplit("/", 1)[-1].split(".ko")[0]))
+
+        return {"loaded": loaded, "builtin": builtin, "modules_dir": modules_dir}
+
+
+def sysctl_value(value):
+    # Multi-field values ("4096 131072 6291456") come back tab-separated
+    return " ".join(str(value).split())
+
+
+class SysctlValues(FactBase):
+    """
+    Returns the live values of the given sysctl keys, read in one command.
+
+    Keys the running kernel doesn't have are left out of the result.
+
+    Example:
+        values = host.get_fact(SysctlValues, keys=["kernel.sysrq", "vm.mmap_min_addr"])
+        # Returns: {'kernel.sysrq': '0', 'vm.mmap_min_addr': '65536'}
+    """
+
+    def command(self, keys):
+        # -e: unknown keys are skipped rather than failing the whole read
+        return "sysctl -e {0} 2>/dev/null || true".format(
+            " ".join(shlex.quote(key) for key in keys)
+        )
+
+    def process(self, output):
+        values = {}
+        for line in output:
+            key, sep, value = line.partition("=")
+            if sep:
+                values[key.strip()] = sysctl_value(value)
+        return values
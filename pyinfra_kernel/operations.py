@@ -0,0 +1,126 @@
+import shlex
+from io import StringIO
+
+from pyinfra import host
+from pyinfra.api import operation
+from pyinfra.operations import files
+
+from .facts import KernelModules, SysctlValues, module_name, sysctl_value
+
+
+@operation()
+def modules(modules=None, conf=None):
+    """
+    Load kernel modules that aren't loaded yet, and optionally keep a modules-load.d file.
+
+    Args:
+        modules (list): Module names to have loaded
+        conf (str): modules-load.d file listing ``modules``, so they also load
+            at boot; written only when its content differs
+
+    Example:
+        kernel.modules(
+            name="Load rootless Docker kernel modules",
+            modules=["tun", "ip_tables", "iptable_nat", "iptable_filter"],
+            conf="/etc/modules-load.d/docker-rootless.conf",
+            _sudo=True,
+        )
+    """
+
+    if modules is None:
+        modules = []
+
+    if isinstance(modules, str):
+        modules = [modules]
+
+    if conf:
+        yield from files.put._inner(
+            src=StringIO("".join(f"{name}\n" for name in modules)),
+            dest=conf,
+            user="root",
+            group="root",
+            mode="644",
+        )
+
+    # World-readable, so checking never escalates even when the op runs with _sudo
+    state = host.get_fact(KernelModules, _sudo=False)
+    available = state["loaded"] | state["builtin"]
+    missing = [name for name in modules if module_name(name) not in available]
+
+    if not missing:
+        host.noop("kernel modules {0} are loaded".format(", ".join(modules)))
+        return
+
+    if not state["modules_dir"]:
+        # Nothing to load them from until the new kernel is booted; the
+        # modules-load.d file takes care of it then
+        host.noop(
+            "no modules for the running kernel, skipping {0}".format(", ".join(missing))
+        )
+        return
+
+    yield "modprobe -a {0}".format(" ".join(missing))
+
+
+def read_sysctl_conf(path):
+    """
+    Parse a sysctl.d file into a ``{key: value}`` dict, later lines winning.
+    """
+
+    values = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(("#", ";")):
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            # "-key = value" only means "ignore errors" to systemd-sysctl
+            key = key.strip().lstrip("-").replace("/", ".")
+            values[key] = sysctl_value(value)
+    return values
+
+
+@operation()
+def sysctl(values=None, src=None):
+    """
+    Set sysctl keys whose live value differs, leaving the rest untouched.
+
+    Unlike ``sysctl --system`` this doesn't re-apply every sysctl.d file, so
+    it's cheap enough to run every time and corrects drift after a reboot or
+    a manual change. Keys the running kernel doesn't know are skipped.
+
+    Args:
+        values (dict): key -> wanted value
+        src (str): Local sysctl.d-format file to read values from, merged
+            under ``values``
+
+    Example:
+        kernel.sysctl(
+            name="Apply sysctl hardening settings",
+            src="etc/sysctl.d/99-hardening.conf",
+            _sudo=True,
+        )
+    """
+
+    wanted = read_sysctl_conf(src) if src else {}
+    if values:
+        wanted.update({key: sysctl_value(value) for key, value in values.items()})
+
+    if not wanted:
+        return
+
+    # Read unprivileged like KernelModules; only "sysctl -w" needs the op's _sudo
+    live = host.get_fact(SysctlValues, keys=sorted(wanted), _sudo=False)
+    differing = [
+        f"{key}={value}"
+        for key, value in wanted.items()
+        if key in live and live[key] != value
+    ]
+
+    if not differing:
+        host.noop("sysctl values are current")
+        return
+
+    yield "sysctl -w {0}".format(" ".join(shlex.quote(item) for item in differing))
@@ -1,6 +1,8 @@
 from pyinfra import host
 from pyinfra.api import operation
 
+from pyinfra_reconcile import plan
+
 from .facts import ParuPackages
 
 
@@ -30,18 +32,14 @@ def packages(packages=None, present=True):
     if isinstance(packages, str):
         packages = [packages]
 
-    current_packages = host.get_fact(ParuPackages) or []
-    current_packages_lower = [p.lower() for p in current_packages]
-
-    if present:
-        to_install = [
-            pkg for pkg in packages if pkg.lower() not in current_packages_lower
-        ]
+    changes = plan.diff(
+        plan.Index(packages),
+        plan.Index(host.get_fact(ParuPackages)),
+        present=present,
+    )
 
-        for package in to_install:
-            yield f"paru -S --noconfirm --skipreview --needed {package}"
-    else:
-        to_remove = [pkg for pkg in packages if pkg.lower() in current_packages_lower]
+    for entry in changes.install:
+        yield f"paru -S --noconfirm --skipreview --needed {entry.spec}"
 
-        for package in to_remove:
-            yield f"paru -Rns --noconfirm {package}"
+    for entry in changes.remove:
+        yield f"paru -Rns --noconfirm {entry.name}"
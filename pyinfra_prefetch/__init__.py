@@ -0,0 +1,26 @@
+"""
+Download-only operations for warming caches ahead of an upgrade.
+
+Example usage in configure.py:
+
+    from pyinfra_prefetch import operations as prefetch
+
+    prefetch.pacman(
+        name="Download pacman updates",
+        packages=["neovim"],
+        dest=f"{home}/.cache/dot/prefetch/pacman",
+    )
+    prefetch.git(
+        name="Fetch managed repos",
+        repos=[f"{home}/repos/rfhold/walter"],
+    )
+
+Nothing is installed or checked out: packages, Go builds and bun tarballs
+land in caches the next ``update.sh --upgrade`` picks up. configure.py runs
+only these when DOTFILES_PREFETCH=1, which the dot-prefetch.timer user unit
+sets through ``update.sh --prefetch``.
+"""
+
+from . import operations
+
+__all__ = ['operations']
@@ -0,0 +1,109 @@
+import shlex
+
+from pyinfra.api import operation
+
+# Fetch in the background must fail rather than wait for a passphrase or a
+# smartcard PIN nobody is there to enter
+BATCH_SSH = "GIT_SSH_COMMAND='ssh -o BatchMode=yes'"
+
+
+@operation(is_idempotent=False)
+def pacman(packages=None, dest=None):
+    """
+    Download pending pacman upgrades, and any ``packages`` not installed, without installing.
+
+    Like ``checkupdates``, the sync databases are refreshed into a private
+    copy under ``fakeroot``, so neither root nor a partial upgrade of the
+    system databases is involved. Packages already in pacman's own cache are
+    not downloaded again; new ones go to ``dest`` until a normal run moves
+    them over (see ``pyinfra_bundle.operations.packages``).
+
+    Args:
+        packages (list): Packages the deploy installs
+        dest (str): Download directory, also holding the private databases
+
+    Example:
+        prefetch.pacman(
+            name="Download pacman updates",
+            packages=["neovim", "tmux"],
+            dest=f"{home}/.cache/dot/prefetch/pacman",
+        )
+    """
+
+    db = shlex.quote(f"{dest}/db")
+    cache = shlex.quote(dest)
+
+    yield f"mkdir -p {db} && ln -sfn /var/lib/pacman/local {db}/local"
+    yield f"fakeroot -- pacman -Sy --dbpath {db} --logfile /dev/null >/dev/null"
+    yield (
+        f"fakeroot -- pacman -Suw --needed --noconfirm --dbpath {db} --logfile /dev/null "
+        f"--cachedir {cache} --cachedir /var/cache/pacman/pkg "
+        + " ".join(shlex.quote(p) for p in packages or [])
+    )
+
+
+@operation(is_idempotent=False)
+def go(packages=None, scratch=None):
+    """
+    Fill the Go module and build caches for ``packages`` without installing them.
+
+    Each package is built into a throwaway GOBIN, so the next ``go install``
+    only links from the build cache. One that fails to build is reported
+    without stopping the rest.
+
+    Args:
+        packages (list): ``go install`` specs, e.g. ``github.com/x/y@latest``
+        scratch (str): Temporary GOBIN, removed afterwards
+    """
+
+    gobin = shlex.quote(scratch)
+    for spec in packages or []:
+        yield (
+            f"GOBIN={gobin} go install {shlex.quote(spec)} "
+            f"|| echo {shlex.quote(f'Could not build {spec}')} >&2"
+        )
+    yield f"rm -rf {gobin}"
+
+
+@operation(is_idempotent=False)
+def bun(packages=None, scratch=None):
+    """
+    Fill bun's package cache with ``packages`` without installing them globally.
+
+    Args:
+        packages (list): Package names as given to ``bun add -g``
+        scratch (str): Throwaway project directory the packages are added to
+    """
+
+    if not packages:
+        return
+
+    directory = shlex.quote(scratch)
+    yield (
+        f"rm -rf {directory} && mkdir -p {directory} && cd {directory} && "
+        f"bun add {' '.join(shlex.quote(p) for p in packages)}"
+    )
+    yield f"rm -rf {directory}"
+
+
+@operation(is_idempotent=False)
+def git(repos=None):
+    """
+    Fetch existing clones without touching their work trees.
+
+    Repositories that aren't cloned yet are skipped, and one that can't be
+    fetched (remote down, smartcard locked) is reported without stopping the
+    rest; ssh never prompts.
+
+    Args:
+        repos (list): Paths of git work trees
+    """
+
+    for repo in repos or []:
+        path = shlex.quote(repo)
+        yield (
+            f"if [ -d {path}/.git ]; then "
+            f"{BATCH_SSH} git -C {path} fetch --quiet "
+            f"|| echo {shlex.quote(f'Could not fetch {repo}')} >&2; "
+            "fi"
+        )
@@ -0,0 +1,32 @@
+"""
+Opt-in timing profiler for configure.py runs.
+
+Example usage in configure.py:
+
+    from pyinfra_profile import profiler
+
+    if os.environ.get("DOTFILES_PROFILE"):
+        profiler.start(os.environ["DOTFILES_PROFILE"], label="all")
+
+    profiler.section("core")  # called by has_tag() as each section starts
+
+Records wall time per operation, per fact (class plus arguments) and per tag
+section, counts commands and bytes moved, then writes profile-<label>.json,
+a folded-stack profile-<label>.folded (for flamegraph.pl/speedscope) and prints
+the top entries when pyinfra disconnects.
+
+telemetry builds on the same collection for unattended runs:
+
+    from pyinfra_profile import telemetry
+
+    telemetry.start("/var/lib/node_exporter/textfile", label="all")
+    telemetry.packages("pacman", ["fish", "tmux"])
+
+and writes run duration, per-section duration, operation results, fact,
+command and package counts as an OpenMetrics file for node_exporter's
+textfile collector.
+"""
+
+from . import profiler, telemetry
+
+__all__ = ["profiler", "telemetry"]
@@ -0,0 +1,406 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from pyinfra.api import BaseStateCallback
+from pyinfra.api.host import Host
+from pyinfra.context import ctx_host, ctx_state
+
+import pyinfra_batch.facts
+
+# Folded-stack frame for work done before the first tag section
+SETUP_SECTION = "setup"
+
+_profiler = None
+
+
+def _timing():
+    return {"time": 0.0, "count": 0}
+
+
+def _fact_label(cls, args, kwargs):
+    bits = [repr(a) for a in args] + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+    return f"{cls.name}({', '.join(bits)})"
+
+
+def _output_bytes(output):
+    return sum(len(line) + 1 for line in output.output_lines)
+
+
+class _HostProfile:
+    """
+    What one host's run collected: its sections, operations, facts and traffic.
+    """
+
+    def __init__(self):
+        self.current = SETUP_SECTION
+        self.section_started = time.perf_counter()
+
+        self.sections = defaultdict(lambda: {"eval": 0.0, "exec": 0.0})
+        self.operations = defaultdict(_timing)
+        self.facts = defaultdict(_timing)
+        self.op_sections = {}
+        self.stacks = defaultdict(float)
+
+        self.commands = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.prefetched_facts = 0
+
+
+class Profiler(BaseStateCallback):
+    """
+    Collects timings for one configure.py run and writes them out on disconnect.
+
+    With no ``output_dir`` nothing is written; the collected report is only
+    handed to listeners (see ``pyinfra_profile.telemetry``).
+
+    Everything is collected per host, and each host's report is written or
+    handed on when that host disconnects. Evaluation time (facts and
+    operation generation) is charged to the tag section that was active on
+    the host being evaluated, and execution time to the section that created
+    the operation.
+    """
+
+    def __init__(self, state, output_dir, label, top=15):
+        self.state = state
+        self.output_dir = output_dir
+        self.label = label
+        self.top = top
+
+        self.started = time.perf_counter()
+        self.evaluating = True
+        # pyinfra evaluates configure.py for every host at once, in greenlets;
+        # evaluation time goes to the host that last did something
+        self.evaluating_host = None
+
+        self.hosts = {}
+        self.op_started = {}
+
+        self.listeners = []
+
+    def for_host(self, host):
+        """
+        Return what has been collected for ``host`` so far.
+        """
+
+        if host not in self.hosts:
+            self.hosts[host] = _HostProfile()
+        return self.hosts[host]
+
+    # Sections
+    #
+
+    def _close_section(self, host):
+        profile = self.for_host(host)
+        now = time.perf_counter()
+        profile.sections[profile.current]["eval"] += now - profile.section_started
+        profile.section_started = now
+
+        # Operations created since the last switch belong to the closing section
+        for op_hash in self.state.ops.get(host, {}):
+            profile.op_sections.setdefault(op_hash, profile.current)
+
+    def evaluate(self, host):
+        """
+        Charge evaluation time from now on to ``host``.
+        """
+
+        if not self.evaluating or host is None or host is self.evaluating_host:
+            return
+        if self.evaluating_host is not None:
+            self._close_section(self.evaluating_host)
+        self.evaluating_host = host
+        self.for_host(host).section_started = time.perf_counter()
+
+    def section(self, tag):
+        host = ctx_host.get()
+        if not self.evaluating or host is None:
+            return
+        self.evaluate(host)
+        if tag == self.for_host(host).current:
+            return
+        self._close_section(host)
+        self.for_host(host).current = tag
+
+    def _op_name(self, op_hash):
+        return ", ".join(sorted(self.state.get_op_meta(op_hash).names)) or op_hash
+
+    def _frames_for(self, host):
+        """
+        Return ``(section, stack prefix)`` for work happening right now on ``host``.
+        """
+
+        profile = self.for_host(host)
+        op_hash = getattr(host, "executing_op_hash", None)
+        if op_hash:
+            section = profile.op_sections.get(op_hash, profile.current)
+            return section, f"{section};op;{self._op_name(op_hash).replace(';', ',')}"
+        return profile.current, f"{profile.current};eval"
+
+    # Recorders, called from the wrapped Host methods
+    #
+
+    def record_fact(self, host, label, cls_name, duration):
+        self.evaluate(host)
+        section, prefix = self._frames_for(host)
+        profile = self.for_host(host)
+        timing = profile.facts[(section, label, cls_name)]
+        timing["time"] += duration
+        timing["count"] += 1
+        profile.stacks[f"{prefix};fact;{cls_name}"] += duration
+
+    def record_prefetch(self, host, count):
+        self.for_host(host).prefetched_facts += count
+
+    def record_command(self, host, command, output, duration):
+        self.evaluate(host)
+        profile = self.for_host(host)
+        profile.commands += 1
+        profile.bytes_sent += len(str(command))
+        if output is not None:
+            profile.bytes_received += _output_bytes(output)
+
+    def record_upload(self, host, filename_or_io):
+        profile = self.for_host(host)
+        if isinstance(filename_or_io, str):
+            try:
+                profile.bytes_sent += os.path.getsize(filename_or_io)
+            except OSError:
+                pass
+        elif hasattr(filename_or_io, "getbuffer"):
+            profile.bytes_sent += filename_or_io.getbuffer().nbytes
+
+    # pyinfra state callbacks
+    #
+
+    def operation_host_start(self, state, host, op_hash):
+        if self.evaluating:
+            if self.evaluating_host is not None:
+                self._close_section(self.evaluating_host)
+            self.evaluating = False
+        self.op_started[(host, op_hash)] = time.perf_counter()
+
+    def _operation_done(self, host, op_hash):
+        started = self.op_started.pop((host, op_hash), None)
+        if started is None:
+            return
+
+        duration = time.perf_counter() - started
+        name = self._op_name(op_hash)
+        profile = self.for_host(host)
+        section = profile.op_sections.get(op_hash, profile.current)
+
+        timing = profile.operations[(section, name)]
+        timing["time"] += duration
+        timing["count"] += 1
+        profile.sections[section]["exec"] += duration
+        profile.stacks[f"{section};op;{name.replace(';', ',')}"] += duration
+
+    def operation_host_success(self, state, host, op_hash):
+        self._operation_done(host, op_hash)
+
+    def operation_host_error(self, state, host, op_hash):
+        self._operation_done(host, op_hash)
+
+    def host_disconnect(self, state, host):
+        if self.output_dir:
+            self.write(host)
+        if self.listeners:
+            data = self.report(host)
+            for listener in self.listeners:
+                listener(host, data)
+
+    # Reports
+    #
+
+    def report(self, host):
+        if self.evaluating and host is self.evaluating_host:
+            self._close_section(host)
+
+        profile = self.for_host(host)
+        operations = [
+            {"section": section, "name": name, **timing}
+            for (section, name), timing in profile.operations.items()
+        ]
+        facts = [
+            {"section": section, "fact": label, "class": cls_name, **timing}
+            for (section, label, cls_name), timing in profile.facts.items()
+        ]
+        fact_classes = defaultdict(_timing)
+        for fact in facts:
+            fact_classes[fact["class"]]["time"] += fact["time"]
+            fact_classes[fact["class"]]["count"] += fact["count"]
+
+        return {
+            "label": self.label,
+            "host": host.name,
+            "wall_time": time.perf_counter() - self.started,
+            "commands": profile.commands,
+            "bytes_sent": profile.bytes_sent,
+            "bytes_received": profile.bytes_received,
+            "prefetched_facts": profile.prefetched_facts,
+            "sections": {
+                tag: {**times, "total": times["eval"] + times["exec"]}
+                for tag, times in profile.sections.items()
+            },
+            "operations": sorted(operations, key=lambda o: -o["time"]),
+            "facts": sorted(facts, key=lambda f: -f["time"]),
+            "fact_classes": dict(sorted(fact_classes.items(), key=lambda i: -i[1]["time"])),
+        }
+
+    def _base_name(self, host):
+        # One host keeps the plain name; with several, each gets its own files
+        if len(self.state.inventory) == 1:
+            return f"profile-{self.label}"
+        return f"profile-{self.label}-{host.name.replace('/', '_')}"
+
+    def write(self, host):
+        data = self.report(host)
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self._base_name(host))
+
+        with open(f"{base}.json", "w") as f:
+            json.dump(data, f, indent=2)
+
+        # Brendan Gregg's folded format ("frame;frame <count>", in microseconds)
+        # wants self time, so take each stack's direct children off its total
+        stacks = dict(self.for_host(host).stacks)
+        for tag, times in data["sections"].items():
+            stacks[f"{tag};eval"] = times["eval"]
+        self_times = dict(stacks)
+        for stack, seconds in stacks.items():
+            parent = stack.rsplit(";fact;", 1)[0]
+            if parent != stack and parent in self_times:
+                self_times[parent] -= seconds
+
+        with open(f"{base}.folded", "w") as f:
+            for stack, seconds in sorted(self_times.items()):
+                if seconds > 0:
+                    f.write(f"{stack} {int(seconds * 1_000_000)}\n")
+
+        self.print_summary(data, base)
+
+    def print_summary(self, data, base):
+        def echo(line=""):
+            print(line, file=sys.stderr)
+
+        echo()
+        echo(
+            f"--> Profile {self.label} on {data['host']}: {data['wall_time']:.2f}s, "
+            f"{data['commands']} commands, "
+            f"{data['bytes_sent']} bytes sent, {data['bytes_received']} received",
+        )
+
+        echo("    Sections:")
+        sections = sorted(data["sections"].items(), key=lambda i: -i[1]["total"])
+        for tag, times in sections[: self.top]:
+            echo(f"      {times['total']:8.3f}s  {tag} (eval {times['eval']:.3f}s)")
+
+        echo("    Operations:")
+        for op in data["operations"][: self.top]:
+            echo(f"      {op['time']:8.3f}s  {op['name']} [{op['section']}]")
+
+        echo("    Facts:")
+        for name, timing in list(data["fact_classes"].items())[: self.top]:
+            echo(f"      {timing['time']:8.3f}s  {name} x{timing['count']}")
+
+        echo(f"    Written to {base}.{{json,folded}}")
+
+
+def _wrap_host_methods():
+    get_fact = Host.get_fact
+    run_shell_command = Host.run_shell_command
+    put_file = Host.put_file
+
+    def profiled_get_fact(self, name_or_cls, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return get_fact(self, name_or_cls, *args, **kwargs)
+        finally:
+            _profiler.record_fact(
+                self,
+                _fact_label(name_or_cls, args, kwargs),
+                name_or_cls.name,
+                time.perf_counter() - started,
+            )
+
+    def profiled_run_shell_command(self, command, *args, **kwargs):
+        started = time.perf_counter()
+        output = None
+        try:
+            status, output = run_shell_command(self, command, *args, **kwargs)
+            return status, output
+        finally:
+            _profiler.record_command(self, command, output, time.perf_counter() - started)
+
+    def profiled_put_file(self, filename_or_io, *args, **kwargs):
+        _profiler.record_upload(self, filename_or_io)
+        return put_file(self, filename_or_io, *args, **kwargs)
+
+    Host.get_fact = profiled_get_fact
+    Host.run_shell_command = profiled_run_shell_command
+    Host.put_file = profiled_put_file
+
+    prefetch = pyinfra_batch.facts.prefetch
+
+    def profiled_prefetch(facts):
+        facts = list(facts)
+        _profiler.record_prefetch(ctx_host.get(), len(facts))
+        started = time.perf_counter()
+        try:
+            return prefetch(facts)
+        finally:
+            _profiler.record_fact(
+                ctx_host.get(),
+                f"pyinfra_batch.prefetch({len(facts)} facts)",
+                "pyinfra_batch.prefetch",
+                time.perf_counter() - started,
+            )
+
+    pyinfra_batch.facts.prefetch = profiled_prefetch
+
+
+def start(output_dir=None, label="all", top=15):
+    """
+    Start profiling the current pyinfra run. Safe to call once per host.
+
+    Args:
+        output_dir (str): Directory for profile-<label>.{json,folded} (with
+            ``-<host>`` added when the inventory has several hosts); ``None``
+            only collects, for listeners such as the telemetry exporter
+        label (str): Name used in file names, normally the active tags
+        top (int): Number of entries per table in the printed summary
+    """
+
+    global _profiler
+
+    if _profiler is None:
+        _profiler = Profiler(ctx_state.get(), output_dir, label, top=top)
+        _profiler.state.add_callback_handler(_profiler)
+        _wrap_host_methods()
+    elif output_dir and not _profiler.output_dir:
+        _profiler.output_dir = output_dir
+        _profiler.top = top
+    _profiler.evaluate(ctx_host.get())
+
+    return _profiler
+
+
+def add_listener(listener):
+    """
+    Call ``listener(host, report)`` with the collected report on disconnect.
+    """
+
+    start().listeners.append(listener)
+
+
+def section(tag):
+    """
+    Mark the start of a tag section; a no-op unless profiling was started.
+    """
+
+    if _profiler is not None:
+        _profiler.section(tag)
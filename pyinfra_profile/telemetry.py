@@ -0,0 +1,217 @@
+import os
+import socket
+import tempfile
+import time
+from collections import defaultdict
+
+from pyinfra.connectors.local import LocalConnector
+from pyinfra.context import ctx_host
+
+from . import profiler
+
+PREFIX = "dotfiles"
+
+_telemetry = None
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return f"{value:.6f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+class Metrics:
+    """
+    Tiny OpenMetrics text writer; every metric here is a gauge.
+    """
+
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, help_text, value, unit=None, **labels):
+        family = self.families.setdefault(
+            name, {"help": help_text, "unit": unit, "samples": []}
+        )
+        family["samples"].append((labels, value))
+
+    def render(self):
+        lines = []
+        for name, family in self.families.items():
+            # OpenMetrics wants the unit repeated as a name suffix
+            full_name = f"{PREFIX}_{name}"
+            if family["unit"]:
+                full_name += f"_{family['unit']}"
+            lines.append(f"# TYPE {full_name} gauge")
+            if family["unit"]:
+                lines.append(f"# UNIT {full_name} {family['unit']}")
+            lines.append(f"# HELP {full_name} {family['help']}")
+            for labels, value in family["samples"]:
+                lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _operation_results(state, host):
+    results = defaultdict(int)
+    for op_data in state.ops[host].values():
+        meta = op_data.operation_meta
+        if not meta.is_complete():
+            results["skipped"] += 1
+        elif meta.did_error():
+            results["failed"] += 1
+        elif meta.did_change():
+            results["changed"] += 1
+        else:
+            results["unchanged"] += 1
+    return results
+
+
+class Telemetry:
+    """
+    Writes one ``<prefix>-<host>-<label>.prom`` per run into a textfile-collector directory.
+
+    Timings, fact and command counts come from the profiler's report for the
+    host; the file is renamed into place so node_exporter never reads half of it.
+    """
+
+    def __init__(self, output_dir, label):
+        self.output_dir = output_dir
+        self.label = label
+        # host name -> manager -> package names
+        self.packages = defaultdict(lambda: defaultdict(set))
+
+    def record_packages(self, host_name, manager, packages):
+        self.packages[host_name][manager].update(packages)
+
+    def _host_name(self, host):
+        # @local is the machine the collector runs on, name it like node_exporter would
+        if isinstance(host.connector, LocalConnector):
+            return socket.gethostname()
+        return host.name
+
+    def metrics(self, state, host, report):
+        metrics = Metrics()
+        base = {"host": self._host_name(host), "tags": self.label}
+
+        metrics.add(
+            "run_duration",
+            "Wall time of the last configure.py run.",
+            report["wall_time"],
+            unit="seconds",
+            **base,
+        )
+        metrics.add(
+            "run_timestamp",
+            "Unix time the last configure.py run finished.",
+            time.time(),
+            unit="seconds",
+            **base,
+        )
+
+        for tag, times in report["sections"].items():
+            metrics.add(
+                "section_duration",
+                "Evaluation plus execution time of each tag section.",
+                times["total"],
+                unit="seconds",
+                section=tag,
+                **base,
+            )
+
+        operations = _operation_results(state, host)
+        for result in ("changed", "unchanged", "failed", "skipped"):
+            metrics.add(
+                "operations",
+                "Operations in the last run by result.",
+                operations[result],
+                result=result,
+                **base,
+            )
+
+        direct_facts = sum(
+            timing["count"]
+            for name, timing in report["fact_classes"].items()
+            if name != "pyinfra_batch.prefetch"
+        )
+        metrics.add(
+            "facts",
+            "Facts requested directly or through pyinfra_batch prefetches.",
+            direct_facts + report["prefetched_facts"],
+            **base,
+        )
+        metrics.add(
+            "commands",
+            "Shell commands run on the host, fact batches included.",
+            report["commands"],
+            **base,
+        )
+
+        for manager, packages in sorted(self.packages.get(host.name, {}).items()):
+            metrics.add(
+                "packages",
+                "Packages declared for each package manager.",
+                len(packages),
+                manager=manager,
+                **base,
+            )
+
+        return metrics
+
+    def write(self, state, host, report):
+        metrics = self.metrics(state, host, report)
+        host_name = self._host_name(host).replace("/", "_")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{PREFIX}-{host_name}-{self.label}.prom")
+
+        # node_exporter only reads *.prom, so the temporary name is never collected
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=f".{PREFIX}-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(metrics.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def start(output_dir, label="all"):
+    """
+    Write run metrics to ``output_dir`` when pyinfra disconnects. Safe to call once.
+
+    Args:
+        output_dir (str): node_exporter textfile-collector directory
+        label (str): Name used for the file and the ``tags`` label
+    """
+
+    global _telemetry
+
+    if _telemetry is None:
+        _telemetry = Telemetry(output_dir, label)
+        collector = profiler.start(label=label)
+        profiler.add_listener(
+            lambda host, report: _telemetry.write(collector.state, host, report)
+        )
+
+    return _telemetry
+
+
+def packages(manager, names):
+    """
+    Count packages declared for ``manager`` on the current host; a no-op
+    unless telemetry was started.
+    """
+
+    if _telemetry is not None:
+        _telemetry.record_packages(ctx_host.get().name, manager, names)
@@ -0,0 +1,22 @@
+"""
+Shared install/remove/update planning for the pyinfra_* package operations.
+
+Example usage in an operation:
+
+    from pyinfra_reconcile import plan
+
+    wanted = plan.Index(packages)
+    installed = plan.Index(host.get_fact(FisherPlugins))
+    changes = plan.diff(wanted, installed, present=True)
+
+    for entry in changes.install:
+        yield f"fisher install {entry.spec}"
+
+Specs are normalised once into an index keyed on the lower-cased name
+(``owner/repo@v5`` -> ``owner/repo``, version ``v5``), so a diff is a single
+pass over each side rather than a membership scan per package.
+"""
+
+from . import plan
+
+__all__ = ["plan"]
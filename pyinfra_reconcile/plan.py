@@ -0,0 +1,122 @@
+from typing import Callable, NamedTuple, Optional
+
+# Version tags that float rather than pin, e.g. "go install x@latest"
+FLOATING_VERSIONS = {"", "latest"}
+
+
+class Entry(NamedTuple):
+    key: str  # normalised identity used for matching
+    name: str  # package name without the version tag
+    version: Optional[str]  # pinned version/tag, None when floating
+    spec: str  # the string as given, passed back to the package manager
+
+
+class Changes(NamedTuple):
+    install: list  # wanted entries missing on the host
+    update: list  # wanted entries present but to be reinstalled or re-pinned
+    remove: list  # installed entries to remove, in their installed spelling
+
+
+def split_version(spec):
+    """
+    Split ``name@version`` on the last ``@`` that isn't the leading scope marker.
+
+    ``@scope/pkg@1.2`` -> (``@scope/pkg``, ``1.2``), ``owner/repo`` -> (``owner/repo``, None)
+    """
+
+    at = spec.rfind("@")
+    if at <= 0:
+        return spec, None
+    name, version = spec[:at], spec[at + 1 :]
+    return name, None if version in FLOATING_VERSIONS else version
+
+
+def parse(spec, key=None):
+    """
+    Normalise one package spec into an ``Entry``.
+
+    Args:
+        spec (str): Package as written, e.g. ``realiserad/fish-ai@v1``
+        key (callable): Maps the bare name to the matching key; defaults to
+            lower-casing it (see ``go_binary`` for an alternative)
+    """
+
+    spec = spec.strip()
+    name, version = split_version(spec)
+    match_key = key(name) if key else name.lower()
+    return Entry(match_key, name, version, spec)
+
+
+def go_binary(module):
+    """
+    Key a Go module path on the binary ``go install`` produces.
+
+    ``github.com/x/tool/v2`` installs ``tool``, not ``v2``.
+    """
+
+    parts = module.rstrip("/").split("/")
+    last = parts[-1]
+    if len(parts) > 1 and last[:1] == "v" and last[1:].isdigit():
+        last = parts[-2]
+    return last.lower()
+
+
+class Index:
+    """
+    Specs normalised once and indexed by key, first spelling of a key wins.
+    """
+
+    def __init__(self, specs=None, key: Optional[Callable[[str], str]] = None):
+        if isinstance(specs, str):
+            specs = [specs]
+
+        self.entries = {}
+        for spec in specs or []:
+            if not spec or not spec.strip():
+                continue
+            entry = parse(spec, key)
+            self.entries.setdefault(entry.key, entry)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+
+def diff(wanted, installed, present=True, update=False):
+    """
+    Compute what to change so ``installed`` matches ``wanted``, in O(n + m).
+
+    Args:
+        wanted (Index): Packages the operation was given
+        installed (Index): Packages the host reports
+        present (bool): Whether wanted packages should be installed or removed
+        update (bool): Reinstall wanted packages that are already present
+
+    A present package whose pinned version differs from the installed one is
+    always updated; a floating or unknown version on either side matches.
+    """
+
+    changes = Changes([], [], [])
+
+    for entry in wanted:
+        current = installed.get(entry.key)
+
+        if not present:
+            if current is not None:
+                changes.remove.append(current)
+            continue
+
+        if current is None:
+            changes.install.append(entry)
+        elif update or (entry.version and current.version and entry.version != current.version):
+            changes.update.append(entry)
+
+    return changes
@@ -0,0 +1,18 @@
+"""
+Run configure.py as a graph of tag sections, or across hosts, instead of one
+long sequence.
+
+Example usage:
+
+    uv run python -m pyinfra_runner sections --jobs 4 @local
+    uv run python -m pyinfra_runner fleet --jobs 4 inventory.py
+
+Each section from sections.py runs as its own pyinfra process with
+DOTFILES_TAGS set to that section, once everything it requires has finished.
+In fleet mode each inventory host gets its own process (``--limit <host>``)
+and log, with a live status line per host.
+"""
+
+from . import fleet, scheduler
+
+__all__ = ["fleet", "scheduler"]
@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+
+from . import fleet, scheduler
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _split_tags(value):
+    return [t.strip() for t in value.split(",") if t.strip()]
+
+
+def sections_command(args):
+    from sections import LOCKS, SECTIONS
+
+    selected = scheduler.select(SECTIONS, _split_tags(args.tags))
+    command = scheduler.pyinfra_command(args.inventory, args.deploy, args.pyinfra_args)
+    log_dir = args.log_dir or scheduler.default_log_dir()
+
+    started = time.monotonic()
+    results = scheduler.run(
+        selected,
+        command,
+        jobs=args.jobs,
+        locks=LOCKS,
+        log_dir=log_dir,
+    )
+    scheduler.summary(results, time.monotonic() - started)
+
+    return 0 if all(r["status"] == "ok" for r in results.values()) else 1
+
+
+def fleet_command(args):
+    hosts = fleet.inventory_hosts(args.inventory)
+    if args.limit:
+        wanted = _split_tags(args.limit)
+        unknown = set(wanted) - set(hosts)
+        if unknown:
+            raise SystemExit(f"Unknown hosts: {', '.join(sorted(unknown))}")
+        hosts = [h for h in hosts if h in wanted]
+    if not hosts:
+        raise SystemExit(f"No hosts to run in {args.inventory}")
+
+    log_dir = args.log_dir or scheduler.default_log_dir()
+
+    def command_for(host):
+        # --limit keeps the inventory's host data and groups
+        return scheduler.pyinfra_command(
+            args.inventory, args.deploy, ["--limit", host, *args.pyinfra_args]
+        )
+
+    started = time.monotonic()
+    results = fleet.run(hosts, command_for, jobs=args.jobs, log_dir=log_dir)
+    scheduler.summary(results, time.monotonic() - started, label="host")
+
+    return 0 if all(r["status"] == "ok" for r in results.values()) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyinfra_runner")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sections = subparsers.add_parser(
+        "sections", help="Run configure.py tag sections concurrently"
+    )
+    sections.add_argument("inventory", help="pyinfra inventory, e.g. @local")
+    sections.add_argument("pyinfra_args", nargs=argparse.REMAINDER)
+    sections.add_argument("--deploy", default="configure.py")
+    sections.add_argument("--jobs", type=_positive_int, default=4)
+    sections.add_argument(
+        "--tags",
+        default=os.environ.get("DOTFILES_TAGS", ""),
+        help="Comma-separated sections to run (defaults to DOTFILES_TAGS)",
+    )
+    sections.add_argument("--log-dir", help="Defaults to ~/.local/state/dot/logs/<time>")
+    sections.set_defaults(func=sections_command)
+
+    hosts = subparsers.add_parser(
+        "fleet", help="Run configure.py against every inventory host concurrently"
+    )
+    hosts.add_argument("inventory", help="pyinfra inventory file, e.g. inventory.py")
+    hosts.add_argument("pyinfra_args", nargs=argparse.REMAINDER)
+    hosts.add_argument("--deploy", default="configure.py")
+    hosts.add_argument("--jobs", type=_positive_int, default=4, help="Hosts running at once")
+    hosts.add_argument("--limit", help="Comma-separated hosts to run")
+    hosts.add_argument("--log-dir", help="Defaults to ~/.local/state/dot/logs/<time>")
+    hosts.set_defaults(func=fleet_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import time
+
+# Lines pyinfra prints that the progress display picks up
+OPERATION_MARKER = "--> Starting operation: "
+
+
+def inventory_hosts(path):
+    """
+    Return host names from a pyinfra inventory file, in declaration order.
+
+    Every public list in the module is a group; entries are names or
+    ``(name, data)`` tuples, and hosts in several groups are listed once.
+    """
+
+    names = []
+    for attr, value in runpy.run_path(path).items():
+        if attr.startswith("_") or not isinstance(value, (list, tuple)):
+            continue
+        for entry in value:
+            name = entry[0] if isinstance(entry, tuple) else entry
+            if isinstance(name, str) and name not in names:
+                names.append(name)
+    return names
+
+
+class Progress:
+    """
+    One status line per host, redrawn in place on a terminal.
+
+    Off a terminal (cron, systemd) only hosts starting and finishing are printed.
+    """
+
+    def __init__(self, hosts, stream=sys.stdout):
+        self.hosts = hosts
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.width = max((len(h) for h in hosts), default=0)
+        self.lines = {host: "waiting" for host in hosts}
+        self.drawn = False
+
+    def update(self, host, line, notable=False):
+        if line == self.lines[host]:
+            return
+        self.lines[host] = line
+        if notable and not self.tty:
+            self.stream.write(f"--> {host}: {line}\n")
+            self.stream.flush()
+
+    def draw(self):
+        if not self.tty:
+            return
+        if self.drawn:
+            # Back to the first host line
+            self.stream.write(f"\x1b[{len(self.hosts)}F")
+        # A wrapped line would throw off the cursor movement above
+        columns = shutil.get_terminal_size().columns - 1
+        for host in self.hosts:
+            line = f"{host:<{self.width}}  {self.lines[host]}"
+            self.stream.write(f"\x1b[2K{line[:columns]}\n")
+        self.stream.flush()
+        self.drawn = True
+
+
+class _LogTail:
+    """
+    Follows a host's log for the name of the operation it is running.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = ""
+        self.operations = 0
+        self.current = None
+
+    def poll(self):
+        try:
+            with open(self.path, errors="replace") as f:
+                f.seek(self.offset)
+                data = f.read()
+                self.offset = f.tell()
+        except FileNotFoundError:
+            return
+
+        lines = (self.partial + data).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            if line.startswith(OPERATION_MARKER):
+                self.operations += 1
+                self.current = line[len(OPERATION_MARKER) :].strip()
+
+
+def run(hosts, command_for, jobs=4, log_dir=".", env=None, progress=None):
+    """
+    Run one pyinfra process per host, at most ``jobs`` at a time.
+
+    Args:
+        hosts (list): Host names, started in this order
+        command_for (callable): host -> command line for that host
+        jobs (int): Maximum number of hosts running at the same time
+        log_dir (str): Directory receiving one ``<host>.log`` per host
+        env (dict): Environment for the child processes
+        progress (Progress): Status display, updated while hosts run
+
+    Returns:
+        dict: host -> {"status": "ok" | "failed", "duration": seconds}
+    """
+
+    if env is None:
+        env = os.environ
+    if progress is None:
+        progress = Progress(hosts)
+
+    os.makedirs(log_dir, exist_ok=True)
+
+    pending = list(hosts)
+    running = {}
+    results = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            host = pending.pop(0)
+            log_path = os.path.join(log_dir, f"{host}.log")
+            log_file = open(log_path, "w")
+            process = subprocess.Popen(
+                command_for(host),
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env=env,
+            )
+            running[host] = (process, log_file, time.monotonic(), _LogTail(log_path))
+            progress.update(host, f"started (log: {log_path})", notable=True)
+
+        now = time.monotonic()
+        for host, (process, log_file, started, tail) in list(running.items()):
+            tail.poll()
+            if process.poll() is None:
+                current = tail.current or "connecting"
+                progress.update(
+                    host,
+                    f"running {now - started:6.1f}s  op {tail.operations}: {current}",
+                )
+                continue
+
+            log_file.close()
+            del running[host]
+
+            duration = now - started
+            status = "ok" if process.returncode == 0 else "failed"
+            results[host] = {"status": status, "duration": duration}
+            progress.update(
+                host,
+                f"{status} in {duration:.1f}s after {tail.operations} operations",
+                notable=True,
+            )
+
+        progress.draw()
+        if running:
+            time.sleep(0.2)
+
+    return {host: results[host] for host in hosts}
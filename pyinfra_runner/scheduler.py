@@ -0,0 +1,168 @@
+import os
+import subprocess
+import sys
+import time
+
+
+def _validate(sections, locks, jobs):
+    # Nothing could ever start, and the loop in run() would spin forever
+    if jobs < 1:
+        raise ValueError(f"jobs must be at least 1, got {jobs}")
+    for lock, capacity in locks.items():
+        if capacity < 1:
+            raise ValueError(f"Lock {lock} must allow at least 1 holder, got {capacity}")
+
+    for tag, section in sections.items():
+        for dep in section.get("requires", []):
+            if dep not in sections:
+                raise ValueError(f"Section {tag} requires unknown section {dep}")
+        for lock in section.get("locks", []):
+            if lock not in locks:
+                raise ValueError(f"Section {tag} uses unknown lock {lock}")
+
+    # Kahn's algorithm, only to reject cycles before anything is started
+    remaining = {tag: set(s.get("requires", [])) for tag, s in sections.items()}
+    while remaining:
+        ready = [tag for tag, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between sections: {sorted(remaining)}")
+        for tag in ready:
+            del remaining[tag]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def select(sections, tags=None):
+    """
+    Restrict a section graph to ``tags``, keeping declaration order.
+
+    Prerequisites outside the selection are dropped, so running a subset
+    behaves like ``DOTFILES_TAGS`` does for a sequential run.
+    """
+
+    if not tags:
+        return dict(sections)
+
+    unknown = set(tags) - set(sections)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+    return {
+        tag: {
+            **section,
+            "requires": [d for d in section.get("requires", []) if d in tags],
+        }
+        for tag, section in sections.items()
+        if tag in tags
+    }
+
+
+def run(sections, command, jobs=4, locks=None, log_dir=".", env=None, echo=print):
+    """
+    Run each section as its own pyinfra process, as many at once as the graph allows.
+
+    Args:
+        sections (dict): tag -> {"requires": [...], "locks": [...]}
+        command (list): pyinfra command line; DOTFILES_TAGS is set per section
+        jobs (int): Maximum number of sections running at the same time
+        locks (dict): lock name -> number of sections that may hold it at once
+        log_dir (str): Directory receiving one ``<tag>.log`` per section
+        env (dict): Base environment for the child processes
+
+    Returns:
+        dict: tag -> {"status": "ok" | "failed" | "skipped", "duration": seconds}
+    """
+
+    if locks is None:
+        locks = {}
+    if env is None:
+        env = os.environ
+
+    _validate(sections, locks, jobs)
+    os.makedirs(log_dir, exist_ok=True)
+
+    pending = list(sections)
+    running = {}
+    results = {}
+    held = {name: 0 for name in locks}
+
+    def can_start(tag):
+        section = sections[tag]
+        for dep in section.get("requires", []):
+            if results.get(dep, {}).get("status") != "ok":
+                return False
+        return all(held[lock] < locks[lock] for lock in section.get("locks", []))
+
+    while pending or running:
+        # Anything downstream of a failure can never run
+        for tag in list(pending):
+            deps = sections[tag].get("requires", [])
+            if any(results.get(d, {}).get("status") in ("failed", "skipped") for d in deps):
+                pending.remove(tag)
+                results[tag] = {"status": "skipped", "duration": 0.0}
+                echo(f"--> {tag}: skipped (prerequisite failed)")
+
+        for tag in list(pending):
+            if len(running) >= jobs:
+                break
+            if not can_start(tag):
+                continue
+
+            pending.remove(tag)
+            for lock in sections[tag].get("locks", []):
+                held[lock] += 1
+
+            log_path = os.path.join(log_dir, f"{tag}.log")
+            log_file = open(log_path, "w")
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env={**env, "DOTFILES_TAGS": tag},
+            )
+            running[tag] = (process, log_file, time.monotonic())
+            echo(f"--> {tag}: started (log: {log_path})")
+
+        for tag, (process, log_file, started) in list(running.items()):
+            if process.poll() is None:
+                continue
+
+            log_file.close()
+            del running[tag]
+            for lock in sections[tag].get("locks", []):
+                held[lock] -= 1
+
+            duration = time.monotonic() - started
+            status = "ok" if process.returncode == 0 else "failed"
+            results[tag] = {"status": status, "duration": duration}
+            echo(f"--> {tag}: {status} in {duration:.1f}s")
+
+        if running:
+            time.sleep(0.1)
+
+    return results
+
+
+def summary(results, wall_time, echo=print, label="section"):
+    width = max([len(tag) for tag in results] + [len(label)])
+    echo("")
+    echo(f"{label:<{width}}  {'status':<7}  time")
+    for tag, result in results.items():
+        echo(f"{tag:<{width}}  {result['status']:<7}  {result['duration']:.1f}s")
+
+    serial = sum(r["duration"] for r in results.values())
+    echo(f"\nWall time {wall_time:.1f}s ({label}s sum to {serial:.1f}s)")
+
+
+def default_log_dir():
+    state_home = os.environ.get("XDG_STATE_HOME", os.path.expanduser("~/.local/state"))
+    return os.path.join(state_home, "dot", "logs", time.strftime("%Y%m%d-%H%M%S"))
+
+
+def pyinfra_command(inventory, deploy="configure.py", args=()):
+    command = [sys.executable, "-m", "pyinfra", inventory, deploy, *args]
+    # Sections run unattended, so never stop on pyinfra's confirmation prompt
+    if "-y" not in args and "--yes" not in args:
+        command.append("-y")
+    return command
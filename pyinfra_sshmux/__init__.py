@@ -0,0 +1,24 @@
+"""
+pyinfra connector running commands over persistent, multiplexed OpenSSH
+master connections.
+
+Example usage in inventory.py:
+
+    from pyinfra_sshmux import connector as sshmux
+
+    sshmux.register(default=True)
+
+    hosts = ["thinkpad.holdenitdown.net"]
+
+The first run to reach a host starts an ``ssh`` master for it. Every later
+command, file transfer, section run by pyinfra_runner and the next
+``update.sh --remote`` open a channel on that master instead of connecting
+and authenticating again, until it has been idle for ``ssh_control_persist``
+(DOTFILES_SSH_PERSIST, default 10m).
+
+    uv run python -m pyinfra_sshmux [HOST...] [--stop]
+"""
+
+from . import connector
+
+__all__ = ["connector"]
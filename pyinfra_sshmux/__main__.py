@@ -0,0 +1,33 @@
+import argparse
+import sys
+
+from pyinfra_runner.fleet import inventory_hosts
+
+from . import connector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pyinfra_sshmux",
+        description="Show or close the persistent SSH masters of inventory hosts",
+    )
+    parser.add_argument("hosts", nargs="*", help="Defaults to the hosts of --inventory")
+    parser.add_argument("--inventory", default="inventory.py")
+    parser.add_argument("--stop", action="store_true", help="Close the masters")
+    args = parser.parse_args(argv)
+
+    data = connector.defaults()
+    for host_name in args.hosts or inventory_hosts(args.inventory):
+        hostname = host_name.removeprefix("@sshmux/")
+        if args.stop:
+            closed = connector.control(data, hostname, "exit")
+            print(f"{hostname}: {'closed' if closed else 'no master'}")
+        else:
+            up = connector.control(data, hostname, "check")
+            print(f"{hostname}: {'up' if up else 'no master'}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+import os
+import shlex
+import subprocess
+import time
+from importlib.metadata import EntryPoint
+from shutil import which
+from typing import TYPE_CHECKING, Tuple
+
+import click
+from typing_extensions import TypedDict, Unpack, override
+
+import pyinfra.api.connectors
+from pyinfra import logger
+from pyinfra.api.command import QuoteString, StringCommand
+from pyinfra.api.exceptions import ConnectError
+from pyinfra.api.util import get_file_io
+from pyinfra.connectors.base import BaseConnector, DataMeta
+from pyinfra.connectors.util import (
+    CommandOutput,
+    execute_command_with_sudo_retry,
+    make_unix_command_for_host,
+    run_local_process,
+)
+
+if TYPE_CHECKING:
+    from pyinfra.api.arguments import ConnectorArguments
+
+ENTRY_POINT = "pyinfra_sshmux.connector:SSHMuxConnector"
+
+
+def default_persist():
+    return os.environ.get("DOTFILES_SSH_PERSIST", "10m")
+
+
+def default_control_dir():
+    # Sockets live in the per-user runtime dir where there is one; the path
+    # has to stay short, ControlPath is a unix socket
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "dot-ssh")
+    return os.path.expanduser("~/.cache/dot/ssh")
+
+
+class ConnectorData(TypedDict):
+    ssh_hostname: str
+    ssh_port: int
+    ssh_user: str
+    ssh_key: str
+    ssh_config_file: str
+    ssh_known_hosts_file: str
+    ssh_strict_host_key_checking: str
+    ssh_forward_agent: bool
+    ssh_control_persist: str
+    ssh_control_dir: str
+
+
+connector_data_meta: dict[str, DataMeta] = {
+    "ssh_hostname": DataMeta("SSH hostname"),
+    "ssh_port": DataMeta("SSH port"),
+    "ssh_user": DataMeta("SSH user"),
+    "ssh_key": DataMeta("SSH key filename"),
+    "ssh_config_file": DataMeta("SSH config filename"),
+    "ssh_known_hosts_file": DataMeta("SSH known_hosts filename"),
+    "ssh_strict_host_key_checking": DataMeta("Override SSH StrictHostKeyChecking", "accept-new"),
+    "ssh_forward_agent": DataMeta("Whether to forward the local SSH agent"),
+    "ssh_control_persist": DataMeta(
+        "How long the master connection stays up once idle (ssh ControlPersist)",
+        default_persist,
+    ),
+    "ssh_control_dir": DataMeta("Directory for the master sockets", default_control_dir),
+}
+
+
+def _resolve(value):
+    return value() if callable(value) else value
+
+
+def defaults():
+    """
+    Connector data for a host without inventory data, as for a plain hostname.
+    """
+
+    return {key: meta.default for key, meta in connector_data_meta.items()}
+
+
+def ssh_args(data):
+    """
+    The ``ssh`` invocation for connector ``data``, up to but excluding the destination.
+    """
+
+    # %C hashes host, port and user, so masters for different users or ports
+    # of the same host don't collide
+    control_path = os.path.join(_resolve(data["ssh_control_dir"]), "%C")
+    args = [
+        "ssh",
+        "-o", "ControlMaster=auto",
+        "-o", "ControlPath={0}".format(control_path),
+        "-o", "ControlPersist={0}".format(_resolve(data["ssh_control_persist"])),
+        # A run must fail rather than wait for a password nobody is there to type
+        "-o", "BatchMode=yes",
+    ]  # fmt: skip
+
+    if data["ssh_strict_host_key_checking"]:
+        args += ["-o", "StrictHostKeyChecking={0}".format(data["ssh_strict_host_key_checking"])]
+    if data["ssh_known_hosts_file"]:
+        args += ["-o", "UserKnownHostsFile={0}".format(data["ssh_known_hosts_file"])]
+    if data["ssh_config_file"]:
+        args += ["-F", data["ssh_config_file"]]
+    if data["ssh_port"]:
+        args += ["-p", str(data["ssh_port"])]
+    if data["ssh_user"]:
+        args += ["-l", data["ssh_user"]]
+    if data["ssh_key"]:
+        args += ["-i", os.path.expanduser(data["ssh_key"])]
+    if data["ssh_forward_agent"]:
+        args.append("-A")
+    return args
+
+
+def _run(data, *args, **kwargs):
+    return subprocess.run(
+        ssh_args(data) + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+    )
+
+
+def control(data, hostname, action):
+    """
+    Send ``action`` ("check" or "exit") to the master for ``hostname``.
+
+    Returns:
+        bool: Whether a master answered
+    """
+
+    return _run(data, "-O", action, hostname, stdin=subprocess.DEVNULL).returncode == 0
+
+
+class SSHMuxConnector(BaseConnector):
+    """
+    Runs commands through the OpenSSH client over one persistent master
+    connection per host.
+
+    The first command of a run starts the master (``ControlMaster=auto``),
+    which outlives the run for ``ssh_control_persist`` once idle; the next
+    run, section or fact only opens a channel on it, with no TCP, key
+    exchange or authentication. Uses ``~/.ssh/config``, the agent and
+    smartcards exactly as ``ssh`` on the command line does.
+
+    Examples:
+
+    .. code::
+
+        pyinfra @sshmux/thinkpad.holdenitdown.net configure.py
+    """
+
+    handles_execution = True
+
+    data_cls = ConnectorData
+    data_meta = connector_data_meta
+    data: ConnectorData
+
+    @staticmethod
+    def make_names_data(name=None):
+        if not name:
+            raise ConnectError("@sshmux needs a hostname, e.g. @sshmux/myhost")
+
+        yield "@sshmux/{0}".format(name), {"ssh_hostname": name}, []
+
+    @property
+    def hostname(self):
+        return self.data["ssh_hostname"] or self.host.name
+
+    def ssh_args(self):
+        return ssh_args(self.data)
+
+    def _ssh(self, *args, **kwargs):
+        return _run(self.data, *args, **kwargs)
+
+    def check(self):
+        """
+        Whether a master for this host is already up.
+        """
+
+        return control(self.data, self.hostname, "check")
+
+    def stop(self):
+        """
+        Close the master for this host, if there is one.
+        """
+
+        return control(self.data, self.hostname, "exit")
+
+    @override
+    def connect(self) -> None:
+        os.makedirs(_resolve(self.data["ssh_control_dir"]), mode=0o700, exist_ok=True)
+
+        if self.check():
+            logger.debug("--> Reusing SSH master for %s", self.hostname)
+            return
+
+        started = time.monotonic()
+        # With ControlMaster=auto and ControlPersist, the first session forks
+        # off the master and leaves it running
+        result = self._ssh(self.hostname, "true", stdin=subprocess.DEVNULL)
+        if result.returncode != 0:
+            raise ConnectError(
+                result.stderr.decode(errors="replace").strip()
+                or "ssh exited with {0}".format(result.returncode)
+            )
+        logger.debug(
+            "--> Started SSH master for %s in %.2fs", self.hostname, time.monotonic() - started
+        )
+
+    @override
+    def disconnect(self) -> None:
+        # The master stays up for the next run; ControlPersist closes it once idle
+        pass
+
+    @override
+    def run_shell_command(
+        self,
+        command: StringCommand,
+        print_output: bool = False,
+        print_input: bool = False,
+        **arguments: Unpack["ConnectorArguments"],
+    ) -> Tuple[bool, CommandOutput]:
+        """
+        Execute a command on the remote host as a channel of the master connection.
+
+        Returns:
+            tuple: (bool, CommandOutput)
+            Bool indicating success and CommandOutput with stdout/stderr lines.
+        """
+
+        _get_pty = arguments.pop("_get_pty", False)
+        _timeout = arguments.pop("_timeout", None)
+        _stdin = arguments.pop("_stdin", None)
+        _success_exit_codes = arguments.pop("_success_exit_codes", None)
+
+        ssh_args = self.ssh_args()
+        if _get_pty:
+            ssh_args.append("-tt")
+        elif not _stdin:
+            ssh_args.append("-n")
+
+        def execute_command() -> Tuple[int, CommandOutput]:
+            unix_command = make_unix_command_for_host(self.state, self.host, command, **arguments)
+            actual_command = unix_command.get_raw_value()
+
+            logger.debug("--> Running command on %s: %s", self.hostname, unix_command)
+
+            if print_input:
+                click.echo("{0}>>> {1}".format(self.host.print_prefix, unix_command), err=True)
+
+            return run_local_process(
+                shlex.join(ssh_args + [self.hostname, actual_command]),
+                stdin=_stdin,
+                timeout=_timeout,
+                print_output=print_output,
+                print_prefix=self.host.print_prefix,
+            )
+
+        return_code, combined_output = execute_command_with_sudo_retry(
+            self.host,
+            arguments,
+            execute_command,
+        )
+
+        if _success_exit_codes:
+            status = return_code in _success_exit_codes
+        else:
+            status = return_code == 0
+
+        return status, combined_output
+
+    def _upload(self, filename_or_io, remote_filename):
+        with get_file_io(filename_or_io) as file_io:
+            data = file_io.read()
+        if isinstance(data, str):
+            data = data.encode()
+
+        result = self._ssh(
+            self.hostname, "cat > {0}".format(shlex.quote(remote_filename)), input=data
+        )
+        if result.returncode != 0:
+            raise IOError(result.stderr.decode(errors="replace"))
+
+    def _download(self, remote_filename, filename_or_io):
+        result = self._ssh(
+            self.hostname, "cat {0}".format(shlex.quote(remote_filename)), stdin=subprocess.DEVNULL
+        )
+        if result.returncode != 0:
+            raise IOError(result.stderr.decode(errors="replace"))
+
+        with get_file_io(filename_or_io, "wb") as file_io:
+            file_io.write(result.stdout)
+
+    def _remove(self, remote_filename):
+        self._ssh(
+            self.hostname, "rm -f {0}".format(shlex.quote(remote_filename)), stdin=subprocess.DEVNULL
+        )
+
+    @override
+    def put_file(
+        self,
+        filename_or_io,
+        remote_filename,
+        remote_temp_filename=None,
+        print_output: bool = False,
+        print_input: bool = False,
+        **arguments,
+    ) -> bool:
+        """
+        Upload a file by streaming it through ``cat``. With sudo/su/doas it goes
+        to a temporary file first and is copied into place with ``cp``.
+
+        Returns:
+            bool: Indicating success or failure
+        """
+
+        if not any(arguments.get(key) for key in ("_sudo", "_doas", "_su_user")):
+            self._upload(filename_or_io, remote_filename)
+        else:
+            temp_filename = remote_temp_filename or self.host.get_temp_filename(remote_filename)
+            self._upload(filename_or_io, temp_filename)
+            try:
+                status, output = self.run_shell_command(
+                    StringCommand("cp", temp_filename, QuoteString(remote_filename)),
+                    print_output=print_output,
+                    print_input=print_input,
+                    **arguments,
+                )
+                if not status:
+                    raise IOError(output.stderr)
+            finally:
+                self._remove(temp_filename)
+
+        if print_output:
+            click.echo(
+                "{0}file uploaded: {1}".format(self.host.print_prefix, remote_filename),
+                err=True,
+            )
+
+        return True
+
+    @override
+    def get_file(
+        self,
+        remote_filename,
+        filename_or_io,
+        remote_temp_filename=None,
+        print_output: bool = False,
+        print_input: bool = False,
+        **arguments,
+    ) -> bool:
+        """
+        Download a file through ``cat``. With sudo/su/doas it is first copied
+        to a readable temporary file.
+
+        Returns:
+            bool: Indicating success or failure
+        """
+
+        if not any(arguments.get(key) for key in ("_sudo", "_doas", "_su_user")):
+            self._download(remote_filename, filename_or_io)
+        else:
+            temp_filename = remote_temp_filename or self.host.get_temp_filename(remote_filename)
+            try:
+                status, output = self.run_shell_command(
+                    StringCommand(
+                        "cp", remote_filename, temp_filename, "&&", "chmod", "+r", temp_filename
+                    ),
+                    print_output=print_output,
+                    print_input=print_input,
+                    **arguments,
+                )
+                if not status:
+                    raise IOError(output.stderr)
+                self._download(temp_filename, filename_or_io)
+            finally:
+                self.run_shell_command(StringCommand("rm", "-f", temp_filename), **arguments)
+
+        if print_output:
+            click.echo(
+                "{0}file downloaded: {1}".format(self.host.print_prefix, remote_filename),
+                err=True,
+            )
+
+        return True
+
+    @override
+    def check_can_rsync(self) -> None:
+        if not which("rsync"):
+            raise NotImplementedError("The `rsync` binary is not available on this system.")
+
+    @override
+    def rsync(
+        self,
+        src,
+        dest,
+        flags,
+        print_output: bool = False,
+        print_input: bool = False,
+        **arguments,
+    ) -> bool:
+        # rsync rides the master connection too
+        command = [
+            "rsync",
+            *flags,
+            "-e", shlex.join(self.ssh_args()),
+            src,
+            "{0}:{1}".format(self.hostname, dest),
+        ]  # fmt: skip
+        if arguments.get("_sudo"):
+            command.insert(1, "--rsync-path=sudo rsync")
+
+        if print_input:
+            click.echo("{0}>>> {1}".format(self.host.print_prefix, shlex.join(command)), err=True)
+
+        return_code, output = run_local_process(
+            shlex.join(command),
+            print_output=print_output,
+            print_prefix=self.host.print_prefix,
+        )
+        if return_code != 0:
+            raise IOError(output.stderr)
+
+        return True
+
+
+def register(default=False):
+    """
+    Make ``@sshmux/<host>`` inventory names available to pyinfra, and with
+    ``default`` use the connector for plain hostnames too.
+
+    pyinfra finds connectors through the ``pyinfra.connectors`` entry point
+    group; this checkout isn't installed as a package, so the lookup is
+    extended at runtime instead. Call it from the inventory file, which
+    pyinfra loads before resolving any host's connector.
+
+    Args:
+        default (bool): Replace the ``ssh`` (paramiko) connector
+    """
+
+    connectors = pyinfra.api.connectors
+    lookup = getattr(connectors.entry_points, "__wrapped__", connectors.entry_points)
+
+    names = ["sshmux", "ssh"] if default else ["sshmux"]
+    extra = [
+        EntryPoint(name=name, value=ENTRY_POINT, group="pyinfra.connectors") for name in names
+    ]
+
+    def entry_points(**params):
+        found = lookup(**params)
+        if params.get("group") != "pyinfra.connectors":
+            return found
+        # Later entries win in get_all_connectors
+        return [*found, *extra]
+
+    entry_points.__wrapped__ = lookup
+    connectors.entry_points = entry_points
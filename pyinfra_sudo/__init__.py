@@ -0,0 +1,21 @@
+"""
+One privileged session per run for every ``_sudo`` operation.
+
+Usage (bin/update.sh --sudo-session does this):
+
+    eval "$(uv run python -m pyinfra_sudo start --parent $$)"
+    uv run pyinfra @local configure.py
+
+``start`` authenticates with sudo once and starts a root helper listening
+on a socket only the calling user can reach, serving only descendants of
+``--parent`` that present the random token ``start`` exports. It puts a ``sudo`` shim first
+in PATH, so every ``sudo -H -n sh -c ...`` pyinfra runs, and the sudo calls
+of paru and friends, are handed to the helper together with the caller's
+stdin/stdout/stderr. There is no further PAM round trip or sudo start-up
+per command. The helper exits, removing its socket and shim, with the
+shell that started it (or on ``python -m pyinfra_sudo stop``).
+"""
+
+from . import session
+
+__all__ = ["session"]
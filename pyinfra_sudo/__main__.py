@@ -0,0 +1,66 @@
+import argparse
+import os
+import shlex
+import sys
+
+from . import session
+
+
+def start_command(args):
+    pythonpath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = session.start(args.parent, pythonpath)
+    # For eval in the calling shell
+    for key, value in env.items():
+        print(f"export {key}={shlex.quote(value)}")
+    return 0
+
+
+def stop_command(args):
+    socket_path = args.socket or os.environ.get(session.SOCKET_ENV)
+    if socket_path:
+        session.stop(socket_path, os.environ.get(session.TOKEN_ENV, ""))
+    return 0
+
+
+def serve_command(args):
+    # Sent by `start` on stdin, so it never shows up in ps
+    token = sys.stdin.readline().strip()
+    if not token:
+        print("--> pyinfra_sudo serve: no session token on stdin", file=sys.stderr)
+        return 1
+    session.serve(args.socket, args.uid, token, parent=args.parent)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyinfra_sudo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    start = subparsers.add_parser(
+        "start",
+        help="Authenticate once and start the helper; prints exports for eval",
+    )
+    start.add_argument(
+        "--parent",
+        type=int,
+        required=True,
+        help="Stop the helper when this process exits, usually the calling shell's $$",
+    )
+    start.set_defaults(func=start_command)
+
+    stop = subparsers.add_parser("stop", help="Stop the helper")
+    stop.add_argument("--socket", help=f"Helper socket (default: ${session.SOCKET_ENV})")
+    stop.set_defaults(func=stop_command)
+
+    serve = subparsers.add_parser("serve", help="Run the helper (started by `start` as root)")
+    serve.add_argument("--socket", required=True)
+    serve.add_argument("--uid", type=int, required=True)
+    serve.add_argument("--parent", type=int)
+    serve.set_defaults(func=serve_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
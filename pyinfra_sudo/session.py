@@ -0,0 +1,283 @@
+import hmac
+import json
+import os
+import pwd
+import secrets
+import shlex
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SOCKET_ENV = "DOTFILES_SUDO_SOCKET"
+# Random per session, exported only to the run; every request must carry it
+TOKEN_ENV = "DOTFILES_SUDO_TOKEN"
+
+# What sudo's secure_path gives root commands on Arch
+SECURE_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+# Kept from the caller's environment when sudo would reset it
+KEEP_ENV = ("TERM", "LANG", "LANGUAGE", "LC_ALL", "COLORTERM", "DISPLAY")
+
+# Never passed to root commands, even with -E: sudo's default env_delete list
+ENV_DELETE = (
+    "IFS", "CDPATH", "LOCALDOMAIN", "RES_OPTIONS", "HOSTALIASES", "NLSPATH",
+    "PATH_LOCALE", "TERMINFO", "TERMINFO_DIRS", "TERMPATH", "TERMCAP", "ENV",
+    "BASH_ENV", "PS4", "GLOBIGNORE", "BASHOPTS", "SHELLOPTS", "JAVA_TOOL_OPTIONS",
+    "PERLIO_DEBUG", "PERLLIB", "PERL5LIB", "PERL5OPT", "PERL5DB", "FPATH",
+    "NULLCMD", "READNULLCMD", "ZDOTDIR", "TMPPREFIX", "PYTHONHOME", "PYTHONPATH",
+    "PYTHONINSPECT", "PYTHONUSERBASE", "RUBYLIB", "RUBYOPT", "KRB5_CONFIG",
+    "KRB5_KTNAME", "VAR_ACE", "USR_ACE", "DLC_ACE", "SSLEAY_CONF",
+    SOCKET_ENV, TOKEN_ENV,
+)  # fmt: skip
+ENV_DELETE_PREFIXES = ("LD_", "_RLD", "DYLD_")
+
+# Seconds the helper waits for its first connection before giving up
+START_TIMEOUT = 30
+
+SHIM = """#!/bin/sh
+PYTHONPATH={pythonpath}${{PYTHONPATH:+:$PYTHONPATH}} exec {python} -m pyinfra_sudo.shim "$@"
+"""
+
+
+def _peer_creds(conn):
+    """
+    Return (pid, uid, gid) of the process at the other end of ``conn``.
+    """
+
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)
+
+
+def _parent_pid(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name in parentheses may itself contain spaces or parentheses
+    return int(stat[stat.rindex(")") + 2 :].split()[1])
+
+
+def _descends_from(pid, ancestor):
+    while pid and pid > 1:
+        if pid == ancestor:
+            return True
+        pid = _parent_pid(pid)
+    return pid == ancestor
+
+
+def _recv_request(conn):
+    # One message: the JSON request plus the caller's stdin/stdout/stderr
+    data, fds, _, _ = socket.recv_fds(conn, 1 << 20, 3)
+    return json.loads(data), fds
+
+
+def _safe(key, value):
+    return (
+        key not in ENV_DELETE
+        and not key.startswith(ENV_DELETE_PREFIXES)
+        # Exported bash functions
+        and not value.startswith("()")
+    )
+
+
+def _environment(request, uid, gid):
+    if request["preserve_env"]:
+        env = {key: value for key, value in request["env"].items() if _safe(key, value)}
+    else:
+        env = {key: request["env"][key] for key in KEEP_ENV if key in request["env"]}
+        env["PATH"] = SECURE_PATH
+        env["SHELL"] = "/bin/sh"
+
+    env.update(
+        HOME="/root",
+        USER="root",
+        LOGNAME="root",
+        SUDO_USER=pwd.getpwuid(uid).pw_name,
+        SUDO_UID=str(uid),
+        SUDO_GID=str(gid),
+        SUDO_COMMAND=shlex.join(request["argv"]),
+    )
+    return env
+
+
+def _run(request, uid, gid, fds):
+    try:
+        process = subprocess.Popen(
+            request["argv"],
+            stdin=fds[0],
+            stdout=fds[1],
+            stderr=fds[2],
+            cwd=request["cwd"] if os.path.isdir(request["cwd"]) else "/",
+            env=_environment(request, uid, gid),
+        )
+    except OSError as e:
+        os.write(fds[2], f"sudo: {request['argv'][0]}: {e.strerror}\n".encode())
+        return 1
+
+    status = process.wait()
+    if status < 0:
+        # Killed by a signal: report it like a shell would
+        status = 128 - status
+    return status
+
+
+def _handle(conn, session, stopping):
+    with conn:
+        pid, uid, gid = _peer_creds(conn)
+        if uid != session["uid"]:
+            return
+        # Other processes of the same user, outside this run, get nothing
+        if session["parent"] is not None and not _descends_from(pid, session["parent"]):
+            return
+
+        request, fds = _recv_request(conn)
+        try:
+            if not hmac.compare_digest(str(request.get("token", "")), session["token"]):
+                os.write(fds[2], b"sudo: not part of this sudo session\n")
+                status = 1
+            elif request.get("stop"):
+                stopping.set()
+                return
+            else:
+                status = _run(request, uid, gid, fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+        conn.sendall(f"{status}\n".encode())
+
+
+def serve(socket_path, uid, token, parent=None):
+    """
+    Run commands as root for the unprivileged ``uid`` until ``parent`` exits.
+
+    Started once per run through sudo; every later ``sudo`` from the run's
+    processes is forwarded here by the shim instead of authenticating again.
+    Only requests carrying the session ``token`` are served, and only from
+    processes of ``uid`` descending from ``parent``; the socket lives in a
+    directory only that user can enter.
+    """
+
+    session = {"uid": uid, "token": token, "parent": parent}
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chown(socket_path, uid, -1)
+    os.chmod(socket_path, 0o600)
+    server.listen(16)
+    server.settimeout(1)
+    stopping = threading.Event()
+
+    try:
+        while not stopping.is_set() and (parent is None or _alive(parent)):
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            threading.Thread(target=_handle, args=(conn, session, stopping), daemon=True).start()
+    finally:
+        server.close()
+        # The socket and the shim next to it are useless without the helper
+        shutil.rmtree(os.path.dirname(socket_path), ignore_errors=True)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def start(parent, pythonpath):
+    """
+    Authenticate once, start the root helper and write the ``sudo`` shim.
+
+    Returns:
+        dict: environment to export for the run (PATH with the shim first,
+        the helper's socket and the session token)
+    """
+
+    sudo = shutil.which("sudo")
+    if sudo is None:
+        raise RuntimeError("sudo not found")
+
+    # The one interactive authentication of the run
+    subprocess.run([sudo, "-v"], check=True)
+
+    token = secrets.token_hex(32)
+    directory = tempfile.mkdtemp(prefix="dot-sudo-")
+    socket_path = os.path.join(directory, "socket")
+    bin_dir = os.path.join(directory, "bin")
+    os.mkdir(bin_dir)
+
+    shim_path = os.path.join(bin_dir, "sudo")
+    with open(shim_path, "w") as f:
+        f.write(
+            SHIM.format(
+                pythonpath=shlex.quote(pythonpath),
+                python=shlex.quote(sys.executable),
+            )
+        )
+    os.chmod(shim_path, 0o755)
+
+    helper = subprocess.Popen(
+        [
+            sudo,
+            "-n",
+            sys.executable,
+            "-m",
+            "pyinfra_sudo",
+            "serve",
+            "--socket",
+            socket_path,
+            "--uid",
+            str(os.getuid()),
+            "--parent",
+            str(parent),
+        ],
+        env={**os.environ, "PYTHONPATH": pythonpath},
+        # The token goes over stdin rather than argv, which anyone can read
+        stdin=subprocess.PIPE,
+        # Not the caller's stdout: start usually runs inside $(...), which
+        # would wait for the helper to exit
+        stdout=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    helper.stdin.write(f"{token}\n".encode())
+    helper.stdin.close()
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("sudo helper did not start")
+        time.sleep(0.05)
+
+    return {
+        "PATH": f"{bin_dir}:{os.environ.get('PATH', '')}",
+        SOCKET_ENV: socket_path,
+        TOKEN_ENV: token,
+    }
+
+
+def stop(socket_path, token):
+    """
+    Ask the helper behind ``socket_path`` to exit; it removes its directory.
+    """
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(socket_path)
+            with open(os.devnull, "rb+") as null:
+                socket.send_fds(conn, [json.dumps({"stop": True, "token": token}).encode()], [null.fileno()] * 3)
+    except OSError:
+        pass
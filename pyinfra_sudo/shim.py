@@ -0,0 +1,101 @@
+"""
+Stand-in for ``sudo`` while a session helper is running.
+
+Handles the forms pyinfra and the package managers use (``sudo [-H] [-n]
+[-E] [-u root] [--] command ...``) by handing the command and this
+process's stdin/stdout/stderr to the helper. Anything else, or no helper,
+runs the real sudo.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+
+from .session import SOCKET_ENV, TOKEN_ENV
+
+
+def _parse(args):
+    """
+    Return (preserve_env, argv) for forms the helper can run, else None.
+    """
+
+    preserve_env = False
+    while args:
+        arg = args[0]
+        if arg == "--":
+            args = args[1:]
+            break
+        if not arg.startswith("-") or arg == "-":
+            break
+        if arg in ("-H", "-n"):
+            pass
+        elif arg == "-E":
+            preserve_env = True
+        elif arg == "-u" and len(args) > 1 and args[1] in ("root", "#0"):
+            args = args[1:]
+        else:
+            return None
+        args = args[1:]
+
+    if not args:
+        return None
+    return preserve_env, args
+
+
+def _real_sudo():
+    shim_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    path = os.pathsep.join(
+        entry
+        for entry in os.environ.get("PATH", "").split(os.pathsep)
+        if os.path.abspath(entry or ".") != shim_dir
+    )
+    return shutil.which("sudo", path=path) or "/usr/bin/sudo"
+
+
+def main():
+    args = sys.argv[1:]
+    parsed = _parse(args)
+    socket_path = os.environ.get(SOCKET_ENV)
+
+    if parsed is None or not socket_path:
+        sudo = _real_sudo()
+        os.execv(sudo, [sudo, *args])
+
+    preserve_env, argv = parsed
+    request = {
+        "argv": argv,
+        "preserve_env": preserve_env,
+        "env": dict(os.environ),
+        "cwd": os.getcwd(),
+        "token": os.environ.get(TOKEN_ENV, ""),
+    }
+
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(socket_path)
+    except OSError:
+        # Helper gone (run ended, or it was stopped): behave like plain sudo
+        sudo = _real_sudo()
+        os.execv(sudo, [sudo, *args])
+
+    with conn:
+        try:
+            socket.send_fds(conn, [json.dumps(request).encode()], [0, 1, 2])
+        except OSError:
+            # Refused: this process isn't part of the helper's run
+            sudo = _real_sudo()
+            os.execv(sudo, [sudo, *args])
+        status = b""
+        while not status.endswith(b"\n"):
+            chunk = conn.recv(64)
+            if not chunk:
+                sys.exit(1)
+            status += chunk
+
+    sys.exit(int(status))
+
+
+if __name__ == "__main__":
+    main()
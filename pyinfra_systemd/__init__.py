@@ -0,0 +1,31 @@
+"""
+Batched systemd unit operations for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_systemd import operations as units
+
+    units.services(
+        name="Configure system services",
+        units={
+            "NetworkManager": {"running": True, "enabled": True},
+            "docker.socket": {"running": False, "enabled": False},
+            "nftables": {"enabled": True},
+        },
+        _sudo=True,
+    )
+
+The state of every unit comes from one ``systemctl show``, and changes are
+applied with one ``systemctl`` call per action and at most one daemon-reload,
+instead of a fact and a command per unit as with ``systemd.service``. Listing
+every managed unit up front makes that one query for the whole deploy:
+
+    units.prefetch(
+        system=["NetworkManager", "docker.socket", "nftables"],
+        user=["dot-prefetch.timer"],
+    )
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
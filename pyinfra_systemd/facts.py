@@ -0,0 +1,74 @@
+import shlex
+
+from pyinfra.api import FactBase
+
+PROPERTIES = ["Id", "LoadState", "ActiveState", "UnitFileState", "NeedDaemonReload"]
+
+UNIT_SUFFIXES = (
+    ".service",
+    ".socket",
+    ".device",
+    ".mount",
+    ".automount",
+    ".swap",
+    ".target",
+    ".path",
+    ".timer",
+    ".slice",
+    ".scope",
+)
+
+
+def unit_name(unit):
+    # Same defaulting as systemctl (and pyinfra's systemd.service)
+    return unit if unit.endswith(UNIT_SUFFIXES) else f"{unit}.service"
+
+
+class UnitStates(FactBase):
+    """
+    Returns the state of several systemd units from a single ``systemctl show``.
+
+    One dict per unit, in the order the units were given (so aliases like
+    ``sshd`` -> ``ssh.service`` still line up), with ``loaded``, ``running``,
+    ``enabled``, ``unit_file_state`` and ``need_daemon_reload``.
+
+    Example:
+        states = host.get_fact(UnitStates, units=["nftables", "sshd"])
+        # Returns: [{'id': 'nftables.service', 'running': False, 'enabled': True, ...}, ...]
+    """
+
+    def command(self, units, user_mode=False):
+        systemctl = "systemctl --user" if user_mode else "systemctl"
+        return "{0} show --property={1} -- {2}".format(
+            systemctl,
+            ",".join(PROPERTIES),
+            " ".join(shlex.quote(unit_name(unit)) for unit in units),
+        )
+
+    def process(self, output):
+        # Blocks come back in argument order, separated by blank lines
+        blocks = [{}]
+        for line in output:
+            if not line.strip():
+                if blocks[-1]:
+                    blocks.append({})
+                continue
+            key, _, value = line.partition("=")
+            blocks[-1][key] = value.strip()
+
+        states = []
+        for block in blocks:
+            if not block:
+                continue
+            unit_file_state = block.get("UnitFileState", "")
+            states.append(
+                {
+                    "id": block.get("Id"),
+                    "loaded": block.get("LoadState") == "loaded",
+                    "running": block.get("ActiveState") in ("active", "activating", "reloading"),
+                    "enabled": unit_file_state in ("enabled", "enabled-runtime"),
+                    "unit_file_state": unit_file_state,
+                    "need_daemon_reload": block.get("NeedDaemonReload") == "yes",
+                }
+            )
+        return states
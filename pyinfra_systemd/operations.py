@@ -0,0 +1,131 @@
+import shlex
+from collections import defaultdict
+
+from pyinfra import host
+from pyinfra.api import operation
+from pyinfra.context import ctx_host
+
+from pyinfra_batch import facts as batch
+
+from .facts import UnitStates, unit_name
+
+# Unit file states that `systemctl enable/disable` can't change
+UNMANAGED_FILE_STATES = ("static", "generated", "transient", "indirect", "alias")
+
+# host -> user_mode -> unit names queried by prefetch()
+_prefetched = defaultdict(dict)
+
+
+def prefetch(system=None, user=None):
+    """
+    Query every unit the deploy manages in one round trip, for ``services``.
+
+    Both scopes go into a single ``pyinfra_batch`` prefetch, one
+    ``systemctl show`` each. ``services`` calls whose units were all
+    prefetched for their scope read their state from there instead of
+    running their own query.
+
+    Args:
+        system (list): System units managed anywhere in the deploy
+        user (list): User units (``systemctl --user``) managed anywhere in the deploy
+
+    Example:
+        units.prefetch(
+            system=["NetworkManager", "nftables", "sshd"],
+            user=["dot-prefetch.timer"],
+        )
+    """
+
+    facts = []
+    for user_mode, names in ((False, system), (True, user)):
+        if names:
+            names = [unit_name(unit) for unit in names]
+            # Key on the real Host, the ``host`` import is a context proxy
+            _prefetched[ctx_host.get()][user_mode] = names
+            facts.append((UnitStates, {"units": names, "user_mode": user_mode}))
+    batch.prefetch(facts)
+
+
+def _unit_states(names, user_mode):
+    prefetched = _prefetched[ctx_host.get()].get(user_mode)
+    if prefetched and set(names) <= set(prefetched):
+        states = dict(zip(prefetched, batch.get(UnitStates, units=prefetched, user_mode=user_mode)))
+        return {name: states[name] for name in names}
+    return dict(zip(names, host.get_fact(UnitStates, units=names, user_mode=user_mode)))
+
+
+@operation()
+def services(units=None, user_mode=False, daemon_reload=False):
+    """
+    Manage several systemd units with one state query and batched systemctl calls.
+
+    Stops and disables are issued first, then enables and starts, each as a
+    single ``systemctl`` command covering every unit that needs it. Unit
+    states come from ``prefetch`` when it covered the units, otherwise from
+    a query of this call's own.
+
+    Args:
+        units (dict): unit -> {"running": bool, "enabled": bool}; either key
+            may be left out to leave that side alone
+        user_mode (bool): Manage the user's units (``systemctl --user``)
+        daemon_reload (bool): Reload unit files first, once, and only when
+            a unit reports changed or missing unit files
+
+    Example:
+        units.services(
+            name="Configure system services",
+            units={
+                "NetworkManager": {"running": True, "enabled": True},
+                "docker.socket": {"running": False, "enabled": False},
+            },
+            _sudo=True,
+        )
+    """
+
+    if not units:
+        return
+
+    systemctl = "systemctl --user" if user_mode else "systemctl"
+    names = [unit_name(unit) for unit in units]
+    wanted = dict(zip(names, units.values()))
+    states = _unit_states(names, user_mode)
+
+    reload = daemon_reload and any(
+        state["need_daemon_reload"] or not state["loaded"] for state in states.values()
+    )
+
+    actions = {"stop": [], "disable": [], "enable": [], "start": []}
+    for name, want in wanted.items():
+        state = states.get(name)
+        if state is None or not state["loaded"]:
+            # Unknown until the unit exists; only ask for it to come up
+            if want.get("enabled") is True:
+                actions["enable"].append(name)
+            if want.get("running") is True:
+                actions["start"].append(name)
+            continue
+
+        if want.get("running") is False and state["running"]:
+            actions["stop"].append(name)
+        elif want.get("running") is True and not state["running"]:
+            actions["start"].append(name)
+
+        if state["unit_file_state"] in UNMANAGED_FILE_STATES:
+            continue
+        if want.get("enabled") is False and state["enabled"]:
+            actions["disable"].append(name)
+        elif want.get("enabled") is True and not state["enabled"]:
+            actions["enable"].append(name)
+
+    if not reload and not any(actions.values()):
+        host.noop("units {0} are in the wanted state".format(", ".join(names)))
+        return
+
+    if reload:
+        yield f"{systemctl} daemon-reload"
+
+    for action in ("stop", "disable", "enable", "start"):
+        if actions[action]:
+            yield "{0} {1} {2}".format(
+                systemctl, action, " ".join(shlex.quote(name) for name in actions[action])
+            )
@@ -0,0 +1,29 @@
+"""
+CPU, IO and memory throttling for heavy pyinfra operations.
+
+Example usage in configure.py:
+
+    from pyinfra_throttle import policy as throttle
+
+    heavy = throttle.heavy(scope=has_systemd())
+
+    cargo.packages(
+        name="Install cargo packages",
+        packages=['starship'],
+        **heavy,
+    )
+
+Commands run under ``nice``/``ionice`` (``taskpolicy -b`` on macOS) and,
+where a systemd user manager is running, in a transient user scope:
+
+    DOTFILES_THROTTLE=0           run at normal priority
+    DOTFILES_THROTTLE_NICE=10     CPU niceness
+    DOTFILES_THROTTLE_IO=7        best-effort IO priority (0-7)
+    DOTFILES_THROTTLE_CPU=200%    scope CPUQuota
+    DOTFILES_THROTTLE_MEMORY=6G   scope MemoryHigh
+    DOTFILES_THROTTLE_JOBS=4      CARGO_BUILD_JOBS / MAKEFLAGS / GOFLAGS -p
+"""
+
+from . import facts, policy
+
+__all__ = ['facts', 'policy']
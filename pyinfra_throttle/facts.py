@@ -0,0 +1,31 @@
+from pyinfra.api import FactBase
+
+TOOLS = ("nice", "ionice", "taskpolicy", "systemd-run")
+
+
+class ThrottleSupport(FactBase):
+    """
+    Returns which of the tools used to deprioritise heavy commands the host has.
+
+    ``user-manager`` is included when a systemd user instance answers on the
+    session bus, which ``systemd-run --user --scope`` needs (over SSH it only
+    exists while the user is logged in or lingering).
+
+    Example:
+        support = host.get_fact(ThrottleSupport)
+        # Returns: {'nice', 'ionice', 'systemd-run', 'user-manager'}
+    """
+
+    command = (
+        f"for tool in {' '.join(TOOLS)}; do "
+        'command -v "$tool" >/dev/null 2>&1 && echo "$tool"; '
+        "done; "
+        "systemctl --user show-environment >/dev/null 2>&1 && echo user-manager; "
+        "true"
+    )
+
+    def default(self):
+        return set()
+
+    def process(self, output):
+        return {line.strip() for line in output if line.strip()}
@@ -0,0 +1,111 @@
+import os
+
+from pyinfra_batch import facts as batch
+
+from .facts import ThrottleSupport
+
+DEFAULT_NICE = 10
+# Lowest best-effort priority; the idle class can stall a build for as long
+# as anything else touches the disk
+DEFAULT_IO_PRIORITY = 7
+# Against the default weight of 100 the desktop session's units have
+CPU_WEIGHT = 20
+
+
+def settings():
+    """
+    Return the throttling policy configured through DOTFILES_THROTTLE_* variables.
+    """
+
+    env = os.environ
+    return {
+        "enabled": env.get("DOTFILES_THROTTLE", "1") == "1",
+        "nice": int(env.get("DOTFILES_THROTTLE_NICE", DEFAULT_NICE)),
+        "io_priority": int(env.get("DOTFILES_THROTTLE_IO", DEFAULT_IO_PRIORITY)),
+        # systemd CPUQuota=, e.g. "200%" for two cores
+        "cpu_quota": env.get("DOTFILES_THROTTLE_CPU", ""),
+        # systemd MemoryHigh=, e.g. "6G": reclaimed and slowed down above
+        # it rather than OOM-killed like MemoryMax=
+        "memory_high": env.get("DOTFILES_THROTTLE_MEMORY", ""),
+        # Parallel jobs per build (cargo, make, go)
+        "build_jobs": env.get("DOTFILES_THROTTLE_JOBS", ""),
+    }
+
+
+def wrapper(support, config, scope=True):
+    """
+    Return the words to run in front of ``sh`` for a heavy command.
+
+    Args:
+        support (set): Tools the host has, from the ThrottleSupport fact
+        config (dict): Policy from ``settings()``
+        scope (bool): Use a transient systemd user scope when the host has one
+    """
+
+    words = []
+
+    if scope and {"systemd-run", "user-manager"} <= support:
+        words += ["systemd-run", "--user", "--scope", "--quiet", "--collect"]
+        words += ["-p", f"CPUWeight={CPU_WEIGHT}"]
+        if config["cpu_quota"]:
+            words += ["-p", f"CPUQuota={config['cpu_quota']}"]
+        if config["memory_high"]:
+            words += ["-p", f"MemoryHigh={config['memory_high']}"]
+
+    if "nice" in support:
+        words += ["nice", "-n", str(config["nice"])]
+
+    if "ionice" in support:
+        words += ["ionice", "-c", "2", "-n", str(config["io_priority"])]
+    elif "taskpolicy" in support:
+        # macOS: background QoS throttles both CPU and disk IO
+        words += ["taskpolicy", "-b"]
+
+    return words
+
+
+def build_env(config):
+    jobs = config["build_jobs"]
+    if not jobs:
+        return {}
+    return {
+        "CARGO_BUILD_JOBS": jobs,
+        "MAKEFLAGS": f"-j{jobs}",
+        "GOFLAGS": f"-p={jobs}",
+    }
+
+
+def heavy(scope=True):
+    """
+    Global arguments that run an operation's commands under the throttling policy.
+
+    Compiles and package builds then run at a lower CPU and IO priority, and
+    inside a transient ``systemd-run --user --scope`` with a reduced CPU
+    weight (plus any configured quota and memory limit) where the host has a
+    user manager. ``DOTFILES_THROTTLE=0`` turns all of it off.
+
+    Args:
+        scope (bool): Allow the systemd user scope; pass False on hosts
+            without systemd so the check is skipped
+
+    Example:
+        go.packages(
+            name="Install Go tools",
+            packages=GO_PACKAGES,
+            **throttle.heavy(scope=has_systemd()),
+        )
+    """
+
+    config = settings()
+    if not config["enabled"]:
+        return {}
+
+    words = wrapper(batch.get(ThrottleSupport), config, scope=scope)
+
+    args = {}
+    if words:
+        args["_shell_executable"] = " ".join(words + ["sh"])
+    env = build_env(config)
+    if env:
+        args["_env"] = env
+    return args
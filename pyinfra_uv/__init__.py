@@ -0,0 +1,26 @@
+"""
+uv tool environment operations for pyinfra.
+
+Example usage in configure.py:
+
+    from pyinfra_uv import operations as uv
+
+    uv.tools(
+        name="Install fish-ai",
+        tools={
+            "fish-ai": {
+                "spec": "fish-ai @ git+https://github.com/realiserad/fish-ai",
+                "python": "3.13",
+            },
+        },
+        upgrade=upgrade_mode,
+    )
+
+Environments are checked through their dist-info (version, source URL or
+commit) and whether their python still runs, so a broken environment is
+rebuilt and a changed source reinstalled.
+"""
+
+from . import facts, operations
+
+__all__ = ["facts", "operations"]
@@ -0,0 +1,72 @@
+import json
+import shlex
+
+from pyinfra.api import FactBase
+
+
+def dist_name(name):
+    # Dist-info directories use the normalised project name
+    return name.lower().replace("-", "_").replace(".", "_")
+
+
+class UvTools(FactBase):
+    """
+    Returns the uv tool environments under a tool directory, with version and source.
+
+    Read from each environment's dist-info, so it works without uv and also
+    reports ``healthy`` (whether the environment's python still starts).
+
+    Example:
+        tools = host.get_fact(UvTools, tool_dir="/home/me/.local/share")
+        # Returns: {'fish-ai': {'version': '2.4.0', 'url': 'file:///...', 'commit': None, 'healthy': True}}
+    """
+
+    @staticmethod
+    def default():
+        return {}
+
+    def command(self, tool_dir=None):
+        tool_dir = shlex.quote(tool_dir) if tool_dir else '"${UV_TOOL_DIR:-${XDG_DATA_HOME:-$HOME/.local/share}/uv/tools}"'
+        return (
+            f"for receipt in {tool_dir}/*/uv-receipt.toml; do "
+            '[ -f "$receipt" ] || continue; '
+            'env=$(dirname "$receipt"); '
+            'echo "__tool__ $(basename "$env")"; '
+            'if "$env/bin/python" -c "" 2>/dev/null; then echo __healthy__; fi; '
+            'for info in "$env"/lib/python*/site-packages/*.dist-info; do '
+            'echo "__dist__ $(basename "$info")"; '
+            'if [ -f "$info/direct_url.json" ]; then echo "__url__ $(cat "$info/direct_url.json")"; fi; '
+            "done; "
+            "done"
+        )
+
+    def process(self, output):
+        tools = {}
+        dists = {}
+        current = None
+
+        for line in output:
+            kind, _, value = line.partition(" ")
+            if kind == "__tool__":
+                current = value
+                tools[current] = {"version": None, "url": None, "commit": None, "healthy": False}
+                dists[current] = None
+            elif current is None:
+                continue
+            elif kind == "__healthy__":
+                tools[current]["healthy"] = True
+            elif kind == "__dist__":
+                # "fish_ai-2.4.0.dist-info"
+                name, _, version = value[: -len(".dist-info")].partition("-")
+                dists[current] = name if name.lower() == dist_name(current) else None
+                if dists[current]:
+                    tools[current]["version"] = version
+            elif kind == "__url__" and dists[current]:
+                direct_url = json.loads(value)
+                vcs_info = direct_url.get("vcs_info")
+                tools[current]["url"] = (
+                    f"{vcs_info['vcs']}+{direct_url['url']}" if vcs_info else direct_url.get("url")
+                )
+                tools[current]["commit"] = vcs_info.get("commit_id") if vcs_info else None
+
+        return tools
@@ -0,0 +1,95 @@
+import shlex
+
+from pyinfra import host
+from pyinfra.api import operation
+
+from pyinfra_batch import facts as batch
+
+from .facts import UvTools
+
+
+def _source_url(spec):
+    # "fish-ai @ git+https://github.com/x/fish-ai@main" -> "git+https://github.com/x/fish-ai"
+    if " @ " not in spec:
+        return None
+    url = spec.split(" @ ", 1)[1].strip()
+    scheme, _, rest = url.partition("://")
+    if scheme.startswith("git+") and "@" in rest:
+        url = f"{scheme}://{rest.rsplit('@', 1)[0]}"
+    return url
+
+
+def needs_install(current, spec):
+    """
+    Whether a tool environment (a ``UvTools`` entry, or None) must be
+    (re)installed from ``spec``: missing, broken, or from another source.
+    """
+
+    wanted_url = _source_url(spec)
+    return (
+        current is None
+        or not current["healthy"]
+        or bool(wanted_url and current["url"] != wanted_url)
+    )
+
+
+@operation()
+def tools(tools=None, tool_dir=None, bin_dir=None, upgrade=False):
+    """
+    Manage uv tool environments (``uv tool install``), repairing broken ones.
+
+    Installs go through uv's global cache, so recreating an environment
+    hardlinks already-built wheels instead of downloading and building again.
+
+    Args:
+        tools (dict): name -> {"spec": requirement, "python": version}; the
+            spec defaults to the name, python to uv's default
+        tool_dir (str): Directory holding the environments (UV_TOOL_DIR),
+            each at ``<tool_dir>/<name>``
+        bin_dir (str): Where entry points are linked (UV_TOOL_BIN_DIR)
+        upgrade (bool): Run ``uv tool upgrade`` for tools already installed
+
+    Example:
+        uv.tools(
+            name="Install fish-ai",
+            tools={
+                "fish-ai": {
+                    "spec": "fish-ai @ git+https://github.com/realiserad/fish-ai",
+                    "python": "3.13",
+                },
+            },
+        )
+    """
+
+    if not tools:
+        return
+
+    env = []
+    if tool_dir:
+        env.append(f"UV_TOOL_DIR={shlex.quote(tool_dir)}")
+    if bin_dir:
+        env.append(f"UV_TOOL_BIN_DIR={shlex.quote(bin_dir)}")
+    uv = " ".join([*env, "uv tool"])
+
+    # Memoized: the deploy usually asked already, to decide on downloads
+    installed = batch.get(UvTools, tool_dir=tool_dir)
+
+    for name, options in tools.items():
+        spec = options.get("spec", name)
+        current = installed.get(name)
+
+        if needs_install(current, spec):
+            python = options.get("python")
+            yield "{0} install --force{1} {2}".format(
+                uv,
+                f" --python {shlex.quote(python)}" if python else "",
+                shlex.quote(spec),
+            )
+        elif upgrade:
+            yield "{0} upgrade {1}".format(uv, shlex.quote(name))
+        else:
+            host.noop(
+                "uv tool {0} is installed ({1})".format(
+                    name, current["commit"] or current["version"]
+                )
+            )
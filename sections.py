@@ -0,0 +1,52 @@
+"""
+Tag sections of configure.py and the order they depend on.
+
+Each key is a tag understood by ``has_tag`` in configure.py. ``requires`` lists
+the sections that must have finished successfully before it may start, and
+``locks`` names shared resources that sections may not hold concurrently (see
+``LOCKS`` for how many holders each resource allows).
+
+Sections run in this order when configure.py is run directly; the scheduler in
+``pyinfra_runner`` uses the graph to run independent sections side by side.
+"""
+
+import os
+
+# Shared resources and how many sections may hold each at once
+LOCKS = {
+    # pacman/apt/apk/brew all take a global database lock
+    "system-packages": 1,
+    # Compiles and package builds, which each take every core they can get;
+    # DOTFILES_HEAVY_JOBS raises the cap on machines with room to spare
+    "heavy-builds": int(os.environ.get("DOTFILES_HEAVY_JOBS", "1")),
+    # `bun add -g` rewrites the one global package.json and lockfile
+    "bun-global": 1,
+}
+
+SECTIONS = {
+    # Smartcard keys, ~/.ssh, the dot repo and config symlinks
+    "core": {"requires": []},
+    # Also installs the npm-distributed LSP packages with bun
+    "packages": {"requires": ["core"], "locks": ["system-packages", "bun-global"]},
+    # gpg-agent and git signing need gnupg and the smartcard keys
+    "git": {"requires": ["core", "packages"]},
+    "tpm": {"requires": ["core"]},
+    # Private repos are cloned over SSH and may need system deps
+    "apps": {
+        "requires": ["core", "git", "packages"],
+        "locks": ["system-packages", "heavy-builds"],
+    },
+    "fish": {"requires": ["core", "packages"]},
+    # Node is installed through nvm.fish
+    "node": {"requires": ["fish"]},
+    "bun": {"requires": ["core"], "locks": ["bun-global"]},
+    "cargo": {"requires": ["core"], "locks": ["heavy-builds"]},
+    # Parsers are built with tree-sitter-cli from the cargo section
+    "treesitter": {"requires": ["cargo"], "locks": ["heavy-builds"]},
+    "go": {"requires": ["core"], "locks": ["heavy-builds"]},
+    # paru and the rootless docker units need the bare metal docker packages
+    "aur": {"requires": ["packages"], "locks": ["system-packages", "heavy-builds"]},
+    # direnv comes from the terminal packages
+    "skills": {"requires": ["core", "packages"]},
+    "ssh-server": {"requires": ["core"], "locks": ["system-packages"]},
+}